@@ -1024,6 +1024,108 @@ def UQTkGSA(pc_model, pc_coeffs):
 
     return mainsens, totsens, jointsens
 ################################################################################
+def _dgsm_deriv_matrix(pc_type,nord):
+    """
+    Matrix D [nord+1,nord+1] with the derivative of each 1D basis polynomial expanded in
+    the same basis, psi_n'(x) = sum_k D[n,k] psi_k(x), and the 1D norms-squared [nord+1,]
+    """
+    D = np.zeros((nord+1,nord+1))
+    n = np.arange(nord+1)
+    if pc_type == 'HG':
+        # He_n' = n He_{n-1}
+        D[n[1:],n[1:]-1] = n[1:]
+        normsq = np.cumprod(np.maximum(n,1)).astype(float)
+    elif pc_type in ['LU','LU_N']:
+        # P_n' = sum_{k=n-1,n-3,...} (2k+1) P_k
+        for iord in range(1,nord+1):
+            k = np.arange(iord-1,-1,-2)
+            D[iord,k] = 2.0*k+1.0
+        normsq = 1.0/(2.0*n+1.0)
+        if pc_type == 'LU_N':
+            D = D*np.sqrt(2.0*n+1.0)[:,np.newaxis]/np.sqrt(2.0*n+1.0)[np.newaxis,:]
+            normsq = np.ones(nord+1)
+    else:
+        raise ValueError('No analytical DGSM for PC type %s'%(pc_type))
+    return D, normsq
+
+def UQTkDGSM(pc_model, pc_coeffs, n_samples=None, n_batch=10000):
+    """
+    Computes derivative-based global sensitivity measures (DGSM) of a PCE,
+    nu_i = E[(df/dxi_i)^2] with respect to the germ, and the upper bounds on the
+    total Sobol' indices they give through the Poincare inequality,
+    S_i^T <= C nu_i / Var(f), with C=1 for Hermite-Gaussian and C=4/pi^2 for
+    Legendre-Uniform germs. For HG, LU and LU_N bases the measures are computed
+    exactly from the multiindex and coefficients, by expanding the derivative of
+    the PCE in the same basis. Otherwise, or if n_samples is given, they are
+    estimated by Monte Carlo on germ samples, with gradients evaluated through
+    PCSet::dPhi in batches.
+
+    Input:
+        pc_model:  PC object with information about the basis
+        pc_coeffs: NumPy array of PC coefficients [#PCTerms,]
+        n_samples: number of Monte Carlo samples (defaults to analytical evaluation
+                   where possible, and to 100000 samples otherwise)
+        n_batch:   number of samples per gradient evaluation batch
+    Output:
+        dgsm:      1D NumPy array of the DGSM for each dimension [#dim,]
+        totbound:  1D NumPy array of the upper bounds on the total sensitivities for each
+                   dimension [#dim,] (NaN if the Poincare constant of the germ is not known)
+    """
+    pc_coeffs = np.asarray(pc_coeffs,dtype=float)
+    ndim = pc_model.GetNDim()
+    pc_type = pc_model.GetPCType()
+    mi = np.array(UQTkGetMultiIndex(pc_model,ndim),dtype=int).reshape(-1,ndim)
+
+    # total variance from the basis norms
+    normsq_uqtk = uqtkarray.dblArray1D()
+    pc_model.GetNormSq(normsq_uqtk)
+    normsq = uqtkarray.uqtk2numpy(normsq_uqtk)
+    nonconst = np.sum(mi,axis=1) > 0
+    totvar = np.sum(pc_coeffs[nonconst]**2*normsq[nonconst])
+
+    if n_samples is None and pc_type in ['HG','LU','LU_N']:
+        nord = int(np.max(mi)) if mi.size > 0 else 0
+        D, normsq1d = _dgsm_deriv_matrix(pc_type,nord)
+        dgsm = np.zeros(ndim)
+        for idim in range(ndim):
+            # coefficients of df/dxi_i: each term a contributes D[a_i,k] c_a to the
+            # term with a_i replaced by k
+            iterm, kord = np.nonzero(D[mi[:,idim]])
+            if iterm.shape[0] == 0:
+                continue
+            dmi = mi[iterm].copy()
+            dmi[:,idim] = kord
+            dmi_uniq, inv = np.unique(dmi,axis=0,return_inverse=True)
+            dcoef = np.zeros(dmi_uniq.shape[0])
+            np.add.at(dcoef,inv.ravel(),pc_coeffs[iterm]*D[mi[iterm,idim],kord])
+            dgsm[idim] = np.sum(dcoef**2*np.prod(normsq1d[dmi_uniq],axis=1))
+    else:
+        if n_samples is None:
+            n_samples = 100000
+        mi_uqtk = uqtkarray.intArray2D(mi.shape[0],ndim)
+        pc_model.GetMultiIndex(mi_uqtk)
+        ck_uqtk = uqtkarray.numpy2uqtk(pc_coeffs)
+        dgsm = np.zeros(ndim)
+        for i0 in range(0,n_samples,n_batch):
+            nb = min(n_batch,n_samples-i0)
+            germ_uqtk = uqtkarray.dblArray2D(nb,ndim)
+            pc_model.DrawSampleVar(germ_uqtk)
+            grad_uqtk = uqtkarray.dblArray2D()
+            pc_model.dPhi(germ_uqtk,mi_uqtk,grad_uqtk,ck_uqtk)
+            dgsm += np.sum(uqtkarray.uqtk2numpy(grad_uqtk)**2,axis=0)
+        dgsm /= n_samples
+
+    # Poincare constants of the germ
+    if pc_type == 'HG':
+        cpoinc = 1.0
+    elif pc_type in ['LU','LU_N']:
+        cpoinc = 4.0/np.pi**2
+    else:
+        cpoinc = np.nan
+    totbound = cpoinc*dgsm/totvar
+
+    return dgsm, totbound
+################################################################################
 def UQTkKDE(fcn_evals):
     """
     Performs kernel density estimation
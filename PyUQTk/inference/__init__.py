@@ -28,3 +28,8 @@
 from . import mcmc
 from . import postproc
 from . import evidence_solvers
+from . import bayes_evid
+from . import memo
+from . import nested
+from . import streamstats
+from . import diagnostics
@@ -27,8 +27,15 @@
 #=====================================================================================
 import numpy as npy
 import scipy.stats
+import scipy.linalg
+from scipy.special import logsumexp
+try:
+    from .mcmc import batch_logpost
+except ImportError:
+    from mcmc import batch_logpost
 
-def bayesevid_ChibJeliazkov(spls_star,spls,llp_star,llp,likTpr,lpinfo,prop_cov,coveps,gamma):
+def bayesevid_ChibJeliazkov(spls_star,spls,llp_star,llp,likTpr,lpinfo,prop_cov,coveps,gamma,
+                            pool=None,vectorized=False,nchunks=None):
     '''
     Implements the one block sampling procedure from Chib and Jeliazkov 2001 JASA paper
     Inputs:
@@ -41,6 +48,10 @@ def bayesevid_ChibJeliazkov(spls_star,spls,llp_star,llp,likTpr,lpinfo,prop_cov,c
         prop_cov  - proposal covariance (from MCMC)
         coveps    - factor to be added to diagonal to ensure matrix is stricly positive definite
         gamma     - proposal covariance scaling factor
+        pool      - optional pool (object with a map method) used to evaluate the
+                    denominator proposals in chunks, see mcmc.batch_logpost
+        vectorized- whether likTpr accepts a 2D array of samples and returns arrays
+        nchunks   - number of chunks for the pool (defaults to the number of cpus)
     '''
     cdim   = spls_star.shape[0]
     npSpls = spls.shape[0]
@@ -48,27 +59,15 @@ def bayesevid_ChibJeliazkov(spls_star,spls,llp_star,llp,likTpr,lpinfo,prop_cov,c
     sigcv   = 2.4*gamma/npy.sqrt(cdim)
     covPeps = sigcv**2*(prop_cov + coveps * npy.identity(cdim))
     Rchol   = scipy.linalg.cholesky(covPeps)
-    # compute numerator
-    num = 0.0
-    for i in range(npSpls):
-        if llp_star-llp[i]<0.0:
-            alpha = npy.exp(llp_star-llp[i])
-        else:
-            alpha = 1.0
-        #print(spls[i], llp_star, covPeps)
-        val = scipy.stats.multivariate_normal.pdf(spls[i], mean=spls_star, cov=covPeps)
-        num = num+val*alpha
-    # compute denominator
-    den = 0.0
-    for i in range(npSpls):
-        u = spls_star + npy.dot(npy.random.randn(1,cdim),Rchol)[0];
-        p2Lik,p2Pri = likTpr(u,lpinfo)
-        if p2Lik + p2Pri - llp_star < 0.0:
-            alpha = npy.exp(p2Lik + p2Pri - llp_star)
-        else:
-            alpha = 1.0
-        den = den + alpha
-    return llp_star-npy.log(num)+npy.log(den)
+    # compute numerator: proposal log-density at all samples from the Cholesky factor
+    z    = scipy.linalg.solve_triangular(Rchol,(spls-spls_star).T,trans='T')
+    lq   = -0.5*npy.sum(z**2,axis=0)-npy.sum(npy.log(npy.diag(Rchol)))-0.5*cdim*npy.log(2*npy.pi)
+    lnum = logsumexp(lq+npy.minimum(llp_star-npy.asarray(llp),0.0))
+    # compute denominator: all proposals are evaluated as one batch
+    u = spls_star + npy.dot(npy.random.randn(npSpls,cdim),Rchol)
+    p2Lik,p2Pri = batch_logpost(likTpr,u,lpinfo,pool=pool,vectorized=vectorized,nchunks=nchunks)
+    lden = logsumexp(npy.minimum(p2Lik+p2Pri-llp_star,0.0))
+    return llp_star-lnum+lden
 
 def log_lxp(x,info):
     '''
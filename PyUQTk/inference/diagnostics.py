@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+#
+# Convergence diagnostics for many MCMC chains and many parameters at once:
+# rank-normalized split-Rhat, bulk/tail effective sample sizes and Monte Carlo
+# standard errors, following
+#     A. Vehtari, A. Gelman, D. Simpson, B. Carpenter, P.-C. Buerkner,
+#     "Rank-normalization, folding, and localization: An improved Rhat for
+#     assessing convergence of MCMC", Bayesian Analysis 16(2), 2021.
+# All functions take an array of samples with dimensions [nchains, nsteps, nparams]
+# (a 2D array [nsteps, nparams] is treated as a single chain) and return one value
+# per parameter.
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+import numpy as np
+from scipy import fft, special, stats
+
+###################################################################################################
+def as_chains(samples):
+    """Returns the samples as a float array [nchains, nsteps, nparams].
+    Accepts a 1D array (one chain, one parameter), a 2D array [nsteps, nparams]
+    (one chain), a 3D array, or a list of 2D chains, which are truncated to the
+    length of the shortest one.
+    """
+    if isinstance(samples, (list, tuple)):
+        nmin = min([np.shape(ch)[0] for ch in samples])
+        samples = np.array([np.reshape(ch, (np.shape(ch)[0], -1))[:nmin] for ch in samples], dtype=float)
+    samples = np.asarray(samples, dtype=float)
+    if samples.ndim == 1:
+        samples = samples[np.newaxis, :, np.newaxis]
+    elif samples.ndim == 2:
+        samples = samples[np.newaxis, :, :]
+    return samples
+
+###################################################################################################
+# Internally, the samples are stored as [nparams, nchains, nsteps] so that sorting and FFTs
+# act along the last, contiguous axis.
+def _to_internal(x):
+    return np.ascontiguousarray(np.transpose(as_chains(x), (2, 0, 1)))
+
+def _split(y):
+    """Splits each chain in two halves, [nparams, nchains, nsteps] -> [nparams, 2*nchains, nsteps//2].
+    The middle step of odd-length chains is dropped.
+    """
+    nh = y.shape[2] // 2
+    return np.concatenate((y[:, :, :nh], y[:, :, y.shape[2]-nh:]), axis=1)
+
+def split_chains(x):
+    """Splits each chain in two halves, [nchains, nsteps, nparams] -> [2*nchains, nsteps//2, nparams]"""
+    return np.transpose(_split(_to_internal(x)), (1, 2, 0))
+
+class _Pooled(object):
+    """Samples of each parameter pooled over chains and sorted once; provides the average
+    ranks (ties, e.g. from rejected MCMC proposals, share their mean rank) and quantiles"""
+    def __init__(self, y):
+        self.shape = y.shape
+        flat = y.reshape(y.shape[0], -1)
+        self.nall = flat.shape[1]
+        self.order = np.argsort(flat, axis=1)
+        self.sorted = np.take_along_axis(flat, self.order, axis=1)
+
+    def ranks(self):
+        npar, nall = self.sorted.shape
+        idx = np.broadcast_to(np.arange(nall), (npar, nall))
+        new = np.ones((npar, nall), dtype=bool)
+        new[:, 1:] = self.sorted[:, 1:] != self.sorted[:, :-1]
+        last = np.ones((npar, nall), dtype=bool)
+        last[:, :-1] = new[:, 1:]
+        first = np.maximum.accumulate(np.where(new, idx, 0), axis=1)
+        end = np.minimum.accumulate(np.where(last, idx, nall)[:, ::-1], axis=1)[:, ::-1]
+        ranks = np.empty((npar, nall))
+        np.put_along_axis(ranks, self.order, 0.5*(first+end)+1.0, axis=1)
+        return ranks.reshape(self.shape)
+
+    def quantile(self, prob):
+        """Quantiles (linear interpolation between order statistics) -> [len(prob), nparams]"""
+        pos = np.atleast_1d(prob)*(self.nall-1)
+        lo = np.floor(pos).astype(int)
+        hi = np.minimum(lo+1, self.nall-1)
+        w = pos-lo
+        return self.sorted[:, lo].T*(1.0-w[:, np.newaxis]) + self.sorted[:, hi].T*w[:, np.newaxis]
+
+def _normal_scores(pooled):
+    return special.ndtri((pooled.ranks()-0.375)/(pooled.nall+0.25))
+
+def rank_normalize(x):
+    """Replaces the samples of each parameter by the normal scores of their ranks,
+    pooled over all chains (average ranks for ties)
+    """
+    return np.transpose(_normal_scores(_Pooled(_to_internal(x))), (1, 2, 0))
+
+###################################################################################################
+def _rhat_basic(y):
+    """Potential scale reduction factor of chains [nparams, nchains, nsteps] (no splitting)"""
+    ns = y.shape[2]
+    w = np.mean(np.var(y, axis=2, ddof=1), axis=1)
+    b = ns*np.var(np.mean(y, axis=2), axis=1, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.sqrt(((ns-1.0)/ns*w + b/ns)/w)
+
+def _rhat(ys, pooled):
+    med = pooled.quantile(0.5)[0]
+    yf = np.abs(ys - med[:, np.newaxis, np.newaxis])
+    return np.maximum(_rhat_basic(_normal_scores(pooled)), _rhat_basic(_normal_scores(_Pooled(yf))))
+
+def rhat(x):
+    """Rank-normalized split-Rhat: the maximum of the split-Rhat of the rank-normalized
+    samples (location) and of the rank-normalized folded samples (scale)
+    """
+    ys = _split(_to_internal(x))
+    return _rhat(ys, _Pooled(ys))
+
+###################################################################################################
+def _ess_basic(y, block=100):
+    """Effective sample size of chains [nparams, nchains, nsteps] (no splitting), with
+    Geyer's initial monotone sequence estimator applied to all parameters at once.
+    Parameters are processed in blocks of 'block' to bound the memory used by the FFTs.
+    """
+    npar, nc, ns = y.shape
+    nfft = fft.next_fast_len(2*ns-1, real=True)
+    ess = np.empty(npar)
+    for i in range(0, npar, block):
+        yb = y[i:i+block]
+        mchain = np.mean(yb, axis=2)
+        f = fft.rfft(yb - mchain[:, :, np.newaxis], n=nfft, axis=2)
+        acov = fft.irfft(f.real**2+f.imag**2, n=nfft, axis=2)[:, :, :ns]/ns
+        acov = np.mean(acov, axis=1)
+        w = acov[:, 0]*ns/(ns-1.0)
+        varplus = w*(ns-1.0)/ns
+        if nc > 1:
+            varplus = varplus + np.var(mchain, axis=1, ddof=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rho = 1.0 - (w[:, np.newaxis] - acov)/varplus[:, np.newaxis]
+        rho[:, 0] = 1.0
+        # Sums of adjacent pairs, truncated at the first negative one, made monotone
+        npair = ns // 2
+        pair = rho[:, 0:2*npair:2] + rho[:, 1:2*npair:2]
+        pos = np.cumprod(pair > 0.0, axis=1).astype(bool)
+        pair = np.minimum.accumulate(np.where(pos, pair, np.inf), axis=1)
+        pair = np.where(pos, pair, 0.0)
+        tau = -1.0 + 2.0*np.sum(pair, axis=1)
+        tau = np.maximum(tau, 1.0/np.log10(nc*ns))
+        with np.errstate(invalid='ignore'):
+            ess[i:i+block] = np.where(np.isfinite(varplus) & (varplus > 0.0), nc*ns/tau, np.nan)
+    return ess
+
+def _ess_tail(ys, pooled, prob, block):
+    q = pooled.quantile([prob, 1.0-prob])
+    return np.minimum(_ess_basic((ys <= q[0][:, np.newaxis, np.newaxis]).astype(float), block),
+                      _ess_basic((ys <= q[1][:, np.newaxis, np.newaxis]).astype(float), block))
+
+def _mcse_quantile(ys, pooled, prob, block):
+    q = pooled.quantile(prob)[0]
+    ess = _ess_basic((ys <= q[:, np.newaxis, np.newaxis]).astype(float), block)
+    p = np.array([0.1586553, 0.8413447])[:, np.newaxis]
+    a = stats.beta.ppf(p, ess*prob+1.0, ess*(1.0-prob)+1.0)
+    idx = np.clip(np.ceil(a*pooled.nall).astype(int)-1, 0, pooled.nall-1)
+    th = np.take_along_axis(pooled.sorted, idx.T, axis=1)
+    return 0.5*(th[:, 1]-th[:, 0])
+
+def ess_bulk(x, block=100):
+    """Bulk effective sample size: ESS of the rank-normalized split chains"""
+    return _ess_basic(_normal_scores(_Pooled(_split(_to_internal(x)))), block)
+
+def ess_tail(x, prob=0.05, block=100):
+    """Tail effective sample size: the smaller of the ESS of the indicators of the
+    'prob' and '1-prob' quantiles, on the split chains
+    """
+    ys = _split(_to_internal(x))
+    return _ess_tail(ys, _Pooled(ys), prob, block)
+
+def ess_mean(x, block=100):
+    """Effective sample size for the mean, on the split chains (no rank normalization)"""
+    return _ess_basic(_split(_to_internal(x)), block)
+
+###################################################################################################
+def mcse_mean(x, block=100):
+    """Monte Carlo standard error of the posterior mean"""
+    ys = _split(_to_internal(x))
+    sd = np.std(ys.reshape(ys.shape[0], -1), axis=1, ddof=1)
+    return sd/np.sqrt(_ess_basic(ys, block))
+
+def mcse_quantile(x, prob=0.5, block=100):
+    """Monte Carlo standard error of the 'prob' quantile, from the ESS of its indicator
+    and the Beta approximation of the distribution of the quantile rank
+    """
+    ys = _split(_to_internal(x))
+    return _mcse_quantile(ys, _Pooled(ys), prob, block)
+
+###################################################################################################
+def convergence_diagnostics(x, prob=0.05, block=100):
+    """Computes all diagnostics of chains [nchains, nsteps, nparams].
+    Returns a dictionary of arrays with one entry per parameter:
+        rhat, ess_bulk, ess_tail, ess_mean, mcse_mean, mcse_median,
+        mean, sd (pooled over chains)
+    """
+    ys = _split(_to_internal(x))
+    pooled = _Pooled(ys)
+    yflat = ys.reshape(ys.shape[0], -1)
+    diag = {}
+    diag['rhat'       ] = _rhat(ys, pooled)
+    diag['ess_bulk'   ] = _ess_basic(_normal_scores(pooled), block)
+    diag['ess_tail'   ] = _ess_tail(ys, pooled, prob, block)
+    diag['ess_mean'   ] = _ess_basic(ys, block)
+    diag['mean'       ] = np.mean(yflat, axis=1)
+    diag['sd'         ] = np.std(yflat, axis=1, ddof=1)
+    diag['mcse_mean'  ] = diag['sd']/np.sqrt(diag['ess_mean'])
+    diag['mcse_median'] = _mcse_quantile(ys, pooled, 0.5, block)
+    return diag
+
+###################################################################################################
+def print_diagnostics(diag, v_names=None):
+    """Prints a table of the dictionary returned by convergence_diagnostics()"""
+    npar = diag['rhat'].shape[0]
+    if v_names is None:
+        v_names = ['p'+str(i) for i in range(npar)]
+    print('%27s' % "Parameter :", '%9s' % "Rhat", '%10s' % "ESS bulk", '%10s' % "ESS tail", '%15s' % "MCSE mean", '%15s' % "MCSE median")
+    for i_v in range(npar):
+        print('%25s' % v_names[i_v], ":", '%9.4f' % diag['rhat'][i_v], '%10.1f' % diag['ess_bulk'][i_v],
+              '%10.1f' % diag['ess_tail'][i_v], '%15.8e' % diag['mcse_mean'][i_v], '%15.8e' % diag['mcse_median'][i_v])
@@ -35,7 +35,48 @@
 import numpy as npy
 import os
 import scipy.stats as stats
+import scipy.linalg
+from scipy.special import logsumexp
 import subprocess
+try:
+    from .mcmc import batch_logpost
+except ImportError:
+    from mcmc import batch_logpost
+
+
+################################################################################
+# Function: LogMeanExp
+#
+# Inputs:
+# ln_values --- vector of ln-values
+# nboot --- number of bootstrap replicates for the standard error
+#           (0 for no standard error)
+# nchunk --- number of bootstrap replicates resampled at once (defaults to
+#            keeping about 4M resampled values in memory)
+#
+# Outputs:
+# ln of the mean of exp(ln_values), computed without overflow/underflow, and
+# its bootstrap standard error if nboot > 0
+################################################################################
+
+def LogMeanExp(ln_values, nboot=0, nchunk=None):
+
+    ln_values = npy.asarray(ln_values, dtype=float).ravel()
+    n_samples = ln_values.shape[0]
+    ln_mean = logsumexp(ln_values) - npy.log(n_samples)
+    if nboot <= 0:
+        return ln_mean
+
+    # Bootstrap replicates are resampled in chunks to bound the memory use.
+    if nchunk is None:
+        nchunk = max(1, 4194304 // n_samples)
+    ln_boot = npy.zeros(nboot)
+    for i in range(0, nboot, nchunk):
+        nb = min(nchunk, nboot - i)
+        idx = npy.random.randint(0, n_samples, size=(nb, n_samples))
+        ln_boot[i:i+nb] = logsumexp(ln_values[idx], axis=1) - npy.log(n_samples)
+
+    return ln_mean, npy.std(ln_boot, ddof=1)
 
 
 
@@ -44,21 +85,17 @@ import subprocess
 #
 # Inputs:
 # ln_likelihood --- vector of ln-likelihood values corresponding to prior samples
+# nboot --- optional number of bootstrap replicates for the standard error
 #
 # Outputs:
-# ln-evidence estimate
+# ln-evidence estimate (and its bootstrap standard error if nboot > 0)
 ################################################################################
 
-def LikelihoodMC_PriorSamples(ln_likelihood):
+def LikelihoodMC_PriorSamples(ln_likelihood, nboot=0):
 
     # Performs Monte Carlo marginalization of the likelihood using
     # prior samples.
-    running_sum = 0.0
-    n_samples = ln_likelihood.shape[0]
-    for i in range(n_samples):
-        running_sum = running_sum + npy.exp(ln_likelihood[i])
-
-    return npy.log(running_sum / n_samples)
+    return LogMeanExp(ln_likelihood, nboot)
 
 
 
@@ -94,12 +131,13 @@ def LikelihoodMC_PriorSamples(ln_likelihood):
 # ln_importance_input --- pass back in the output importance_samples_ln_PDF
 #                         generated from stage 1 without modifications
 # stage --- set to 2 for stage 2
+# nboot --- optional number of bootstrap replicates for the standard error
 #
 # Stage 2 outputs:
-# ln-evidence estimate
+# ln-evidence estimate (and its bootstrap standard error if nboot > 0)
 ################################################################################
 
-def ImportanceLikelihoodMC_PosteriorSamples(posterior_samples, n_importance_samples, ln_prior, ln_likelihood, ln_importance_input, stage):
+def ImportanceLikelihoodMC_PosteriorSamples(posterior_samples, n_importance_samples, ln_prior, ln_likelihood, ln_importance_input, stage, nboot=0):
 
     # Performs Monte Carlo marginalization of the likelihood using
     # importance sampling. Here the importance distribution is the
@@ -115,11 +153,8 @@ def ImportanceLikelihoodMC_PosteriorSamples(posterior_samples, n_importance_samp
         if (posterior_samples.shape[1] == 1):
             posterior_sample_cov = posterior_sample_cov.reshape(1, 1)
 
-        # Generates samples from importance distribution.
-        importance_samples = npy.zeros((n_importance_samples, posterior_samples.shape[1]))
-        importance_samples_ln_PDF = npy.zeros(n_importance_samples)
-        for i in range(n_importance_samples):
-            importance_samples[i, :] = npy.random.multivariate_normal(posterior_sample_mean, posterior_sample_cov.reshape(posterior_samples.shape[1], posterior_samples.shape[1]))
+        # Generates samples from importance distribution in bulk.
+        importance_samples = npy.random.multivariate_normal(posterior_sample_mean, posterior_sample_cov, size=n_importance_samples)
         # Computes the ln-PDF values of importance sample in bulk.
         importance_samples_ln_PDF = stats.multivariate_normal.logpdf(importance_samples, posterior_sample_mean, posterior_sample_cov)
 
@@ -127,13 +162,9 @@ def ImportanceLikelihoodMC_PosteriorSamples(posterior_samples, n_importance_samp
 
     elif (stage == 2):
         # Computes the importance MC estimate.
-        running_sum = 0.0
-        n_samples = ln_likelihood.shape[0]
-        # Need to make this running sum robust against overflow by updating the running average instead
-        for i in range(n_samples):
-            running_sum = running_sum + npy.exp(ln_likelihood[i] + ln_prior[i] - ln_importance_input[i])
+        ln_weights = npy.asarray(ln_likelihood) + npy.asarray(ln_prior) - npy.asarray(ln_importance_input)
 
-        return npy.log(running_sum / n_samples)
+        return LogMeanExp(ln_weights, nboot)
     else:
         print('Error: ImportanceLikelihoodMC_PosteriorSamples misuse.')
         exit
@@ -177,17 +208,104 @@ def PosteriorGaussian_PosteriorSamples(posterior_samples, ln_prior, ln_likelihoo
 # Inputs:
 # ln_likelihood --- vector of ln-likelihood values corresponding to the
 #                   posterior samples
+# nboot --- optional number of bootstrap replicates for the standard error
 #
 # Outputs:
-# ln-evidence estimate
+# ln-evidence estimate (and its bootstrap standard error if nboot > 0)
 ################################################################################
 
-def Harmonic_PosteriorSamples(ln_likelihood):
+def Harmonic_PosteriorSamples(ln_likelihood, nboot=0):
 
     # Performs Harmonic estimate using posterior samples.
-    running_sum = 0.0
-    n_samples = ln_likelihood.shape[0]
-    for i in range(n_samples):
-        running_sum = running_sum + 1.0 / npy.exp(ln_likelihood[i])
+    res = LogMeanExp(-npy.asarray(ln_likelihood), nboot)
+    if nboot > 0:
+        return -res[0], res[1]
+
+    return -res
+
+
+
+################################################################################
+# Function: BridgeSampling_PosteriorSamples
+#
+# Inputs:
+# posterior_samples --- array of posterior samples (each row is a sample),
+#                       e.g. a dram chain after burn-in
+# ln_likelihood --- vector of ln-likelihood values corresponding to the posterior
+#                   samples (e.g. column 1 of the dram 'minfo' output)
+# ln_prior --- vector of ln-prior values corresponding to the posterior samples
+#              (e.g. column 2 of the dram 'minfo' output)
+# likTpr --- log-posterior function (same convention as for dram), only called
+#            for the proposal samples
+# lpinfo --- settings passed to likTpr
+# n_proposal --- number of proposal samples (defaults to the number of posterior
+#                samples used in the bridge)
+# pool --- optional pool (object with a map method) to evaluate the proposal
+#          samples in chunks, see mcmc.batch_logpost
+# vectorized --- whether likTpr accepts a 2D array of samples
+# nchunks --- number of chunks for the pool (defaults to the number of cpus)
+# tol --- convergence tolerance of the fixed point iteration, in ln-evidence
+# maxiter --- maximum number of fixed point iterations
+#
+# Outputs:
+# ln-evidence estimate
+# approximate standard error of the ln-evidence estimate (relative error of the
+# evidence, assuming independent posterior samples)
+################################################################################
+
+def BridgeSampling_PosteriorSamples(posterior_samples, ln_likelihood, ln_prior, likTpr, lpinfo, n_proposal=None, pool=None, vectorized=False, nchunks=None, tol=1.e-10, maxiter=1000):
+
+    # Optimal bridge sampling (Meng and Wong, 1996) with a Gaussian proposal
+    # (Gronau et al., 2017). The first half of the posterior samples is used to
+    # fit the proposal and the second half in the bridge estimator, which reuses
+    # the stored ln-likelihood and ln-prior values of the posterior samples.
+    posterior_samples = npy.asarray(posterior_samples, dtype=float)
+    if (posterior_samples.ndim == 1):
+        posterior_samples = posterior_samples.reshape(-1, 1)
+    n_dim = posterior_samples.shape[1]
+    n_fit = posterior_samples.shape[0] // 2
+    ln_post = npy.asarray(ln_likelihood) + npy.asarray(ln_prior)
+
+    # Gaussian proposal from the first half of the samples.
+    proposal_mean = npy.mean(posterior_samples[:n_fit], axis = 0)
+    proposal_cov = npy.cov(posterior_samples[:n_fit], rowvar = False).reshape(n_dim, n_dim)
+    proposal_chol = scipy.linalg.cholesky(proposal_cov, lower = True)
+    ln_det = 2.0 * npy.sum(npy.log(npy.diag(proposal_chol)))
+
+    def ln_proposal(x):
+        z = scipy.linalg.solve_triangular(proposal_chol, (x - proposal_mean).T, lower = True)
+        return -0.5 * npy.sum(z**2, axis = 0) - 0.5 * ln_det - 0.5 * n_dim * npy.log(2 * npy.pi)
+
+    # Posterior samples in the bridge: stored evaluations only.
+    l1 = ln_post[n_fit:] - ln_proposal(posterior_samples[n_fit:])
+    n1 = l1.shape[0]
+
+    # Proposal samples: drawn and evaluated as one batch.
+    if n_proposal is None:
+        n_proposal = n1
+    proposal_samples = proposal_mean + npy.dot(npy.random.randn(n_proposal, n_dim), proposal_chol.T)
+    ln_lik2, ln_pri2 = batch_logpost(likTpr, proposal_samples, lpinfo, pool = pool, vectorized = vectorized, nchunks = nchunks)
+    l2 = ln_lik2 + ln_pri2 - ln_proposal(proposal_samples)
+    l2 = npy.where(npy.isnan(l2), -npy.inf, l2)
+    n2 = l2.shape[0]
+
+    # Fixed point iteration for the ln-evidence, started from the importance
+    # sampling estimate.
+    ln_s1 = npy.log(float(n1) / (n1 + n2))
+    ln_s2 = npy.log(float(n2) / (n1 + n2))
+    ln_z = LogMeanExp(l2)
+    for i in range(maxiter):
+        ln_num = logsumexp(l2 - npy.logaddexp(ln_s1 + l2, ln_s2 + ln_z)) - npy.log(n2)
+        ln_den = logsumexp(-npy.logaddexp(ln_s1 + l1, ln_s2 + ln_z)) - npy.log(n1)
+        ln_z_new = ln_num - ln_den
+        converged = abs(ln_z_new - ln_z) < tol
+        ln_z = ln_z_new
+        if converged:
+            break
+
+    # Approximate relative mean squared error (Fruhwirth-Schnatter, 2004).
+    f1 = npy.exp(-npy.logaddexp(ln_s1 + l1, ln_s2 + ln_z) - ln_den)
+    f2 = npy.exp(l2 - npy.logaddexp(ln_s1 + l2, ln_s2 + ln_z) - ln_num)
+    rel_mse = npy.var(f2) / n2 + npy.var(f1) / n1
 
-    return -npy.log(running_sum / n_samples)
+    return ln_z, npy.sqrt(rel_mse)
@@ -30,6 +30,7 @@ import scipy.stats
 import scipy.linalg
 import math
 import uuid
+import os
 import matplotlib.pyplot as plt
 
 global Rmat,invRmat
@@ -99,6 +100,374 @@ def HMCMC(U,grad_U,dt,nT,q):
         return current_q
 
 
+#---------------------------------------------------------------------------------------
+#  HMC/NUTS sampler driver
+#  Multi-step driver around the leapfrog scheme used in HMCMC, with cached
+#  energy/gradient, dual-averaging step size and mass matrix adaptation
+#---------------------------------------------------------------------------------------
+def _hmc_energy(U,grad_U,q):
+    """
+    Potential energy and its gradient at q; non-finite energies are mapped to +inf
+    """
+    u = npy.atleast_1d(U(q))[0]
+    if not npy.isfinite(u):
+        return npy.inf, npy.zeros(len(q))
+    g = npy.asarray(grad_U(q),dtype=float).reshape(-1)
+    return float(u), g
+
+def _hmc_velocity(p,minv):
+    """
+    dq/dt = M^{-1} p for a diagonal (1D minv) or dense (2D minv) inverse mass matrix
+    """
+    if minv.ndim == 1:
+        return minv*p
+    return npy.dot(minv,p)
+
+def _hmc_kinetic(p,minv):
+    return 0.5*npy.dot(p,_hmc_velocity(p,minv))
+
+def _hmc_momentum(minv,mchol):
+    """
+    Draw p ~ N(0,M); mchol is the lower Cholesky factor of M for a dense metric
+    """
+    z = npy.random.randn(minv.shape[0])
+    if minv.ndim == 1:
+        return z/npy.sqrt(minv)
+    return npy.dot(mchol,z)
+
+def _hmc_setmetric(minv):
+    """
+    Returns the inverse mass matrix and the Cholesky factor of the mass matrix
+    """
+    if minv.ndim == 1:
+        return minv, None
+    return minv, scipy.linalg.cholesky(scipy.linalg.inv(minv),lower=True)
+
+def _leapfrog(q,p,g,dt,U,grad_U,minv):
+    """
+    One leapfrog step starting from (q,p) with cached gradient g at q
+    """
+    p = p - 0.5*dt*g
+    q = q + dt*_hmc_velocity(p,minv)
+    u, g = _hmc_energy(U,grad_U,q)
+    if npy.isfinite(u):
+        p = p - 0.5*dt*g
+    return q, p, u, g
+
+def _hmc_initdt(q,u,g,dt,U,grad_U,minv,mchol):
+    """
+    Heuristic for a reasonable initial step size (Hoffman and Gelman, 2014, Alg. 4)
+    """
+    p  = _hmc_momentum(minv,mchol)
+    H0 = u+_hmc_kinetic(p,minv)
+    q1,p1,u1,g1 = _leapfrog(q,p,g,dt,U,grad_U,minv)
+    logacc = H0-(u1+_hmc_kinetic(p1,minv))
+    if not npy.isfinite(logacc):
+        logacc = -npy.inf
+    a = 1.0 if logacc > npy.log(0.5) else -1.0
+    for it in range(100):
+        if not (a*logacc > -a*npy.log(2.0)):
+            break
+        dt = dt*2.0**a
+        q1,p1,u1,g1 = _leapfrog(q,p,g,dt,U,grad_U,minv)
+        logacc = H0-(u1+_hmc_kinetic(p1,minv))
+        if not npy.isfinite(logacc):
+            logacc = -npy.inf
+    return dt
+
+def _hmc_static(q,u,g,dt,nT,U,grad_U,minv,mchol,maxdE):
+    """
+    Static HMC transition with nT leapfrog steps; uses and returns cached energy/gradient
+    """
+    p  = _hmc_momentum(minv,mchol)
+    H0 = u+_hmc_kinetic(p,minv)
+    q1,p1,u1,g1 = q,p,u,g
+    diverged = False
+    nlf = 0
+    for i in range(max(nT,1)):
+        q1,p1,u1,g1 = _leapfrog(q1,p1,g1,dt,U,grad_U,minv)
+        nlf = nlf+1
+        if not (u1+_hmc_kinetic(p1,minv)-H0 < maxdE):
+            diverged = True
+            break
+    H1 = u1+_hmc_kinetic(p1,minv)
+    accprob = min(1.0,npy.exp(H0-H1)) if npy.isfinite(H1) else 0.0
+    if (not diverged) and (npy.random.random_sample() < accprob):
+        return q1, u1, g1, accprob, H1, diverged, 0, nlf
+    return q, u, g, accprob, H0, diverged, 0, nlf
+
+def _nuts_uturn(qm,qp,pm,pp,minv):
+    dq = qp-qm
+    return (npy.dot(dq,_hmc_velocity(pm,minv)) < 0.0) or (npy.dot(dq,_hmc_velocity(pp,minv)) < 0.0)
+
+def _nuts_tree(q,p,u,g,logslc,v,j,dt,H0,U,grad_U,minv,maxdE):
+    """
+    Recursive tree building for NUTS (Hoffman and Gelman, 2014, Alg. 6)
+    Returns: backward end (q,p,g), forward end (q,p,g), proposal (q,p,u,g),
+             no. of valid points, continuation flag, sum of acceptance
+             probabilities, no. of leapfrog steps, divergence flag
+    """
+    if j == 0:
+        q1,p1,u1,g1 = _leapfrog(q,p,g,v*dt,U,grad_U,minv)
+        H1 = u1+_hmc_kinetic(p1,minv)
+        if not npy.isfinite(H1):
+            H1 = npy.inf
+        n1 = 1 if logslc <= -H1 else 0
+        s1 = logslc < maxdE-H1
+        alpha = min(1.0,npy.exp(H0-H1))
+        return q1,p1,g1, q1,p1,g1, q1,p1,u1,g1, n1, s1, alpha, 1, not s1
+    # build the first subtree
+    qm,pm,gm, qp,pp,gp, q1,p1,u1,g1, n1, s1, a1, na1, div = \
+        _nuts_tree(q,p,u,g,logslc,v,j-1,dt,H0,U,grad_U,minv,maxdE)
+    if s1:
+        if v == -1:
+            qm,pm,gm, _,_,_, q2,p2,u2,g2, n2, s2, a2, na2, div2 = \
+                _nuts_tree(qm,pm,None,gm,logslc,v,j-1,dt,H0,U,grad_U,minv,maxdE)
+        else:
+            _,_,_, qp,pp,gp, q2,p2,u2,g2, n2, s2, a2, na2, div2 = \
+                _nuts_tree(qp,pp,None,gp,logslc,v,j-1,dt,H0,U,grad_U,minv,maxdE)
+        if (n1+n2 > 0) and (npy.random.random_sample() < float(n2)/(n1+n2)):
+            q1,p1,u1,g1 = q2,p2,u2,g2
+        a1  = a1+a2
+        na1 = na1+na2
+        n1  = n1+n2
+        div = div or div2
+        s1  = s2 and not _nuts_uturn(qm,qp,pm,pp,minv)
+    return qm,pm,gm, qp,pp,gp, q1,p1,u1,g1, n1, s1, a1, na1, div
+
+def _hmc_nuts(q,u,g,dt,maxdepth,U,grad_U,minv,mchol,maxdE):
+    """
+    NUTS transition; uses and returns cached energy/gradient
+    """
+    p  = _hmc_momentum(minv,mchol)
+    H0 = u+_hmc_kinetic(p,minv)
+    logslc = npy.log(npy.random.random_sample())-H0
+    qm,pm,gm = q,p,g
+    qp,pp,gp = q,p,g
+    qn,un,gn,Hn = q,u,g,H0
+    n = 1; s = True; j = 0
+    asum = 0.0; na = 0; diverged = False
+    while s and (j < maxdepth):
+        v = 1 if npy.random.random_sample() < 0.5 else -1
+        if v == -1:
+            qm,pm,gm, _,_,_, q1,p1,u1,g1, n1, s1, a1, na1, div = \
+                _nuts_tree(qm,pm,None,gm,logslc,v,j,dt,H0,U,grad_U,minv,maxdE)
+        else:
+            _,_,_, qp,pp,gp, q1,p1,u1,g1, n1, s1, a1, na1, div = \
+                _nuts_tree(qp,pp,None,gp,logslc,v,j,dt,H0,U,grad_U,minv,maxdE)
+        asum = asum+a1; na = na+na1
+        diverged = diverged or div
+        if s1 and (npy.random.random_sample() < float(n1)/n):
+            qn,un,gn,Hn = q1,u1,g1,u1+_hmc_kinetic(p1,minv)
+        n = n+n1
+        s = s1 and not _nuts_uturn(qm,qp,pm,pp,minv)
+        j = j+1
+    return qn, un, gn, asum/max(na,1), Hn, diverged, j, na
+
+def _hmc_windows(nburn):
+    """
+    Ends of the mass matrix adaptation windows (Stan-like schedule: fast initial
+    buffer, doubling slow windows, fast terminal buffer)
+    """
+    initbuf, termbuf, basewin = 75, 50, 25
+    if nburn < 20:
+        return []
+    if initbuf+termbuf+basewin > nburn:
+        initbuf = int(0.15*nburn)
+        termbuf = int(0.1*nburn)
+        basewin = nburn-initbuf-termbuf
+    ends = []
+    start = initbuf
+    win   = basewin
+    while start+win < nburn-termbuf:
+        nextwin = 2*win
+        if start+win+nextwin > nburn-termbuf:
+            win = nburn-termbuf-start
+        ends.append((start,start+win))
+        start = start+win
+        win   = nextwin
+    if not ends:
+        ends.append((initbuf,nburn-termbuf))
+    return ends
+
+def hmc(opts,cini,U,grad_U):
+    """
+    #
+    # HMC/NUTS
+    #
+    Hamiltonian MCMC driver built on the leapfrog scheme of HMCMC. The potential
+    energy and its gradient are cached for the current chain state, so each
+    transition only evaluates U and grad_U at new trajectory points.
+    opts - dictionary of parameters
+           method  : 'hmc' (fixed no. of leapfrog steps) or 'nuts' (no-U-turn trajectories)
+                     (Defaults to 'nuts')
+           nsteps  : no. of mcmc steps
+           nburn   : no. of adaptation steps (step size and mass matrix are frozen afterwards)
+           dt      : Optional; initial leapfrog time step. If not present, a heuristic is used
+           nT      : no. of leapfrog steps for 'hmc', at least 1 (Defaults to 25)
+           target  : target mean acceptance probability for the dual-averaging step size
+                     adaptation (Defaults to 0.8 for 'nuts' and 0.65 for 'hmc')
+           metric  : 'unit', 'diag' or 'dense' inverse mass matrix; 'diag' and 'dense' are
+                     adapted from the chain samples in windows during burn-in (Defaults to 'diag')
+           inicov  : Optional; initial inverse mass matrix (vector for 'diag', matrix for 'dense')
+           maxdepth: maximum tree depth for 'nuts' (Defaults to 10)
+           maxdE   : energy error beyond which a trajectory is flagged as divergent
+                     (Defaults to 1000)
+           rnseed  : Optional seed for random number generator (needs to be integer >= 0)
+           tmpchn  : Optional; if present, chain states and the trace (see below) are appended
+                     every 'ofreq' steps to an ascii file; the filename is randomly generated if
+                     tmpchn is set to 'tmpchn', or set to the string passed through this option
+           ofreq   : output frequency for 'tmpchn' (Defaults to 10000)
+    cini   - starting mcmc state
+    U      - potential energy function, -log(posterior); same convention as for HMCMC
+    grad_U - gradient of potential energy function
+
+    Output: dictionary with
+      chain : chain samples (nsteps x chain dimension), including the burn-in
+      cmap  : MAP estimate
+      pmap  : log posterior at MAP estimate
+      accr  : mean acceptance probability after burn-in
+      ndiv  : number of divergent transitions after burn-in
+      dt    : adapted leapfrog time step
+      minv  : adapted inverse mass matrix
+      minfo : acceptance probability and log posterior for each state (nsteps x 2)
+      trace : array with one row per step, with columns
+              [acceptance probability, energy, divergent flag, time step,
+               tree depth, no. of leapfrog steps]
+    """
+    # -------------------------------------------------------------------------------
+    # Parse options
+    # -------------------------------------------------------------------------------
+    method   = opts.get('method','nuts')
+    if method not in ['hmc','nuts']:
+        print('Error in hmc: unknown method %s !'%(method))
+        return {}
+    nsteps   = opts['nsteps']
+    nburn    = opts['nburn' ]
+    nT       = opts.get('nT',25)
+    target   = opts.get('target',0.8 if method == 'nuts' else 0.65)
+    metric   = opts.get('metric','diag')
+    maxdepth = opts.get('maxdepth',10)
+    maxdE    = opts.get('maxdE',1000.0)
+    ofreq    = opts.get('ofreq',10000)
+
+    if 'tmpchn' not in opts:
+        tmp_file = 'None'
+    else:
+        if opts['tmpchn'] == 'tmpchn':
+            tmp_file = str(uuid.uuid4())+'.dat'
+        else:
+            tmp_file = opts['tmpchn']
+        print('Saving intermediate chains to', tmp_file)
+
+    if 'rnseed' in opts:
+        iseed = opts['rnseed']
+        if isinstance(iseed, int) and iseed >= 0:
+            npy.random.seed(iseed)
+            print('\nmcmc::hmc Fixing the random number seed to ', iseed)
+        else:
+            print('\nWARNING: mcmc::hmc invalid random number seed specified: ', iseed)
+            print('Will proceed without fixing random number seed.\n')
+
+    # -------------------------------------------------------------------------------
+    # Pre-processing
+    # -------------------------------------------------------------------------------
+    cdim  = cini.shape[0]
+    spls  = npy.zeros((nsteps,cdim))
+    meta_info = npy.zeros((nsteps,2))
+    trace = npy.zeros((nsteps,6))
+    if 'inicov' in opts:
+        minv = npy.array(opts['inicov'],dtype=float)
+    elif metric == 'dense':
+        minv = npy.identity(cdim)
+    else:
+        minv = npy.ones(cdim)
+    minv, mchol = _hmc_setmetric(minv)
+
+    q = npy.array(cini,dtype=float)
+    u, g = _hmc_energy(U,grad_U,q)
+    if not npy.isfinite(u):
+        print('\nERROR: mcmc::hmc the potential energy is not finite at the initial state')
+        return {}
+    spls[0] = q
+    meta_info[0] = [0.0,-u]
+    trace[0] = [0.0,u,0.0,0.0,0.0,0.0]
+    pmode = -u
+    cmode = q.copy()
+
+    if 'dt' in opts:
+        dt = opts['dt']
+    else:
+        dt = _hmc_initdt(q,u,g,1.0,U,grad_U,minv,mchol)
+    # dual averaging (Hoffman and Gelman, 2014, Alg. 5)
+    dagam, dat0, dakap = 0.05, 10.0, 0.75
+    damu = npy.log(10.0*dt); dahb = 0.0; dalb = 0.0; dam = 0
+    windows = _hmc_windows(nburn) if metric in ['diag','dense'] else []
+    iwin  = 0
+    ndiv  = 0
+    accs  = 0.0
+    # -------------------------------------------------------------------------------
+    # Main loop
+    # -------------------------------------------------------------------------------
+    for k in range(nsteps-1):
+        if method == 'hmc':
+            q,u,g,acc,H,div,depth,nlf = _hmc_static(q,u,g,dt,nT,U,grad_U,minv,mchol,maxdE)
+        else:
+            q,u,g,acc,H,div,depth,nlf = _hmc_nuts(q,u,g,dt,maxdepth,U,grad_U,minv,mchol,maxdE)
+        spls[k+1] = q
+        meta_info[k+1] = [acc,-u]
+        trace[k+1] = [acc,H,float(div),dt,depth,nlf]
+        if -u > pmode:
+            pmode = -u
+            cmode = q.copy()
+        if k+1 < nburn:
+            # step size adaptation
+            dam  = dam+1
+            dahb = (1.0-1.0/(dam+dat0))*dahb+(target-acc)/(dam+dat0)
+            logdt = damu-npy.sqrt(dam)/dagam*dahb
+            eta   = dam**(-dakap)
+            dalb  = eta*logdt+(1.0-eta)*dalb
+            dt    = npy.exp(logdt)
+            # mass matrix adaptation at the end of each slow window
+            if iwin < len(windows) and k+1 == windows[iwin][1]:
+                wspl = spls[windows[iwin][0]+1:windows[iwin][1]+1]
+                nw   = wspl.shape[0]
+                if metric == 'diag':
+                    minv = (nw/(nw+5.0))*npy.var(wspl,axis=0,ddof=1)+1.e-3*(5.0/(nw+5.0))
+                else:
+                    minv = (nw/(nw+5.0))*npy.cov(wspl,rowvar=False).reshape(cdim,cdim) \
+                          +1.e-3*(5.0/(nw+5.0))*npy.identity(cdim)
+                minv, mchol = _hmc_setmetric(minv)
+                dt   = _hmc_initdt(q,u,g,dt,U,grad_U,minv,mchol)
+                damu = npy.log(10.0*dt); dahb = 0.0; dalb = 0.0; dam = 0
+                iwin = iwin+1
+        elif k+1 == nburn:
+            if dam > 0:
+                dt = npy.exp(dalb)
+        else:
+            ndiv = ndiv+int(div)
+            accs = accs+acc
+        if ((k+1)%ofreq==0 and tmp_file != 'None'):
+            print('No. steps: %d, No. of divergences:%d'%(k+1,ndiv))
+            fout = open(tmp_file, 'ab')
+            npy.savetxt(fout, npy.hstack((spls[k-ofreq+1:k+1,:],trace[k-ofreq+1:k+1,:])),
+                        fmt='%.8e',delimiter=' ', newline='\n')
+            fout.close()
+    # Done loop over all steps
+
+    mcmcRes={}
+    mcmcRes['chain' ] = spls                               # chain
+    mcmcRes['cmap'  ] = cmode                              # MAP state
+    mcmcRes['pmap'  ] = pmode                              # MAP log posterior
+    mcmcRes['accr'  ] = accs/max(nsteps-1-nburn,1)         # mean acceptance probability after burn-in
+    mcmcRes['ndiv'  ] = ndiv                               # no. of divergent transitions after burn-in
+    mcmcRes['dt'    ] = dt                                 # adapted time step
+    mcmcRes['minv'  ] = minv                               # adapted inverse mass matrix
+    mcmcRes['minfo' ] = meta_info                          # acceptance probability and log posterior
+    mcmcRes['trace' ] = trace                              # per-step sampler diagnostics
+    return mcmcRes
+
+
 #---------------------------------------------------------------------------------------
 #  Example:
 #  1. Banana-shaped posterior density
@@ -255,6 +624,45 @@ def ucov(spl,splmean,cov,lastup):
             cov = rt*cov+st*npy.dot(npy.reshape(spl[i]-splmean,(ndim,1)),npy.reshape(spl[i]-splmean,(1,ndim)))
     return lastup+nspl,splmean,cov
 
+def amUpdate(k,spls,Rchol,splmean,cov,lastup,nref,rejsc,nadapt,nburn,burnsc,coveps,sigcv,verb=True):
+    """
+    Adaptive proposal update used by dram at step k: every nadapt steps, the proposal
+    is scaled up/down during burn-in depending on the rejection ratio since the last
+    rescaling, and is set from the running sample covariance afterwards.
+    Returns the (possibly updated) proposal Cholesky factor, running mean and
+    covariance, index of the last covariance update, rescaling counters and a flag
+    indicating whether the proposal changed.
+    """
+    covMatUpd = False
+    cdim = spls.shape[1]
+    if (nadapt>0) and ((k+1)%nadapt)==0:
+        if k<nburn:
+            if float(rejsc)/nref>0.95:
+                Rchol = Rchol/burnsc # scale down proposal
+                covMatUpd = True ;
+                if verb:
+                    print('Scaling down the proposal at step %d'%(k))
+            elif float(rejsc)/nref<0.05:
+                Rchol = Rchol*burnsc # scale up proposal
+                covMatUpd = True ;
+                if verb:
+                    print('Scaling up the proposal at step %d'%(k))
+            nref  = 0 ;
+            rejsc = 0 ;
+        else:
+            lastup,splmean,cov=ucov(spls[lastup:lastup+nadapt,:],splmean,cov,lastup)
+            try:
+                Rchol = scipy.linalg.cholesky(cov)
+            except scipy.linalg.LinAlgError:
+                try:
+                    # add to diagonal to make the matrix positive definite
+                    Rchol = scipy.linalg.cholesky(cov+coveps*npy.identity(cdim))
+                except scipy.linalg.LinAlgError:
+                    print('WARNING: Covariance matrix is singular even after the correction')
+            Rchol = Rchol*sigcv
+            covMatUpd = True ;
+    return Rchol,splmean,cov,lastup,nref,rejsc,covMatUpd
+
 def dram(opts,cini,likTpr,lpinfo):
     """
     #
@@ -286,6 +694,10 @@ def dram(opts,cini,likTpr,lpinfo):
                            filaname is randomly generated if tmpchn is set to 'tmpchn', or set to
                            the string passed through this option
                            if not present, chain states are not saved during the MCMC progress
+           accum  : Optional; streaming statistics accumulator (e.g. streamstats.StreamStats)
+                           if present, its update(states,post=...,acc=...) method is called
+                           with each block of 'ofreq' new chain states, so running statistics
+                           are available while the chain is generated
     cini    - starting mcmc state
     likTpr  - log-posterior function; it takes two input parameters as follows
                 - first parameter is a 1D array containing the chain state at which the posterior
@@ -354,6 +766,9 @@ def dram(opts,cini,likTpr,lpinfo):
             tmp_file = opts['tmpchn']
         print('Saving intermediate chains to', tmp_file)
 
+    accum = opts.get('accum',None)
+    iacc  = 0                          # first chain state not yet passed to the accumulator
+
     # If desired, fix random number seed to make chain reproducible
     if 'rnseed' in opts:
         iseed = opts['rnseed']
@@ -401,30 +816,8 @@ def dram(opts,cini,likTpr,lpinfo):
             lastup    = 1;      # last covariance update
             covMatUpd = True ;
         else:
-            if (nadapt>0) and ((k+1)%nadapt)==0:
-                if k<nburn:
-                    if float(rejsc)/nref>0.95:
-                        Rchol = Rchol/burnsc # scale down proposal
-                        covMatUpd = True ;
-                        print('Scaling down the proposal at step %d'%(k))
-                    elif float(rejsc)/nref<0.05:
-                        Rchol = Rchol*burnsc # scale up proposal
-                        covMatUpd = True ;
-                        print('Scaling up the proposal at step %d'%(k))
-                    nref  = 0 ;
-                    rejsc = 0 ;
-                else:
-                    lastup,splmean,cov=ucov(spls[lastup:lastup+nadapt,:],splmean,cov,lastup)
-                    try:
-                        Rchol = scipy.linalg.cholesky(cov)
-                    except scipy.linalg.LinAlgError:
-                        try:
-                            # add to diagonal to make the matrix positive definite
-                            Rchol = scipy.linalg.cholesky(cov+coveps*npy.identity(cdim))
-                        except scipy.linalg.LinAlgError:
-                            print('WARNING: Covariance matrix is singular even after the correction')
-                    Rchol = Rchol*sigcv
-                    covMatUpd = True ;
+            Rchol,splmean,cov,lastup,nref,rejsc,covMatUpd = \
+                amUpdate(k,spls,Rchol,splmean,cov,lastup,nref,rejsc,nadapt,nburn,burnsc,coveps,sigcv)
         if (method == 'dram') and covMatUpd:
             Rmat = [Rchol]; invRmat = [scipy.linalg.inv(Rchol)]
             for i in range(1,ndr):
@@ -515,7 +908,12 @@ def dram(opts,cini,likTpr,lpinfo):
             fout = open(tmp_file, 'ab')
             npy.savetxt(fout, spls[k-ofreq+1:k+1,:], fmt='%.8e',delimiter=' ', newline='\n')
             fout.close()
+        if ((k+1)%ofreq==0 and accum is not None):
+            accum.update(spls[iacc:k+1],post=meta_info[iacc:k+1,1]+meta_info[iacc:k+1,2],acc=meta_info[iacc:k+1,0])
+            iacc = k+1
     # Done loop over all steps
+    if accum is not None and iacc < nsteps:
+        accum.update(spls[iacc:],post=meta_info[iacc:,1]+meta_info[iacc:,2],acc=meta_info[iacc:,0])
 
     # return output dictionary: samples, MAP sample and its posterior probability, overall acceptance probability
     # and probability of having sample inside prior bounds, overall number of samples rejected, and rejected
@@ -530,3 +928,704 @@ def dram(opts,cini,likTpr,lpinfo):
     mcmcRes['rejAll'] = rejlim                   # no. of samples rejected due to being outside bounds
     mcmcRes['minfo' ] = meta_info                # acceptance probability and log posterior for each state
     return mcmcRes
+
+#---------------------------------------------------------------------------------------
+#  Batched log-posterior evaluation and post-processing layout
+#---------------------------------------------------------------------------------------
+def _eval_chunk(args):
+    """
+    Evaluates a vectorized log-posterior on a chunk of states (top-level so it can be pickled)
+    """
+    likTpr, spls, lpinfo = args
+    llik, lpri = likTpr(spls,lpinfo)
+    return npy.atleast_1d(llik), npy.atleast_1d(lpri)
+
+def _eval_rows(args):
+    """
+    Evaluates a single-state log-posterior on each row of a chunk of states
+    """
+    likTpr, spls, lpinfo = args
+    llp = npy.array([likTpr(spl,lpinfo) for spl in spls],dtype=float).reshape(-1,2)
+    return llp[:,0], llp[:,1]
+
+def batch_logpost(likTpr,spls,lpinfo,pool=None,vectorized=True,nchunks=None):
+    """
+    Evaluates log-likelihood and log-prior for a batch of states.
+
+    Input:
+        likTpr     : log-posterior function; if vectorized is True it receives a 2D array
+                     [nspl,cdim] and returns arrays of log-likelihood and log-prior values,
+                     otherwise it receives one state at a time (same convention as for dram)
+        spls       : 2D array of states [nspl,cdim]
+        lpinfo     : settings passed to likTpr
+        pool       : Optional; object with a map method (e.g. multiprocessing.Pool or
+                     concurrent.futures executor). The batch is split into nchunks chunks that
+                     are mapped over the pool; likTpr and lpinfo need to be picklable.
+        vectorized : whether likTpr accepts a batch of states
+        nchunks    : no. of chunks for the pool (Defaults to the no. of cpus)
+    Output:
+        log-likelihood and log-prior arrays, each of size nspl
+    """
+    spls = npy.atleast_2d(spls)
+    nspl = spls.shape[0]
+    if nspl == 0:
+        return npy.zeros(0), npy.zeros(0)
+    feval = _eval_chunk if vectorized else _eval_rows
+    if pool is None:
+        return feval((likTpr,spls,lpinfo))
+    if nchunks is None:
+        nchunks = os.cpu_count() or 1
+    chunks = npy.array_split(spls,min(nchunks,nspl))
+    res = list(pool.map(feval,[(likTpr,chunk,lpinfo) for chunk in chunks]))
+    return npy.concatenate([r[0] for r in res]), npy.concatenate([r[1] for r in res])
+
+def chain2postproc(mcmcRes):
+    """
+    Arranges the output of the samplers in this module in the layout expected by
+    postproc.get_mcmc_stats: [step no., chain states, acceptance probability, log posterior]
+    """
+    spls  = mcmcRes['chain']
+    minfo = mcmcRes['minfo']
+    nspl  = spls.shape[0]
+    return npy.hstack((npy.arange(nspl).reshape(nspl,1),spls,minfo[:,:1],
+                       npy.sum(minfo[:,1:],axis=1).reshape(nspl,1)))
+
+#---------------------------------------------------------------------------------------
+#  Affine-invariant ensemble sampler (stretch move)
+#---------------------------------------------------------------------------------------
+def ensemble(opts,cini,likTpr,lpinfo):
+    """
+    #
+    # Affine-invariant ensemble sampler
+    #
+    Stretch-move ensemble MCMC (Goodman and Weare, 2010). The walkers are split in two
+    halves, and all walkers of one half are moved at once, so the log-posterior is called
+    with the proposals of a whole half-ensemble.
+    opts - dictionary of parameters
+           nsteps  : no. of ensemble steps
+           nwalkers: no. of walkers (even, at least 2*chain dimension); ignored if cini is 2D
+           a       : stretch scale parameter (Defaults to 2.0)
+           inicov  : covariance used to scatter the initial walkers around cini if cini is 1D
+           spllo   : Optional; lower bounds for chain samples
+           splhi   : Optional; upper bounds for chain samples
+           pool    : Optional; object with a map method used to split each half-ensemble
+                     into chunks evaluated concurrently (see batch_logpost)
+           nchunks : Optional; no. of chunks per half-ensemble for the pool
+           rnseed  : Optional seed for random number generator (needs to be integer >= 0)
+           tmpchn  : Optional; if present, walker states are appended every 'ofreq' steps
+                     to an ascii file, named as for dram
+           ofreq   : output frequency for 'tmpchn' (Defaults to 10000)
+    cini    - initial ensemble [nwalkers,cdim], or a single starting state [cdim]; all initial
+              walkers need to be within the bounds and have a finite log-posterior
+              (otherwise an error is printed and an empty dictionary is returned)
+    likTpr  - vectorized log-posterior function; it takes two input parameters
+                - first parameter is a 2D array [nwalkers/2,cdim] of states
+                - the second parameter contains settings passed through 'lpinfo'
+              and returns log-Likelihood and log-Prior arrays (in this order)
+    lpinfo  - object containing settings that will be passed to the log-posterior function
+
+    Output: dictionary with
+      chain : walker states, step-major (nsteps*nwalkers x chain dimension)
+      nwalk : no. of walkers
+      cmap  : MAP estimate
+      pmap  : log posterior at MAP estimate
+      accr  : acceptance ratio (overall)
+      minfo : acceptance probability, log-likelihood and log-prior for each state
+              (nsteps*nwalkers x 3)
+    Use chain2postproc to pass the output to postproc.get_mcmc_stats.
+    """
+    # -------------------------------------------------------------------------------
+    # Parse options
+    # -------------------------------------------------------------------------------
+    nsteps  = opts['nsteps']
+    ascale  = opts.get('a',2.0)
+    spllo   = opts.get('spllo',None)
+    splhi   = opts.get('splhi',None)
+    pool    = opts.get('pool',None)
+    nchunks = opts.get('nchunks',None)
+    ofreq   = opts.get('ofreq',10000)
+
+    if 'tmpchn' not in opts:
+        tmp_file = 'None'
+    else:
+        if opts['tmpchn'] == 'tmpchn':
+            tmp_file = str(uuid.uuid4())+'.dat'
+        else:
+            tmp_file = opts['tmpchn']
+        print('Saving intermediate chains to', tmp_file)
+
+    if 'rnseed' in opts:
+        iseed = opts['rnseed']
+        if isinstance(iseed, int) and iseed >= 0:
+            npy.random.seed(iseed)
+            print('\nmcmc::ensemble Fixing the random number seed to ', iseed)
+        else:
+            print('\nWARNING: mcmc::ensemble invalid random number seed specified: ', iseed)
+            print('Will proceed without fixing random number seed.\n')
+
+    # -------------------------------------------------------------------------------
+    # Pre-processing
+    # -------------------------------------------------------------------------------
+    if cini.ndim == 2:
+        walk = npy.array(cini,dtype=float)
+    else:
+        walk = npy.random.multivariate_normal(cini,opts['inicov'],opts['nwalkers'])
+    nwalk,cdim = walk.shape
+    if (nwalk%2 != 0) or (nwalk < 2*cdim):
+        print('Error in ensemble: no. of walkers needs to be even and at least %d !'%(2*cdim))
+        return {}
+    nhalf = nwalk//2
+
+    def inbounds(x):
+        inb = npy.ones(x.shape[0],dtype=bool)
+        if spllo is not None:
+            inb = inb & npy.all(x >= spllo,axis=1)
+        if splhi is not None:
+            inb = inb & npy.all(x <= splhi,axis=1)
+        return inb
+
+    bad = npy.nonzero(~inbounds(walk))[0]
+    if bad.shape[0] > 0:
+        print('\nERROR: mcmc::ensemble initial walkers %s are outside the bounds spllo/splhi'%(bad.tolist()))
+        return {}
+    llik, lpri = batch_logpost(likTpr,walk,lpinfo,pool,True,nchunks)
+    lpost = llik+lpri
+    bad = npy.nonzero(~npy.isfinite(lpost))[0]
+    if bad.shape[0] > 0:
+        print('\nERROR: mcmc::ensemble the log-posterior is not finite at initial walkers %s'%(bad.tolist()))
+        return {}
+    spls  = npy.zeros((nsteps,nwalk,cdim))
+    meta_info = npy.zeros((nsteps,nwalk,3))
+    spls[0] = walk
+    meta_info[0,:,1] = llik
+    meta_info[0,:,2] = lpri
+    imap  = npy.argmax(lpost)
+    pmode = lpost[imap]
+    cmode = walk[imap].copy()
+    nacc  = 0
+    # -------------------------------------------------------------------------------
+    # Main loop
+    # -------------------------------------------------------------------------------
+    for k in range(nsteps-1):
+        for ih in range(2):
+            act = npy.arange(ih*nhalf,(ih+1)*nhalf)     # walkers being moved
+            cmp = npy.arange((1-ih)*nhalf,(2-ih)*nhalf) # complementary ensemble
+            zz  = ((ascale-1.0)*npy.random.random_sample(nhalf)+1.0)**2/ascale
+            xc  = walk[cmp[npy.random.randint(nhalf,size=nhalf)]]
+            prop = xc+zz.reshape(nhalf,1)*(walk[act]-xc)
+            # evaluate only proposals inside the bounds
+            inb  = inbounds(prop)
+            pll  = npy.full(nhalf,-npy.inf)
+            ppr  = npy.full(nhalf,-npy.inf)
+            if npy.any(inb):
+                pll[inb], ppr[inb] = batch_logpost(likTpr,prop[inb],lpinfo,pool,True,nchunks)
+            with npy.errstate(invalid='ignore'):
+                logr = (cdim-1.0)*npy.log(zz)+pll+ppr-lpost[act]
+            logr[npy.isnan(logr)] = -npy.inf
+            accp = npy.exp(npy.minimum(logr,0.0))
+            acc  = npy.log(npy.random.random_sample(nhalf)) < logr
+            iacc = act[acc]
+            walk[iacc]  = prop[acc]
+            llik[iacc]  = pll[acc]
+            lpri[iacc]  = ppr[acc]
+            lpost[iacc] = pll[acc]+ppr[acc]
+            meta_info[k+1,act,0] = accp
+            nacc = nacc+npy.sum(acc)
+        spls[k+1] = walk
+        meta_info[k+1,:,1] = llik
+        meta_info[k+1,:,2] = lpri
+        imap = npy.argmax(lpost)
+        if lpost[imap] > pmode:
+            pmode = lpost[imap]
+            cmode = walk[imap].copy()
+        if ((k+1)%ofreq==0 and tmp_file != 'None'):
+            print('No. steps: %d, acceptance ratio:%f'%(k+1,float(nacc)/((k+1)*nwalk)))
+            fout = open(tmp_file, 'ab')
+            npy.savetxt(fout, spls[k-ofreq+1:k+1].reshape(-1,cdim), fmt='%.8e',delimiter=' ', newline='\n')
+            fout.close()
+    # Done loop over all steps
+
+    mcmcRes={}
+    mcmcRes['chain' ] = spls.reshape(nsteps*nwalk,cdim)           # walker states, step-major
+    mcmcRes['nwalk' ] = nwalk                                     # no. of walkers
+    mcmcRes['cmap'  ] = cmode                                     # MAP state
+    mcmcRes['pmap'  ] = pmode                                     # MAP log posterior
+    mcmcRes['accr'  ] = float(nacc)/max((nsteps-1)*nwalk,1)       # acceptance rate (overall)
+    mcmcRes['minfo' ] = meta_info.reshape(nsteps*nwalk,3)         # acceptance probability, log-lik, log-prior
+    return mcmcRes
+
+#---------------------------------------------------------------------------------------
+#  Parallel tempering (replica exchange)
+#---------------------------------------------------------------------------------------
+def _pt_init_replica(islot,cini,nsteps,inicov):
+    """
+    Adaptive Metropolis state of one temperature slot (same bookkeeping as dram)
+    """
+    cdim = cini.shape[0]
+    rep = {}
+    rep['spls'   ] = npy.zeros((nsteps,cdim))   # states visited at this temperature
+    rep['spls'   ][0] = cini
+    rep['k'      ] = 0
+    rep['Rchol'  ] = scipy.linalg.cholesky(inicov)
+    rep['splmean'] = cini.copy()
+    rep['cov'    ] = npy.zeros((cdim,cdim))
+    rep['lastup' ] = 1
+    rep['nref'   ] = 0
+    rep['rejsc'  ] = 0
+    return rep
+
+def _pt_sweep(slots,reps,nstp,likTpr,lpinfo,prm,shr):
+    """
+    Advances the replicas in 'slots' by nstp adaptive Metropolis steps, each at its
+    own inverse temperature. States are read from and written back to the shared
+    arrays in shr; the steps taken are stored in the shared trace buffer, and the
+    rejected proposals are counted per temperature slot.
+    """
+    cdim  = prm['cdim']
+    xs    = shr['x'    ]
+    llik  = shr['llik' ]
+    lpri  = shr['lpri' ]
+    betas = shr['betas']
+    trace = shr['trace']
+    nrej  = shr['nrej' ]
+    for i in slots:
+        rep  = reps[i]
+        beta = betas[i]
+        x = xs[i].copy(); ll = llik[i]; lp = lpri[i]
+        rep['spls'][rep['k']] = x   # the state might have been swapped
+        for j in range(nstp):
+            k = rep['k']
+            if k > 0:
+                rep['Rchol'],rep['splmean'],rep['cov'],rep['lastup'],rep['nref'],rep['rejsc'],upd = \
+                    amUpdate(k,rep['spls'],rep['Rchol'],rep['splmean'],rep['cov'],rep['lastup'],
+                             rep['nref'],rep['rejsc'],prm['nadapt'],prm['nburn'],prm['burnsc'],
+                             prm['coveps'],prm['sigcv'],verb=False)
+            rep['nref'] = rep['nref']+1
+            u = x+npy.dot(npy.random.randn(cdim),rep['Rchol'])
+            pr = 0.0
+            if npy.any(npy.less(u,prm['spllo'])) or npy.any(npy.greater(u,prm['splhi'])):
+                accept = False
+            else:
+                ll2, lp2 = likTpr(u,lpinfo)
+                logr = beta*(ll2-ll)+lp2-lp
+                pr = npy.exp(min(logr,0.0))
+                accept = npy.log(npy.random.random_sample()) < logr
+            if accept:
+                x = u; ll = ll2; lp = lp2
+            else:
+                rep['rejsc'] = rep['rejsc']+1
+                nrej[i] = nrej[i]+1
+            rep['spls'][k+1] = x
+            rep['k'] = k+1
+            trace[i,j,:cdim] = x
+            trace[i,j,cdim:] = [pr,ll,lp]
+        xs[i] = x; llik[i] = ll; lpri[i] = lp
+
+def _pt_worker(rank,slots,cini,likTpr,lpinfo,prm,bufs,barrier,seed):
+    """
+    Worker process: waits for the master, advances its replicas, and signals completion
+    """
+    shr = _pt_shared(bufs,prm)
+    npy.random.seed(seed)
+    reps = {}
+    for i in slots:
+        reps[i] = _pt_init_replica(i,shr['x'][i].copy(),prm['nsteps'],prm['inicov'])
+    try:
+        for nstp in prm['sweeps']:
+            barrier.wait()
+            _pt_sweep(slots,reps,nstp,likTpr,lpinfo,prm,shr)
+            barrier.wait()
+    except Exception:
+        barrier.abort()
+        raise
+
+def _pt_shared(bufs,prm):
+    """
+    Numpy views of the shared memory buffers
+    """
+    ntemp = prm['ntemps']; cdim = prm['cdim']; nswap = prm['nswap']
+    shr = {}
+    shr['x'    ] = npy.frombuffer(bufs['x'    ],dtype=npy.float64).reshape(ntemp,cdim)
+    shr['llik' ] = npy.frombuffer(bufs['llik' ],dtype=npy.float64)
+    shr['lpri' ] = npy.frombuffer(bufs['lpri' ],dtype=npy.float64)
+    shr['betas'] = npy.frombuffer(bufs['betas'],dtype=npy.float64)
+    shr['nrej' ] = npy.frombuffer(bufs['nrej' ],dtype=npy.float64)
+    shr['trace'] = npy.frombuffer(bufs['trace'],dtype=npy.float64).reshape(ntemp,nswap,cdim+3)
+    return shr
+
+def ptmcmc(opts,cini,likTpr,lpinfo):
+    """
+    #
+    # Parallel tempering
+    #
+    Replica-exchange MCMC: one adaptive Metropolis chain (with the same proposal adaptation
+    as dram) per inverse temperature beta, targeting beta*log-Likelihood + log-Prior. The
+    replicas are advanced concurrently in worker processes that exchange their states with
+    the master through shared memory; after every 'nswap' steps the master proposes swaps
+    between neighboring temperatures. During burn-in the temperature ladder is adapted
+    so that swap acceptance rates become uniform across the ladder (Vousden et al., 2016),
+    keeping the coldest (beta=1) and hottest temperatures fixed.
+    opts - dictionary of parameters
+           nsteps : no. of mcmc steps per replica
+           nburn  : no. of burn-in steps (proposal scaling as in dram, ladder adaptation)
+           nadapt : adapt the proposals every nadapt steps after nburn
+           inicov : initial proposal covariance (same for all replicas)
+           coveps : small additive factor to ensure covariance matrices are positive definite
+           burnsc : factor to scale up/down the proposals during burn-in
+           gamma  : factor to multiply the proposal jump size with (Defaults to 1.0)
+           spllo  : lower bounds for chain samples
+           splhi  : upper bounds for chain samples
+           ntemps : no. of temperatures (Defaults to 8)
+           tmax   : highest temperature 1/beta; the initial ladder is geometric between
+                    1 and tmax (Defaults to 100)
+           nswap  : no. of steps between swap proposals (Defaults to 1)
+           tlag   : ladder adaptation time scale, in swap rounds (Defaults to 1000)
+           nprocs : no. of worker processes (Defaults to min(ntemps, no. of cpus)); if 0 the
+                    replicas are advanced serially in the calling process
+           rnseed : Optional seed for random number generator (needs to be integer >= 0)
+           savehot: Optional; if True also return the chains at all temperatures
+    cini    - starting mcmc state (all replicas start from it)
+    likTpr  - log-posterior function, same convention as for dram; returns log-Likelihood
+              and log-Prior (in this order). With worker processes it needs to be picklable
+              (e.g. a module-level function) unless the 'fork' start method is used.
+    lpinfo  - object containing settings that will be passed to the log-posterior function
+
+    Output: dictionary with
+      chain : chain samples at beta=1 (nsteps x chain dimension)
+      cmap  : MAP estimate
+      pmap  : log posterior at MAP estimate
+      accr  : acceptance ratio of the beta=1 chain
+      betas : final inverse temperatures
+      swapr : swap acceptance ratio for each pair of neighboring temperatures
+      minfo : acceptance probability, log-likelihood and log-prior for each state (nsteps x 3)
+      chains: (if savehot) samples at all temperatures (nsteps x ntemps x chain dimension)
+    """
+    import multiprocessing
+    import threading
+    # -------------------------------------------------------------------------------
+    # Parse options
+    # -------------------------------------------------------------------------------
+    nsteps = opts['nsteps']
+    nburn  = opts['nburn' ]
+    ntemp  = opts.get('ntemps',8)
+    tmax   = opts.get('tmax',100.0)
+    nswap  = opts.get('nswap',1)
+    tlag   = opts.get('tlag',1000.0)
+    nprocs = opts.get('nprocs',min(ntemp,os.cpu_count() or 1))
+    nprocs = min(nprocs,ntemp)
+    cdim   = cini.shape[0]
+
+    prm = {'nsteps':nsteps,'nburn':nburn,'nadapt':opts['nadapt'],'inicov':opts['inicov'],
+           'coveps':opts['coveps'],'burnsc':opts['burnsc'],'spllo':opts['spllo'],
+           'splhi':opts['splhi'],'sigcv':2.4*opts.get('gamma',1.0)/npy.sqrt(cdim),
+           'ntemps':ntemp,'nswap':nswap,'cdim':cdim}
+    nmove = nsteps-1
+    prm['sweeps'] = [min(nswap,nmove-i) for i in range(0,nmove,nswap)]
+
+    seed0 = None
+    if 'rnseed' in opts:
+        iseed = opts['rnseed']
+        if isinstance(iseed, int) and iseed >= 0:
+            npy.random.seed(iseed)
+            seed0 = iseed
+            print('\nmcmc::ptmcmc Fixing the random number seed to ', iseed)
+        else:
+            print('\nWARNING: mcmc::ptmcmc invalid random number seed specified: ', iseed)
+            print('Will proceed without fixing random number seed.\n')
+
+    # -------------------------------------------------------------------------------
+    # Shared state: replica states, log-likelihoods/priors, inverse temperatures, trace
+    # -------------------------------------------------------------------------------
+    ctx  = multiprocessing.get_context()
+    bufs = {'x':ctx.RawArray('d',ntemp*cdim),'llik':ctx.RawArray('d',ntemp),
+            'lpri':ctx.RawArray('d',ntemp),'betas':ctx.RawArray('d',ntemp),
+            'nrej':ctx.RawArray('d',ntemp),
+            'trace':ctx.RawArray('d',ntemp*nswap*(cdim+3))}
+    shr  = _pt_shared(bufs,prm)
+    temps = npy.logspace(0.0,npy.log10(tmax),ntemp) if ntemp > 1 else npy.ones(1)
+    shr['betas'][:] = 1.0/temps
+    ll0, lp0 = likTpr(cini,lpinfo)
+    shr['x'][:] = cini
+    shr['llik'][:] = ll0
+    shr['lpri'][:] = lp0
+
+    spls      = npy.zeros((nsteps,cdim))
+    meta_info = npy.zeros((nsteps,3))
+    spls[0]   = cini
+    meta_info[0] = [0.0,ll0,lp0]
+    if opts.get('savehot',False):
+        chains = npy.zeros((nsteps,ntemp,cdim))
+        chains[0] = cini
+    else:
+        chains = None
+    pmode = ll0+lp0
+    cmode = cini.copy()
+    nswp  = npy.zeros(max(ntemp-1,1))
+    nacc  = npy.zeros(max(ntemp-1,1))
+
+    # distribute the temperature slots over the workers
+    workers = []
+    if nprocs > 0:
+        barrier = ctx.Barrier(nprocs+1)
+        for rank in range(nprocs):
+            slots = list(range(rank,ntemp,nprocs))
+            seed  = None if seed0 is None else seed0+1+rank
+            pw = ctx.Process(target=_pt_worker,args=(rank,slots,cini,likTpr,lpinfo,prm,bufs,barrier,seed))
+            pw.daemon = True
+            pw.start()
+            workers.append(pw)
+    else:
+        reps = dict((i,_pt_init_replica(i,cini,nsteps,opts['inicov'])) for i in range(ntemp))
+
+    # -------------------------------------------------------------------------------
+    # Main loop over swap rounds
+    # -------------------------------------------------------------------------------
+    try:
+        istep = 1
+        for isw,nstp in enumerate(prm['sweeps']):
+            if nprocs > 0:
+                barrier.wait()          # release the workers
+                barrier.wait()          # wait until all replicas are advanced
+            else:
+                _pt_sweep(range(ntemp),reps,nstp,likTpr,lpinfo,prm,shr)
+            # collect the beta=1 chain
+            spls[istep:istep+nstp] = shr['trace'][0,:nstp,:cdim]
+            meta_info[istep:istep+nstp] = shr['trace'][0,:nstp,cdim:]
+            if chains is not None:
+                chains[istep:istep+nstp] = npy.transpose(shr['trace'][:,:nstp,:cdim],(1,0,2))
+            lpost = meta_info[istep:istep+nstp,1]+meta_info[istep:istep+nstp,2]
+            imax  = npy.argmax(lpost)
+            if lpost[imax] > pmode:
+                pmode = lpost[imax]
+                cmode = spls[istep+imax].copy()
+            istep = istep+nstp
+            # swap proposals between neighboring temperatures, from hot to cold
+            betas = shr['betas']
+            accsw = npy.zeros(max(ntemp-1,1))
+            for i in range(ntemp-2,-1,-1):
+                logr = (betas[i]-betas[i+1])*(shr['llik'][i+1]-shr['llik'][i])
+                nswp[i] = nswp[i]+1
+                if npy.log(npy.random.random_sample()) < logr:
+                    for key in ['x','llik','lpri']:
+                        tmp = shr[key][i].copy()
+                        shr[key][i] = shr[key][i+1]
+                        shr[key][i+1] = tmp
+                    nacc[i]  = nacc[i]+1
+                    accsw[i] = 1.0
+            # ladder adaptation: equalize swap acceptance between neighbors
+            if (istep <= nburn) and (ntemp > 2):
+                kappa = 1.0/(1.0+isw/tlag)/100.0
+                temps = 1.0/betas
+                lgap  = npy.log(npy.diff(temps))
+                lgap[:-1] = lgap[:-1]+kappa*(accsw[:-1]-accsw[1:])
+                gaps  = npy.exp(lgap)
+                gaps  = gaps*(temps[-1]-1.0)/npy.sum(gaps)
+                betas[1:] = 1.0/(1.0+npy.cumsum(gaps))
+    except threading.BrokenBarrierError:
+        for pw in workers:
+            pw.join(1.0)
+        raise RuntimeError('mcmc::ptmcmc a worker process failed')
+    except BaseException:
+        if nprocs > 0:
+            barrier.abort()
+        for pw in workers:
+            pw.terminate()
+        raise
+    for pw in workers:
+        pw.join()
+
+    mcmcRes={}
+    mcmcRes['chain' ] = spls                          # chain at beta=1
+    mcmcRes['cmap'  ] = cmode                         # MAP state
+    mcmcRes['pmap'  ] = pmode                         # MAP log posterior
+    # rejections are counted at the beta=1 slot, whichever replica occupies it
+    mcmcRes['accr'  ] = 1.0-float(shr['nrej'][0])/nsteps  # acceptance rate of the beta=1 chain
+    mcmcRes['betas' ] = shr['betas'].copy()           # final inverse temperatures
+    mcmcRes['swapr' ] = nacc/npy.maximum(nswp,1)      # swap acceptance ratios
+    mcmcRes['minfo' ] = meta_info                     # acceptance probability, log-lik, log-prior
+    if chains is not None:
+        mcmcRes['chains'] = chains                    # chains at all temperatures
+    return mcmcRes
+
+#---------------------------------------------------------------------------------------
+#  Surrogate-accelerated delayed acceptance
+#---------------------------------------------------------------------------------------
+def damcmc(opts,cini,likTpr,lpinfo,surTpr):
+    """
+    #
+    # Delayed acceptance MCMC
+    #
+    Two-stage adaptive Metropolis (Christen and Fox, 2005): each proposal is first
+    screened with a cheap surrogate of the log-posterior (e.g. built from a PC
+    expansion of the model fitted with UQTkBCS), and the full log-posterior is evaluated
+    only for proposals that pass the first stage. The second stage acceptance ratio
+    corrects for the surrogate error, so the chain targets the exact posterior. The
+    proposal is adapted as in dram.
+    opts - dictionary of parameters
+           nsteps : no. of mcmc steps
+           nburn  : no. of mcmc steps for burn-in (proposal scaled up/down as in dram)
+           nadapt : adapt every nadapt steps after nburn
+           inicov : initial proposal covariance
+           coveps : small additive factor to ensure covariance matrix is positive definite
+           burnsc : factor to scale up/down proposal if acceptance rate is too high/low
+           gamma  : factor to multiply proposed jump size with (Defaults to 1.0)
+           spllo  : lower bounds for chain samples
+           splhi  : upper bounds for chain samples
+           refit  : Optional; function refit(xs,lls,lpinfo) returning a new surrogate
+                    log-posterior from the states xs (npts x chain dimension) and full
+                    log-likelihoods lls (npts) evaluated so far
+           nrefit : no. of new full-model evaluations between refits (Defaults to 100)
+           refitall: if True, keep refitting after burn-in (Defaults to False, so that
+                    the chain is a time-homogeneous Markov chain past the burn-in)
+           rnseed : Optional seed for random number generator (needs to be integer >= 0)
+           tmpchn : Optional; if present, save chain state every 'ofreq' steps (see dram)
+    cini    - starting mcmc state
+    likTpr  - full log-posterior function, same convention as for dram: returns
+              log-Likelihood and log-Prior (in this order)
+    lpinfo  - object containing settings that will be passed to likTpr and surTpr
+    surTpr  - surrogate log-posterior function, same convention as likTpr
+
+    Output: dictionary with
+      chain : chain samples (nsteps x chain dimension)
+      cmap  : MAP estimate
+      pmap  : log posterior at MAP estimate
+      accr  : overall acceptance ratio
+      acc1  : fraction of proposals passing the surrogate stage
+      acc2  : fraction of surrogate-stage survivors accepted with the full model
+      nfull : no. of full log-posterior evaluations
+      nsurr : no. of surrogate log-posterior evaluations
+      nrefit: no. of surrogate refits
+      minfo : acceptance probability and log posterior for each state (nsteps x 2)
+    """
+    # -------------------------------------------------------------------------------
+    # Parse options
+    # -------------------------------------------------------------------------------
+    nsteps = opts['nsteps']
+    nburn  = opts['nburn' ]
+    nadapt = opts['nadapt']
+    inicov = opts['inicov']
+    coveps = opts['coveps']
+    burnsc = opts['burnsc']
+    spllo  = opts['spllo' ]
+    splhi  = opts['splhi' ]
+    gamma  = opts.get('gamma',1.0)
+    refit  = opts.get('refit',None)
+    nrefit = opts.get('nrefit',100)
+    refitall = opts.get('refitall',False)
+    ofreq  = opts.get('ofreq',10000)
+
+    if 'tmpchn' not in opts:
+        tmp_file = 'None'
+    else:
+        if opts['tmpchn'] == 'tmpchn':
+            tmp_file = str(uuid.uuid4())+'.dat'
+        else:
+            tmp_file = opts['tmpchn']
+        print('Saving intermediate chains to', tmp_file)
+
+    if 'rnseed' in opts:
+        iseed = opts['rnseed']
+        if isinstance(iseed, int) and iseed >= 0:
+            npy.random.seed(iseed)
+            print('\nmcmc::damcmc Fixing the random number seed to ', iseed)
+        else:
+            print('\nWARNING: mcmc::damcmc invalid random number seed specified: ', iseed)
+            print('Will proceed without fixing random number seed.\n')
+
+    # -------------------------------------------------------------------------------
+    # Pre-processing
+    # -------------------------------------------------------------------------------
+    cdim   = cini.shape[0]
+    spls   = npy.zeros((nsteps,cdim))
+    meta_info = npy.zeros((nsteps,2))
+    sigcv  = 2.4*gamma/npy.sqrt(cdim)
+    Rchol  = scipy.linalg.cholesky(inicov)
+    splmean = cini.copy()
+    cov    = npy.zeros((cdim,cdim))
+    lastup = 1
+    nref   = 0
+    rejsc  = 0
+    rej    = 0
+    nsurr  = 0
+    nfull  = 0
+    npass  = 0
+    nfit   = 0
+
+    x = npy.array(cini,dtype=float)
+    llx, lpx = likTpr(x,lpinfo)            # full log-posterior
+    slx, spx = surTpr(x,lpinfo)            # surrogate log-posterior
+    nfull = nfull+1; nsurr = nsurr+1
+    px = llx+lpx; sx = slx+spx
+    fitx  = [x.copy()]                      # full-model evaluations for refitting
+    fitll = [llx]
+    lastfit = 1
+    spls[0] = x
+    meta_info[0] = [0.0,px]
+    pmode = px
+    cmode = x.copy()
+    # -------------------------------------------------------------------------------
+    # Main loop
+    # -------------------------------------------------------------------------------
+    for k in range(nsteps-1):
+        if k > 0:
+            Rchol,splmean,cov,lastup,nref,rejsc,covMatUpd = \
+                amUpdate(k,spls,Rchol,splmean,cov,lastup,nref,rejsc,nadapt,nburn,burnsc,coveps,sigcv,verb=False)
+        nref = nref+1
+        y = x+npy.dot(npy.random.randn(cdim),Rchol)
+        alpha = 0.0
+        accept = False
+        if npy.all(npy.greater_equal(y,spllo)) and npy.all(npy.less_equal(y,splhi)):
+            # stage 1: screen with the surrogate
+            sly, spy = surTpr(y,lpinfo)
+            nsurr = nsurr+1
+            sy = sly+spy
+            a1 = min(1.0,npy.exp(min(sy-sx,0.0)))
+            if npy.random.random_sample() < a1:
+                # stage 2: correct with the full model
+                npass = npass+1
+                lly, lpy = likTpr(y,lpinfo)
+                nfull = nfull+1
+                py = lly+lpy
+                fitx.append(y.copy()); fitll.append(lly)
+                a2 = min(1.0,npy.exp(min((py-px)-(sy-sx),0.0)))
+                alpha = a1*a2
+                if npy.random.random_sample() < a2:
+                    accept = True
+        if accept:
+            x = y; px = py; sx = sy
+            if px > pmode:
+                pmode = px
+                cmode = x.copy()
+        else:
+            rej = rej+1
+            rejsc = rejsc+1
+        spls[k+1] = x
+        meta_info[k+1] = [alpha,px]
+        # online refit of the surrogate
+        if (refit is not None) and (refitall or k+1 < nburn) and (len(fitll)-lastfit >= nrefit):
+            surTpr  = refit(npy.array(fitx),npy.array(fitll),lpinfo)
+            lastfit = len(fitll)
+            nfit    = nfit+1
+            slx, spx = surTpr(x,lpinfo)
+            nsurr = nsurr+1
+            sx = slx+spx
+        if ((k+1)%ofreq==0 and tmp_file != 'None'):
+            print('No. steps: %d, No. of full model evaluations:%d'%(k+1,nfull))
+            fout = open(tmp_file, 'ab')
+            npy.savetxt(fout, npy.hstack((spls[k-ofreq+1:k+1,:],meta_info[k-ofreq+1:k+1,:])),
+                        fmt='%.8e',delimiter=' ', newline='\n')
+            fout.close()
+    # Done loop over all steps
+
+    mcmcRes={}
+    mcmcRes['chain' ] = spls                              # chain
+    mcmcRes['cmap'  ] = cmode                             # MAP state
+    mcmcRes['pmap'  ] = pmode                             # MAP log posterior
+    mcmcRes['accr'  ] = 1.0-float(rej)/nsteps             # acceptance rate (overall)
+    mcmcRes['acc1'  ] = float(npass)/max(nsurr-nfit-1,1)  # surrogate stage acceptance
+    mcmcRes['acc2'  ] = float(nsteps-1-rej)/max(npass,1)  # full model stage acceptance
+    mcmcRes['nfull' ] = nfull                             # no. of full model evaluations
+    mcmcRes['nsurr' ] = nsurr                             # no. of surrogate evaluations
+    mcmcRes['nrefit'] = nfit                              # no. of surrogate refits
+    mcmcRes['minfo' ] = meta_info                         # acceptance probability and log posterior
+    return mcmcRes
@@ -0,0 +1,202 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+import numpy as npy
+import shelve
+from collections import OrderedDict
+
+#---------------------------------------------------------------------------------------
+#  Memoization of log-posterior evaluations
+#---------------------------------------------------------------------------------------
+class MemoLogPost(object):
+    """
+    Memoizing wrapper for log-posterior functions following the convention of the
+    samplers in PyUQTk.inference (likTpr(x,lpinfo) returning log-Likelihood and
+    log-Prior). States are rounded to 'ndigits' significant digits and hashed, the
+    most recently used 'maxsize' results are kept in memory, and all results can
+    optionally be kept in a persistent on-disk store (shelve), so that chain restarts
+    and evidence passes over stored samples do not re-evaluate the model.
+
+    The wrapper can be passed anywhere a likTpr is expected, e.g.
+        lpost = MemoLogPost(likTpr,store='logpost.db')
+        sol   = dram(opts,cini,lpost,lpinfo)
+        print(lpost.stats())
+    For hmc, which works with the potential energy and its gradient, give the gradient
+    of the log-posterior as well, and pass the memoized pair returned by potential():
+        lpost = MemoLogPost(likTpr,gradTpr=gradTpr)
+        U, grad_U = lpost.potential(lpinfo)
+        sol   = hmc(opts,cini,U,grad_U)
+
+    Input:
+        likTpr    : log-posterior function
+        ndigits   : no. of significant digits kept when hashing states (Defaults to 12)
+        maxsize   : maximum no. of entries in the in-memory LRU cache (Defaults to 100000;
+                    None for an unbounded cache)
+        store     : Optional; file name of a persistent store, reused across sessions
+        vectorized: if True, likTpr accepts a 2D array of states [nspl,cdim] and returns
+                    arrays of log-likelihood and log-prior values; only the states that are
+                    not cached are passed to it, in one call
+        gradTpr   : Optional; gradient of the log-posterior, gradTpr(x,lpinfo), needed by
+                    grad() and potential(); its values are memoized like the log-posterior
+
+    The cache assumes that lpinfo does not change between calls; call clear() otherwise.
+    Each process of a multiprocessing pool holds its own copy of the in-memory cache.
+    """
+    def __init__(self,likTpr,ndigits=12,maxsize=100000,store=None,vectorized=False,gradTpr=None):
+        self.likTpr     = likTpr
+        self.gradTpr    = gradTpr
+        self.ndigits    = ndigits
+        self.maxsize    = maxsize
+        self.vectorized = vectorized
+        self.cache  = OrderedDict()
+        self.store  = shelve.open(store) if store is not None else None
+        self.hits   = 0
+        self.dhits  = 0    # hits in the on-disk store
+        self.misses = 0
+
+    def key(self,x):
+        """
+        Hash key of a state: bytes of the state rounded to ndigits significant digits
+        """
+        x = npy.asarray(x,dtype=float).ravel()
+        xr = npy.array([float('%.*e'%(self.ndigits-1,xi)) for xi in x])+0.0  # +0.0 maps -0 to 0
+        return xr.tobytes()
+
+    def _get(self,k):
+        if k in self.cache:
+            self.cache.move_to_end(k)
+            self.hits = self.hits+1
+            return self.cache[k]
+        if self.store is not None:
+            sk = k.hex()
+            if sk in self.store:
+                self.dhits = self.dhits+1
+                val = self.store[sk]
+                self._put(k,val,persist=False)
+                return val
+        return None
+
+    def _put(self,k,val,persist=True):
+        self.cache[k] = val
+        self.cache.move_to_end(k)
+        if (self.maxsize is not None) and len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        if persist and (self.store is not None):
+            self.store[k.hex()] = val
+
+    def __call__(self,x,lpinfo):
+        if self.vectorized and npy.ndim(x) == 2:
+            return self._batch(x,lpinfo)
+        k = self.key(x)
+        val = self._get(k)
+        if val is None:
+            self.misses = self.misses+1
+            ll, lp = self.likTpr(x,lpinfo)
+            val = (ll,lp)
+            self._put(k,val)
+        return [val[0],val[1]]
+
+    def _batch(self,spls,lpinfo):
+        nspl = spls.shape[0]
+        llik = npy.zeros(nspl)
+        lpri = npy.zeros(nspl)
+        keys = [self.key(spl) for spl in spls]
+        todo = OrderedDict()   # key -> rows; duplicates within the batch are evaluated once
+        for i,k in enumerate(keys):
+            val = self._get(k)
+            if val is None:
+                todo.setdefault(k,[]).append(i)
+            else:
+                llik[i], lpri[i] = val
+        if len(todo) > 0:
+            irow = [rows[0] for rows in todo.values()]
+            self.misses = self.misses+len(irow)
+            ll, lp = self.likTpr(spls[irow],lpinfo)
+            ll = npy.atleast_1d(ll); lp = npy.atleast_1d(lp)
+            for j,(k,rows) in enumerate(todo.items()):
+                self._put(k,(float(ll[j]),float(lp[j])))
+                llik[rows] = ll[j]
+                lpri[rows] = lp[j]
+                self.hits = self.hits+len(rows)-1
+        return llik, lpri
+
+    def grad(self,x,lpinfo):
+        """
+        Gradient of the log-posterior at x, from the cache if available
+        """
+        if self.gradTpr is None:
+            raise ValueError('MemoLogPost: no gradient function (gradTpr) was given')
+        k = b'g'+self.key(x)   # gradients share the cache, under keys of a different length
+        val = self._get(k)
+        if val is None:
+            self.misses = self.misses+1
+            val = npy.array(self.gradTpr(x,lpinfo),dtype=float)
+            self._put(k,val)
+        return npy.array(val)
+
+    def potential(self,lpinfo):
+        """
+        Memoized potential energy U(x) = -(log-Likelihood + log-Prior) and its gradient,
+        returned as the pair of functions (U, grad_U) expected by mcmc.hmc
+        """
+        def U(x):
+            ll, lp = self(x,lpinfo)
+            return -(ll+lp)
+        def grad_U(x):
+            return -self.grad(x,lpinfo)
+        return U, grad_U
+
+    def stats(self):
+        """
+        Cache statistics: hits (in memory and on disk), misses, hit rate and cache size
+        """
+        ncall = self.hits+self.dhits+self.misses
+        return {'hits':self.hits,'diskhits':self.dhits,'misses':self.misses,
+                'hitrate':float(self.hits+self.dhits)/max(ncall,1),'size':len(self.cache)}
+
+    def clear(self):
+        """
+        Empties the in-memory cache and the on-disk store, and resets the statistics
+        """
+        self.cache.clear()
+        if self.store is not None:
+            self.store.clear()
+        self.hits = 0; self.dhits = 0; self.misses = 0
+
+    def close(self):
+        """
+        Closes the on-disk store
+        """
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def __getstate__(self):
+        # the on-disk store stays with the parent process
+        state = self.__dict__.copy()
+        state['store'] = None
+        return state
@@ -0,0 +1,284 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+import numpy as npy
+import scipy.linalg
+try:
+    from .mcmc import batch_logpost
+except ImportError:
+    from mcmc import batch_logpost
+
+#---------------------------------------------------------------------------------------
+#  Nested sampling (Skilling, 2006)
+#---------------------------------------------------------------------------------------
+def _ns_eval(us,likTpr,lpinfo,ptform,pool,vectorized,nchunks):
+    """
+    Maps unit-cube points to the parameter space and evaluates them as one batch
+    """
+    xs = npy.atleast_2d(ptform(us))
+    ll, lp = batch_logpost(likTpr,xs,lpinfo,pool=pool,vectorized=vectorized,nchunks=nchunks)
+    ll = npy.where(npy.isnan(ll),-npy.inf,ll)
+    return xs, ll, lp
+
+def _ns_cholesky(us):
+    """
+    Lower Cholesky factor of the covariance of the unit-cube points us
+    """
+    ndim = us.shape[1]
+    cov  = npy.cov(us,rowvar=False).reshape(ndim,ndim)
+    return scipy.linalg.cholesky(cov+1.e-12*npy.identity(ndim),lower=True)
+
+def _ns_slice(ust,llst,xst,lpst,lmin,lchol,nslice,feval):
+    """
+    Slice sampling in the unit cube constrained to log-likelihood > lmin, started from the
+    rows of ust. All chains advance in lockstep, so each shrinkage round is one batch of
+    likelihood evaluations. The directions are random, scaled by the live point covariance
+    (lchol); the initial bracket is the chord of the unit cube, shrunk towards the
+    current state.
+    """
+    k, ndim = ust.shape
+    u  = ust.copy(); ll = llst.copy(); xs = xst.copy(); lp = lpst.copy()
+    ncall = 0
+    for istep in range(nslice):
+        d = npy.dot(npy.random.randn(k,ndim),lchol.T)
+        d = d/npy.linalg.norm(d,axis=1).reshape(k,1)
+        with npy.errstate(divide='ignore',invalid='ignore'):
+            t1 = -u/d; t2 = (1.0-u)/d
+        tlo = npy.nanmax(npy.where(d != 0.0,npy.minimum(t1,t2),-npy.inf),axis=1)
+        thi = npy.nanmin(npy.where(d != 0.0,npy.maximum(t1,t2), npy.inf),axis=1)
+        active = npy.ones(k,dtype=bool)
+        for ishr in range(100):
+            ia = npy.nonzero(active)[0]
+            if ia.shape[0] == 0:
+                break
+            t  = tlo[ia]+npy.random.random_sample(ia.shape[0])*(thi[ia]-tlo[ia])
+            up = npy.clip(u[ia]+t.reshape(-1,1)*d[ia],0.0,1.0)
+            xp, llp, lpp = feval(up)
+            ncall = ncall+ia.shape[0]
+            ok = llp > lmin
+            iok = ia[ok]
+            u[iok] = up[ok]; ll[iok] = llp[ok]; xs[iok] = xp[ok]; lp[iok] = lpp[ok]
+            active[iok] = False
+            # shrink the brackets of the rejected proposals towards the current state
+            ino = ia[~ok]; tno = t[~ok]
+            tlo[ino] = npy.where(tno < 0.0,tno,tlo[ino])
+            thi[ino] = npy.where(tno < 0.0,thi[ino],tno)
+        # chains still active after 100 shrinkage rounds keep their current state
+    return u, ll, xs, lp, ncall
+
+def _ns_ellipsoid(ulive,k,lmin,enlarge,feval):
+    """
+    Rejection sampling from the bounding ellipsoid of the live points (unit cube),
+    enlarged by the volume factor 'enlarge', constrained to log-likelihood > lmin.
+    Candidates are drawn and evaluated in batches sized by the running efficiency.
+    """
+    nl, ndim = ulive.shape
+    mean  = npy.mean(ulive,axis=0)
+    lchol = _ns_cholesky(ulive)
+    z     = scipy.linalg.solve_triangular(lchol,(ulive-mean).T,lower=True)
+    scale = npy.sqrt(npy.max(npy.sum(z**2,axis=0)))*enlarge**(1.0/ndim)
+    us = []; lls = []; xs = []; lps = []
+    nacc = 0; ncall = 0; eff = 1.0
+    while nacc < k:
+        m  = int(min(max(npy.ceil(1.2*(k-nacc)/eff),k-nacc),100*k))
+        zc = npy.random.randn(m,ndim)
+        zc = zc/npy.linalg.norm(zc,axis=1).reshape(m,1)*(npy.random.random_sample((m,1))**(1.0/ndim))
+        uc = mean+scale*npy.dot(zc,lchol.T)
+        uc = uc[npy.all((uc >= 0.0) & (uc <= 1.0),axis=1)]
+        if uc.shape[0] == 0:
+            eff = eff/2.0
+            continue
+        xc, llc, lpc = feval(uc)
+        ncall = ncall+uc.shape[0]
+        ok = llc > lmin
+        eff = max(float(npy.sum(ok))/m,1.e-3)
+        us.append(uc[ok]); lls.append(llc[ok]); xs.append(xc[ok]); lps.append(lpc[ok])
+        nacc = nacc+npy.sum(ok)
+    return npy.vstack(us)[:k], npy.concatenate(lls)[:k], npy.vstack(xs)[:k], npy.concatenate(lps)[:k], ncall
+
+def nested(opts,likTpr,lpinfo,ptform):
+    """
+    #
+    # Nested sampling
+    #
+    Estimates the log-evidence and draws weighted posterior samples with nested sampling.
+    The prior is defined by a transform 'ptform' from the unit hypercube. At every
+    iteration the 'nbatch' live points with the lowest likelihood are removed and replaced
+    by new points drawn with a constrained sampler; all the likelihood evaluations of an
+    iteration are done as one batch (optionally spread over a pool of processes).
+    opts - dictionary of parameters
+           ndim    : no. of parameters
+           nlive   : no. of live points (Defaults to 500)
+           nbatch  : no. of live points replaced per iteration (Defaults to 1)
+           sampler : constrained sampler, 'slice' (Defaults) or 'ellipsoid'
+           nslice  : no. of slice sampling steps per new point (Defaults to 3*ndim)
+           enlarge : volume enlargement factor of the bounding ellipsoid (Defaults to 1.25)
+           dlogz   : stop when the estimated remaining evidence changes the log-evidence
+                     by less than dlogz (Defaults to 0.01)
+           maxiter : maximum no. of iterations (Defaults to no limit)
+           pool    : Optional; object with a map method, see mcmc.batch_logpost
+           vectorized: whether likTpr accepts a 2D array of states (Defaults to False)
+           nchunks : no. of chunks for the pool (Defaults to the no. of cpus)
+           rnseed  : Optional seed for random number generator (needs to be integer >= 0)
+    likTpr  - log-posterior function, same convention as for dram; only the
+              log-likelihood is used by the sampler
+    lpinfo  - object containing settings that will be passed to likTpr
+    ptform  - prior transform, mapping a 2D array of points in the unit hypercube
+              [npts,ndim] to the corresponding parameters [npts,ndim]
+
+    Output: dictionary with
+      logz    : log-evidence estimate
+      logzerr : its standard error, sqrt(H/nlive)
+      info    : information H (Kullback-Leibler divergence from prior to posterior)
+      samples : dead and final live points [nsamples,ndim]
+      logl    : log-likelihood of the samples
+      logwt   : log-weights of the samples (log-likelihood + log prior volume)
+      weights : normalized posterior weights of the samples
+      chain   : equally weighted posterior samples (resampled from the weighted ones)
+      minfo   : acceptance probability (1), log-likelihood and log-prior for each row
+                of chain; with mcmc.chain2postproc the result can be processed by postproc
+      niter   : no. of iterations
+      ncall   : no. of likelihood evaluations
+    """
+    # -------------------------------------------------------------------------------
+    # Parse options
+    # -------------------------------------------------------------------------------
+    ndim    = opts['ndim']
+    nlive   = opts.get('nlive',500)
+    nbatch  = opts.get('nbatch',1)
+    sampler = opts.get('sampler','slice')
+    nslice  = opts.get('nslice',3*ndim)
+    enlarge = opts.get('enlarge',1.25)
+    dlogz   = opts.get('dlogz',0.01)
+    maxiter = opts.get('maxiter',None)
+    pool    = opts.get('pool',None)
+    vectorized = opts.get('vectorized',False)
+    nchunks = opts.get('nchunks',None)
+
+    if nbatch >= nlive:
+        print('\nERROR: nested::nested nbatch needs to be smaller than nlive')
+        return {}
+    if sampler not in ['slice','ellipsoid']:
+        print('\nERROR: nested::nested unknown sampler: ', sampler)
+        return {}
+
+    if 'rnseed' in opts:
+        iseed = opts['rnseed']
+        if isinstance(iseed, int) and iseed >= 0:
+            npy.random.seed(iseed)
+            print('\nnested::nested Fixing the random number seed to ', iseed)
+        else:
+            print('\nWARNING: nested::nested invalid random number seed specified: ', iseed)
+            print('Will proceed without fixing random number seed.\n')
+
+    feval = lambda us: _ns_eval(us,likTpr,lpinfo,ptform,pool,vectorized,nchunks)
+
+    # -------------------------------------------------------------------------------
+    # Initial live points from the prior
+    # -------------------------------------------------------------------------------
+    ulive = npy.random.random_sample((nlive,ndim))
+    xlive, llive, plive = feval(ulive)
+    ncall = nlive
+
+    logz  = -npy.inf   # log-evidence
+    hinfo = 0.0        # information
+    logx  = 0.0        # log prior volume
+    dead_x = []; dead_ll = []; dead_lp = []; dead_lw = []
+    niter = 0
+
+    def addpoint(ll,logw,logz,hinfo):
+        logwt  = ll+logw
+        logznw = npy.logaddexp(logz,logwt)
+        hnew   = npy.exp(logwt-logznw)*ll-logznw
+        if logz > -npy.inf:
+            hnew = hnew+npy.exp(logz-logznw)*(hinfo+logz)
+        return logwt, logznw, hnew
+
+    # -------------------------------------------------------------------------------
+    # Main loop
+    # -------------------------------------------------------------------------------
+    while True:
+        # remaining evidence is at most max(L_live)*X
+        if npy.logaddexp(logz,npy.max(llive)+logx)-logz < dlogz:
+            break
+        if (maxiter is not None) and (niter >= maxiter):
+            break
+        iworst = npy.argsort(llive)[:nbatch]
+        # the removed points shrink the volume as if the live set was depleted one by one
+        for j,i in enumerate(iworst):
+            nl    = nlive-j
+            logw  = logx+npy.log(-npy.expm1(-1.0/nl))
+            logwt, logz, hinfo = addpoint(llive[i],logw,logz,hinfo)
+            logx  = logx-1.0/nl
+            dead_x.append(xlive[i].copy()); dead_ll.append(llive[i])
+            dead_lp.append(plive[i]); dead_lw.append(logwt)
+        lmin  = llive[iworst[-1]]
+        ikeep = npy.setdiff1d(npy.arange(nlive),iworst)
+        # new points from the constrained prior
+        if sampler == 'slice':
+            ist = ikeep[npy.random.randint(0,ikeep.shape[0],nbatch)]
+            unew, llnew, xnew, lpnew, nc = _ns_slice(ulive[ist],llive[ist],xlive[ist],plive[ist],
+                                                     lmin,_ns_cholesky(ulive[ikeep]),nslice,feval)
+        else:
+            unew, llnew, xnew, lpnew, nc = _ns_ellipsoid(ulive[ikeep],nbatch,lmin,enlarge,feval)
+        ncall = ncall+nc
+        ulive[iworst] = unew; llive[iworst] = llnew; xlive[iworst] = xnew; plive[iworst] = lpnew
+        niter = niter+1
+
+    # add the final live points, each with an equal share of the remaining volume
+    logw = logx-npy.log(nlive)
+    for i in npy.argsort(llive):
+        logwt, logz, hinfo = addpoint(llive[i],logw,logz,hinfo)
+        dead_x.append(xlive[i].copy()); dead_ll.append(llive[i])
+        dead_lp.append(plive[i]); dead_lw.append(logwt)
+
+    samples = npy.array(dead_x)
+    logl    = npy.array(dead_ll)
+    logp    = npy.array(dead_lp)
+    logwt   = npy.array(dead_lw)
+    weights = npy.exp(logwt-logz)
+    weights = weights/npy.sum(weights)
+
+    # equally weighted samples by systematic resampling, as many as the effective sample size
+    ness = int(max(1,npy.floor(1.0/npy.sum(weights**2))))
+    pos  = (npy.random.random_sample()+npy.arange(ness))/ness
+    irs  = npy.minimum(npy.searchsorted(npy.cumsum(weights),pos),samples.shape[0]-1)
+    npy.random.shuffle(irs)
+
+    nsRes={}
+    nsRes['logz'   ] = logz                             # log-evidence
+    nsRes['logzerr'] = npy.sqrt(max(hinfo,0.0)/nlive)   # standard error of the log-evidence
+    nsRes['info'   ] = hinfo                            # information
+    nsRes['samples'] = samples                          # dead and live points
+    nsRes['logl'   ] = logl                             # log-likelihood of the samples
+    nsRes['logwt'  ] = logwt                            # log-weights of the samples
+    nsRes['weights'] = weights                          # normalized posterior weights
+    nsRes['chain'  ] = samples[irs]                     # equally weighted posterior samples
+    nsRes['minfo'  ] = npy.column_stack((npy.ones(ness),logl[irs],logp[irs]))
+    nsRes['niter'  ] = niter                            # no. of iterations
+    nsRes['ncall'  ] = ncall                            # no. of likelihood evaluations
+    return nsRes
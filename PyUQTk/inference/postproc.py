@@ -36,9 +36,15 @@ import string
 import numpy as np
 import getopt
 import math
+import itertools
 import matplotlib.pyplot as plt
-from scipy import stats, mgrid, c_, reshape
+from scipy import stats
+from numpy import mgrid, c_, reshape
 from matplotlib.ticker import MultipleLocator, FormatStrFormatter
+try:
+    from .diagnostics import convergence_diagnostics, print_diagnostics
+except ImportError:
+    from diagnostics import convergence_diagnostics, print_diagnostics
 
 try:
     import pymc
@@ -68,12 +74,10 @@ def acor_in(X, MAXLAG, WINMULT):
 
     iMax = L - MAXLAG
 
-    # compute autocorrelation
-    # sind = arange(MAXLAG+1)
-    iind = arange(iMax)
-    C = zeros(MAXLAG + 1)
-    for s in range(MAXLAG+1):
-        C[s] += sum(Xhat[iind]*Xhat[iind+s])
+    # compute autocorrelation C[s] = sum_{i<iMax} Xhat[i]*Xhat[i+s] for all lags
+    # at once, as a cross-correlation evaluated with FFTs
+    nfft = _fft_length(L+iMax)
+    C = np.fft.irfft(np.conj(np.fft.rfft(Xhat[:iMax],nfft))*np.fft.rfft(Xhat,nfft),nfft)[:MAXLAG+1]
     C *= 1./iMax
 
     D = C[0] # diffusion coeff
@@ -91,13 +95,10 @@ def acor(X,MAXLAG = 10, WINMULT = 5):
     Ls = []
     S = []
     while tau*WINMULT >= MAXLAG:
-        Lh = L/2
+        Lh = L//2
         Ls.append(Lh)
-        j1,j2 = 0,1
-        for i in range(Lh):
-            X[i] = X[j1] + X[j2]
-            j1 += 2
-            j2 += 2
+        # sum pairs of consecutive samples
+        X[:Lh] = X[0:2*Lh:2] + X[1:2*Lh:2]
         _, D, L, sigma, tau, tauWINMULT, X = acor_in(X[:Lh], MAXLAG, WINMULT)
         S.append(sigma)
     if len(S) == 0:
@@ -113,13 +114,20 @@ def acor(X,MAXLAG = 10, WINMULT = 5):
 
     return tau
 ###################################################################################################
+def _fft_length(n):
+  """Smallest power of 2 that is not smaller than n"""
+  return 1 << (int(n)-1).bit_length() if n > 1 else 1
+###################################################################################################
 def compute_group_auto_corr(v,maxlag):
   """Compute autocorrelation of v, an array where each column is a set of samples,
-  for a lag ranging from 0 to maxlag-1. Ouputs numpy array with autocorrelation."""
+  for a lag ranging from 0 to maxlag-1. Ouputs numpy array with autocorrelation.
+  The autocovariances for all lags and columns are computed at once with FFTs
+  (zero-padded to avoid circular wrap-around), in O(N log N) per column."""
 
   # Get dimensions of input array with samples
   n_pts = np.shape(v)[0]
   n_var = np.shape(v)[1]
+  n_lag = np.minimum(maxlag,n_pts)
 
   # Initialize array
   auto_corr = np.zeros((maxlag,n_var))
@@ -128,16 +136,18 @@ def compute_group_auto_corr(v,maxlag):
   v_m = v.mean(0)
   v_var = v.var(0)
 
-
   # Subtract the mean of v
   v_nm = v - v_m
 
-  # Compute autocovariance of v over all variables
-  for lag in range(maxlag):
-    n_sum = n_pts - lag     # total number of terms in sum
-    for i in range(n_sum):
-      auto_corr[lag,:] += v_nm[i,:]*v_nm[i+lag,:]
-    auto_corr[lag,:] /= float(n_sum)
+  # Compute autocovariance of v over all variables, as the inverse FFT of the
+  # power spectrum; each lag is averaged over its number of terms. Columns are
+  # processed in blocks to bound the memory used by the transforms.
+  nfft = _fft_length(2*n_pts)
+  n_blk = int(np.maximum(1,2**24//nfft))
+  for i in range(0,n_var,n_blk):
+    f = np.fft.rfft(v_nm[:,i:i+n_blk],n=nfft,axis=0)
+    auto_corr[:n_lag,i:i+n_blk] = np.fft.irfft(f*np.conj(f),n=nfft,axis=0)[:n_lag]
+  auto_corr[:n_lag] /= (n_pts - np.arange(n_lag)).reshape(-1,1)
 
   # Normalize by variance
   auto_corr /= v_var
@@ -148,28 +158,39 @@ def compute_auto_corr(v,maxlag):
   """Compute autocorrelation of v (1D vector of samples) for a lag ranging from 0 to maxlag-1.
   Ouputs numpy array with autocorrelation."""
 
-  # Initialize array
-  auto_corr = np.zeros(maxlag)
-
-  # Get mean and variance of v
-  v_m = v.mean()
-  v_var = v.var()
-  n_pts = len(v)
-
-  # Subtract the mean of v
-  v_nm = v - v_m
-
-  # Compute autocovariance of v
-  for lag in range(maxlag):
-    n_sum = n_pts - lag     # total number of terms in sum
-    for i in range(n_sum):
-      auto_corr[lag] += v_nm[i]*v_nm[i+lag]
-    auto_corr[lag] /= float(n_sum)
-
-  # Normalize by variance
-  auto_corr /= v_var
-
-  return auto_corr
+  return compute_group_auto_corr(np.reshape(v,(-1,1)),maxlag)[:,0]
+###################################################################################################
+def compute_integrated_auto_corr_time(v,c=5.0):
+  """Integrated autocorrelation time tau = 1 + 2 sum_k rho(k) of v, an array where each
+  column is a set of samples (or a 1D vector of samples), with the automatic window of
+  Sokal: the sum is truncated at the smallest lag M with M >= c*tau(M).
+  Outputs the integrated autocorrelation times and windows (arrays for 2D input).
+  The effective sample size is the number of samples divided by tau."""
+
+  v2 = np.reshape(v,(np.shape(v)[0],-1))
+  n_pts, n_var = v2.shape
+  lags = np.arange(n_pts)
+
+  tau = np.zeros(n_var)
+  window = np.zeros(n_var,dtype=int)
+
+  # Variables are processed one at a time, and only tau and the window are kept,
+  # so the memory use does not grow with the number of variables
+  for i in range(n_var):
+    # Autocorrelation at all lags, normalized as in compute_group_auto_corr but with
+    # the 1/N (biased) autocovariance estimate, which is better behaved at large lags
+    rho = compute_group_auto_corr(v2[:,i:i+1],n_pts)[:,0]
+    rho *= 1.0 - lags/float(n_pts)
+
+    # Running estimates of tau for all windows, and first window satisfying M >= c*tau(M)
+    taus = 2.0*np.cumsum(rho) - 1.0
+    ok = lags >= c*taus
+    window[i] = np.argmax(ok) if ok.any() else n_pts-1
+    tau[i] = taus[window[i]]
+
+  if np.ndim(v) == 1:
+    return tau[0], window[0]
+  return tau, window
 ###################################################################################################
 def plot_auto_corr(v,vname):
   """Plot autocorrelation (in v), for variable with name vname"""
@@ -245,6 +266,174 @@ def read_remaining_lines(samples_file,n_burnin,stride):
 
     return samples_list
 
+###################################################################################################
+def _chain_cache_name(samples_file_name,skip_header):
+    """Name of the binary cache of a text chain file"""
+    return samples_file_name + (".hdr" if skip_header else "") + ".npy"
+
+def chain_to_npy(samples_file_name,skip_header=True,chunk_size=100000):
+    """Convert a text chain file, once, into a binary .npy cache next to it (all rows after
+    the optional header line, all columns) and return it as a read-only memory map.
+    The cache is rebuilt only if it is older than the text file. The conversion is done in
+    chunks of chunk_size lines, so it never holds the whole chain in memory."""
+
+    cache_name = _chain_cache_name(samples_file_name,skip_header)
+    if os.path.exists(cache_name) and os.path.getmtime(cache_name) >= os.path.getmtime(samples_file_name):
+        return np.load(cache_name,mmap_mode="r")
+
+    # First pass: number of rows and columns
+    with open(samples_file_name,"rb") as samples_file:
+        if skip_header:
+            samples_file.readline()
+        n_rows = 0
+        n_cols = 0
+        for line in samples_file:
+            if line.strip():
+                if n_rows == 0:
+                    n_cols = len(line.split())
+                n_rows += 1
+
+    # Second pass: parse chunks of lines straight into the memory-mapped cache
+    data = np.lib.format.open_memmap(cache_name,mode="w+",dtype=np.float64,shape=(n_rows,n_cols))
+    with open(samples_file_name,"r") as samples_file:
+        if skip_header:
+            samples_file.readline()
+        i_row = 0
+        while i_row < n_rows:
+            chunk = list(itertools.islice(samples_file,chunk_size))
+            if len(chunk) == 0:
+                break
+            block = np.loadtxt(chunk,ndmin=2)
+            data[i_row:i_row+block.shape[0]] = block
+            i_row += block.shape[0]
+    data.flush()
+    del data
+
+    return np.load(cache_name,mmap_mode="r")
+
+###################################################################################################
+def read_sample_rows(samples_file_name,n_burnin,stride=1,usecols=None,skip_header=True,cache=False,chunk_size=100000):
+    """Read the samples in a text chain file, leaving out the first n_burnin sample lines, and
+    only one in every stride lines after that (same selection as read_remaining_lines).
+    Arguments:
+        * usecols: optional list of column indices to return (all columns if None)
+        * skip_header: True if the first line contains column labels
+        * cache: if True, the file is converted once into a binary .npy cache (see
+          chain_to_npy) that is memory-mapped by this and later calls
+        * chunk_size: number of selected lines parsed at once
+    Skipped lines (burn-in, stride) are not parsed, and only the requested columns are
+    converted. Returns a 2D numpy array with one row per selected sample line."""
+
+    # 0-based index of the first selected sample line
+    i_first = n_burnin + stride - 1
+
+    if cache:
+        data = chain_to_npy(samples_file_name,skip_header)[i_first::stride]
+        if usecols is not None:
+            data = data[:,usecols]
+        return np.array(data)
+
+    blocks = list(iter_sample_rows(samples_file_name,n_burnin,stride,usecols,skip_header,chunk_size))
+
+    if len(blocks) == 0:
+        return np.zeros((0,0 if usecols is None else len(usecols)))
+    return np.vstack(blocks)
+
+def iter_sample_rows(samples_file_name,n_burnin,stride=1,usecols=None,skip_header=True,chunk_size=100000):
+    """Generator over the selected sample lines of a text chain file (see read_sample_rows),
+    yielding 2D numpy arrays of at most chunk_size rows. The file is read lazily, so it can
+    be processed in one pass with bounded memory, also while the chain is still being written."""
+
+    with open(samples_file_name,"r") as samples_file:
+        if skip_header:
+            samples_file.readline()
+        lines = itertools.islice(samples_file,n_burnin+stride-1,None,stride)
+        while True:
+            chunk = list(itertools.islice(lines,chunk_size))
+            if len(chunk) == 0:
+                break
+            yield np.loadtxt(chunk,usecols=usecols,ndmin=2)
+
+###################################################################################################
+def mcmc_bin_dtype(chain_dim):
+    """Numpy structured dtype of one record of a binary chain written by the C++ MCMC class
+    (MCMC::writeChainBin): packed int step, chain_dim doubles for the state, double acceptance
+    probability (alfa) and double log-posterior (post), in native byte order."""
+    return np.dtype([('step','=i4'),('state','=f8',(chain_dim,)),('alfa','=f8'),('post','=f8')])
+
+def read_bin_chain(samples_file_name,chain_dim,n_burnin=0,stride=1,usecols=None):
+    """Read a binary chain written by MCMC::writeChainBin through a memory map, leaving out the
+    first n_burnin records and only keeping one in every stride records after that (same
+    selection as for text chains). Only the selected records and columns are copied.
+    Arguments:
+        * chain_dim: chain dimensionality
+        * usecols: optional list of column indices in the text chain layout, i.e. 0 for the step
+          number, 1..chain_dim for the states, chain_dim+1 for the acceptance probability and
+          chain_dim+2 for the log-posterior (all columns if None)
+    Returns a 2D numpy array with one row per selected record, in the text chain layout."""
+
+    rec_dtype = mcmc_bin_dtype(chain_dim)
+    n_bytes = os.path.getsize(samples_file_name)
+    if (n_bytes % rec_dtype.itemsize != 0):
+        print("\nERROR: Size of",samples_file_name,"is not a multiple of the record size for chain dimension",chain_dim)
+        sys.exit(1)
+    if n_bytes == 0:
+        records = np.zeros(0,dtype=rec_dtype)
+    else:
+        records = np.memmap(samples_file_name,dtype=rec_dtype,mode="r")
+    records = records[n_burnin+stride-1::stride]
+
+    if usecols is None:
+        usecols = range(chain_dim+3)
+    samples = np.empty((records.shape[0],len(usecols)))
+    for i_c, i_col in enumerate(usecols):
+        if i_col == 0:
+            samples[:,i_c] = records['step']
+        elif i_col <= chain_dim:
+            samples[:,i_c] = records['state'][:,i_col-1]
+        elif i_col == chain_dim+1:
+            samples[:,i_c] = records['alfa']
+        else:
+            samples[:,i_c] = records['post']
+
+    return samples
+
+###################################################################################################
+def extract_all_bin_vars(samples_file_name,chain_dim,n_burnin,debug,stride=1):
+    """Extract samples from a binary MCMC chain file written by the C++ MCMC class, as
+    extract_all_vars does for text chains (no text conversion is needed).
+    Arguments:
+        * samples_file_name: name of file to parse
+        * chain_dim: chain dimensionality
+        * n_burnin: number of records to skip from the top
+        * debug: higher values are more verbose in output
+        * stride: stride to take in parsing sample records. [default = 1]
+    Returns:
+        * A numpy array with samples (one sample of all parameters per row), with the step number
+          in the first column and the acceptance and posterior probability in the last two
+        * A list of variable names, manufactured as aa, ab, ac, ..., az, ba, bb, ...
+    """
+
+    samples = read_bin_chain(samples_file_name,chain_dim,n_burnin,stride)
+
+    # Test to make sure the number of samples is not 0 (which can happen in n_burnin > number of samples in file)
+    if samples.shape[0] < 1:
+        print("\nERROR: No valid samples were extracted. Check the sample file, or the specified n_burnin")
+        sys.exit(1)
+
+    # Remove MAP values (appended by MCMC::appendMAP), if present
+    if (samples[-1,-2] < 0):
+        samples = samples[:-1]
+        if (debug > 0):
+            print("The last sample record has been deleted as it contained the MAP values")
+
+    v_names = [string.ascii_letters[i_v // 26] + string.ascii_letters[i_v%26] for i_v in range(chain_dim)]
+
+    if (debug > 0):
+        print("Read in", samples.shape[0], "regular samples of", chain_dim, "variables from file", samples_file_name)
+
+    return samples, v_names
+
 ###################################################################################################
 def remove_MAP_line(samples_list,debug):
     """Remove the last line if is has a value < 0 (i.e. -1) in the acceptance_prob column (next to last)"""
@@ -255,7 +444,7 @@ def remove_MAP_line(samples_list,debug):
             print("The last sample line has been deleted as it contained the MAP values")
 
 ###################################################################################################
-def extract_vars(samples_file_name,n_burnin,v_names,debug,stride=1):
+def extract_vars(samples_file_name,n_burnin,v_names,debug,stride=1,cache=False):
     """From a file with samples in ascii format, with
     the first line containing the label for each column, extract
     the columns with the labels in v_names and return them
@@ -264,7 +453,9 @@ def extract_vars(samples_file_name,n_burnin,v_names,debug,stride=1):
     Assumes that the first column is the MCMC step number, the next to last column is the acceptance
     probability for each step, and the last column is the posterior probability for each step. The
     last line is removed if it contains -1 for the acceptance probability (which means this
-    line contains the MAP values)"""
+    line contains the MAP values).
+    If cache is True, the chain is converted once into a binary .npy file next to the text
+    file, which is memory-mapped by later calls (see chain_to_npy)."""
 
     # Open text file with all samples,
     samples_file = open(samples_file_name,"r")
@@ -288,30 +479,27 @@ def extract_vars(samples_file_name,n_burnin,v_names,debug,stride=1):
         for i_v in range(len(v_names)):
             print("The column number of",v_names[i_v],"is:",v_indices[i_v])
 
-    # Read subsequent lines
-    samples_list = read_remaining_lines(samples_file,n_burnin,stride)
-
     # Close the file
     samples_file.close()
 
-    # Remove MAP values, if present
-    remove_MAP_line(samples_list,debug)
-
-    # Convert list to array
-    steady_samples = np.array(samples_list)
+    # Read the columns of interest, and the acceptance probability column to detect the MAP line
+    i_acc = len(col_labels) - 2
+    steady_samples = read_sample_rows(samples_file_name,n_burnin,stride,usecols=v_indices+[i_acc],
+                                      skip_header=True,cache=cache)
 
+    # Remove MAP values, if present
+    if (steady_samples.shape[0] > 0 and steady_samples[-1,-1] < 0):
+        steady_samples = steady_samples[:-1]
+        if (debug > 0):
+            print("The last sample line has been deleted as it contained the MAP values")
 
     # Extract all columns of interest
-    samples_cols = []
-    for i_v in v_indices:
-        samples_cols.append(steady_samples[:,i_v])
-
-    samples = np.array(samples_cols).T
+    samples = steady_samples[:,:-1]
     if (debug > 0):
         print("Shape of samples array:",samples.shape)
 
-    n_samples = len(samples[:,0])
-    n_vars = len(samples[0,:])
+    n_samples = samples.shape[0]
+    n_vars = samples.shape[1]
 
     if (debug > 0):
         print("Read in", n_samples, "regular samples of", n_vars, "variables from file", samples_file_name)
@@ -319,7 +507,7 @@ def extract_vars(samples_file_name,n_burnin,v_names,debug,stride=1):
     return samples
 
 ###################################################################################################
-def extract_all_vars(samples_file_name,n_burnin,debug,stride=1,labels=True):
+def extract_all_vars(samples_file_name,n_burnin,debug,stride=1,labels=True,cache=False):
     """Extract samples and labels from an MCMC chain file.
     Assumes the following:
         * The file is in ASCII format
@@ -337,6 +525,8 @@ def extract_all_vars(samples_file_name,n_burnin,debug,stride=1,labels=True):
         * stride: stride to take in parsing sample lines. [default = 1]
         * labels: True if the file contains column labels in first line. False if not. [default = True]
                   If not column labels are present, they are manufactured as aa, ab, ac, ..., az, ba, bb, ...
+        * cache: if True, the chain is converted once into a binary .npy file next to the text file,
+                 which is memory-mapped by later calls (see chain_to_npy). [default = False]
     Returns:
         * A numpy array with samples (one sample of all parameters per row)
         * A list of variable names
@@ -387,25 +577,22 @@ def extract_all_vars(samples_file_name,n_burnin,debug,stride=1,labels=True):
             print("There are",n_cols," columns in file", samples_file_name)
             print("MCMC chain variables have been labeled", v_names)
 
-        # Rewind file so the first line will be read just like the other sample lines
-        samples_file.seek(0)
-
-    # Read subsequent lines
-    samples_list = read_remaining_lines(samples_file,n_burnin,stride)
-
     # Close the file
     samples_file.close()
 
+    # Read the sample lines
+    samples = read_sample_rows(samples_file_name,n_burnin,stride,skip_header=labels,cache=cache)
+
     # Test to make sure the number of samples is not 0 (which can happen in n_burnin > number of samples in file)
-    if len(samples_list) < 1:
+    if samples.shape[0] < 1:
         print("\nERROR: No valid samples were extracted. Check the sample file, or the specified n_burnin")
         sys.exit(1)
 
     # Remove MAP values, if present
-    remove_MAP_line(samples_list,debug)
-
-    # Convert list to array
-    samples = np.array(samples_list)
+    if (samples[-1,-2] < 0):
+        samples = samples[:-1]
+        if (debug > 0):
+            print("The last sample line has been deleted as it contained the MAP values")
 
     n_samples = samples.shape[0]
 
@@ -889,8 +1076,22 @@ def get_mcmc_stats(all_samples,v_names,out_file_base,debug,stats_types=['all'],
           ESS = compute_effective_sample_size(n_sam,auto_corr_vars[:,i_v])
           print("  ",v_names[i_v],":",ESS,"out of",n_sam," ; skip factor:",n_sam // ESS)
 
+        # Integrated autocorrelation times with automatic (Sokal) windowing
+        iat, iat_win = compute_integrated_auto_corr_time(var_samples)
+        print("\nIntegrated autocorrelation times (automatic window):\n")
+        for i_v in range(n_vars):
+          print("  ",v_names[i_v],":",iat[i_v],"(window",iat_win[i_v],"); ESS:",int(n_sam // iat[i_v]))
+
         print("\n  See plots corr-*.pdf for autocorrelations of chain samples for all variables.")
 
+    #
+    # Rank-normalized split-Rhat, bulk/tail ESS and MCSE (the two halves of the chain are
+    # compared with each other)
+    #
+    if 'conv' in stats_types or 'all' in stats_types:
+        print("\nConvergence diagnostics (rank-normalized split chain):\n")
+        print_diagnostics(convergence_diagnostics(var_samples),v_names)
+
     #
     # Compute convergenve statistics (which rely on PyMC)
     #
@@ -0,0 +1,210 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+import numpy as npy
+
+#---------------------------------------------------------------------------------------
+#  One-pass statistics of MCMC chains
+#---------------------------------------------------------------------------------------
+class StreamStats(object):
+    """
+    Streaming accumulator of MCMC chain statistics. Samples are passed in chunks, e.g.
+    every 'ofreq' steps from dram (option 'accum') or chunk by chunk from a chain file
+    (see chain_file_stats), so chains larger than memory can be summarized in one pass,
+    while they are being generated.
+
+    Accumulates:
+      - mean and covariance (Welford updates, merged across chunks as in Chan et al.)
+      - MAP state and log-posterior, and mean acceptance probability
+      - batch means for the effective sample size; the batch size doubles whenever the
+        number of batches reaches 2*nbatch, so the memory use stays bounded
+      - a uniform reservoir sample of the states for quantile estimates
+
+    Input:
+        ndim     : chain dimensionality
+        nbatch   : minimum no. of batches for the batch-means ESS (Defaults to 32)
+        nreserve : size of the reservoir sample for quantiles (Defaults to 10000)
+        rnseed   : Optional seed for the reservoir sampling
+    """
+    def __init__(self,ndim,nbatch=32,nreserve=10000,rnseed=None):
+        self.ndim     = ndim
+        self.n        = 0
+        self.mean     = npy.zeros(ndim)
+        self.m2       = npy.zeros((ndim,ndim))       # sum of squared deviations from the mean
+        self.map_post = -npy.inf
+        self.map_state = None
+        self.nacc     = 0
+        self.accsum   = 0.0
+        # batch means
+        self.nbatch   = nbatch
+        self.bsize    = 1
+        self.bmeans   = []
+        self.bsum     = npy.zeros(ndim)
+        self.bcount   = 0
+        # reservoir sample
+        self.nreserve = nreserve
+        self.reserve  = npy.zeros((nreserve,ndim))
+        self.rng      = npy.random.RandomState(rnseed)
+
+    def update(self,spls,post=None,acc=None):
+        """
+        Adds a chunk of samples [nspl,ndim], with optional log-posterior values and
+        acceptance probabilities for each sample
+        """
+        spls = npy.reshape(npy.asarray(spls,dtype=float),(-1,self.ndim))
+        nb = spls.shape[0]
+        if nb == 0:
+            return
+        # mean and covariance: merge the statistics of the chunk
+        bmean = npy.mean(spls,axis=0)
+        dev   = spls-bmean
+        bm2   = npy.dot(dev.T,dev)
+        delta = bmean-self.mean
+        ntot  = self.n+nb
+        self.m2   = self.m2+bm2+npy.outer(delta,delta)*(float(self.n)*nb/ntot)
+        self.mean = self.mean+delta*(float(nb)/ntot)
+        # MAP and acceptance
+        if post is not None:
+            post = npy.asarray(post,dtype=float).ravel()
+            imax = npy.argmax(post)
+            if post[imax] > self.map_post:
+                self.map_post  = post[imax]
+                self.map_state = spls[imax].copy()
+        if acc is not None:
+            acc = npy.asarray(acc,dtype=float).ravel()
+            self.accsum = self.accsum+npy.sum(acc)
+            self.nacc   = self.nacc+acc.shape[0]
+        self._update_batches(spls)
+        self._update_reserve(spls)
+        self.n = ntot
+
+    def update_rows(self,rows):
+        """
+        Adds a chunk in the postproc chain layout: [step, states, acceptance, log-posterior].
+        Rows with a negative acceptance probability (MAP lines) are skipped.
+        """
+        rows = npy.atleast_2d(rows)
+        rows = rows[rows[:,-2] >= 0.0]
+        self.update(rows[:,1:1+self.ndim],post=rows[:,-1],acc=rows[:,-2])
+
+    def _update_batches(self,spls):
+        i = 0
+        nb = spls.shape[0]
+        while i < nb:
+            # complete the current partial batch
+            need = self.bsize-self.bcount
+            take = min(need,nb-i)
+            self.bsum   = self.bsum+npy.sum(spls[i:i+take],axis=0)
+            self.bcount = self.bcount+take
+            i = i+take
+            if self.bcount == self.bsize:
+                self.bmeans.append(self.bsum/self.bsize)
+                self.bsum   = npy.zeros(self.ndim)
+                self.bcount = 0
+                self._merge_batches()
+            # full batches at once
+            nfull = min((nb-i)//self.bsize,2*self.nbatch-len(self.bmeans))
+            if nfull > 0:
+                blk = spls[i:i+nfull*self.bsize].reshape(nfull,self.bsize,self.ndim)
+                self.bmeans.extend(list(npy.mean(blk,axis=1)))
+                i = i+nfull*self.bsize
+                self._merge_batches()
+
+    def _merge_batches(self):
+        # double the batch size by averaging pairs of batches
+        if len(self.bmeans) >= 2*self.nbatch:
+            bm = npy.array(self.bmeans)
+            self.bmeans = list(0.5*(bm[0::2]+bm[1::2]))
+            self.bsize  = 2*self.bsize
+
+    def _update_reserve(self,spls):
+        # reservoir sampling (Algorithm R), vectorized over the chunk
+        nb = spls.shape[0]
+        nfill = max(0,min(self.nreserve-self.n,nb))
+        self.reserve[self.n:self.n+nfill] = spls[:nfill]
+        if nfill < nb:
+            idx = npy.arange(self.n+nfill,self.n+nb)
+            j = npy.floor(self.rng.random_sample(idx.shape[0])*(idx+1)).astype(int)
+            keep = j < self.nreserve
+            self.reserve[j[keep]] = spls[nfill:][keep]
+
+    def cov(self):
+        """
+        Sample covariance
+        """
+        return self.m2/max(self.n-1,1)
+
+    def ess(self):
+        """
+        Effective sample size of each parameter from the batch means
+        """
+        nb = len(self.bmeans)
+        if nb < 2:
+            return npy.full(self.ndim,float(self.n))
+        var  = npy.diag(self.cov())
+        bvar = npy.var(npy.array(self.bmeans),axis=0,ddof=1)
+        with npy.errstate(divide='ignore',invalid='ignore'):
+            ess = npy.where(bvar > 0.0,self.n*var/(self.bsize*bvar),float(self.n))
+        return npy.minimum(ess,self.n)
+
+    def quantiles(self,q):
+        """
+        Quantiles q (scalar or array) of each parameter, from the reservoir sample
+        """
+        return npy.quantile(self.reserve[:min(self.n,self.nreserve)],q,axis=0)
+
+    def summary(self,q=[0.025,0.5,0.975]):
+        """
+        Dictionary with the accumulated statistics
+        """
+        res = {}
+        res['n'        ] = self.n
+        res['mean'     ] = self.mean.copy()
+        res['cov'      ] = self.cov()
+        res['std'      ] = npy.sqrt(npy.diag(res['cov']))
+        res['map'      ] = self.map_state
+        res['pmap'     ] = self.map_post
+        res['accr'     ] = self.accsum/self.nacc if self.nacc > 0 else None
+        res['ess'      ] = self.ess()
+        res['bsize'    ] = self.bsize
+        res['q'        ] = npy.array(q)
+        res['quantiles'] = self.quantiles(q)
+        return res
+
+def chain_file_stats(samples_file_name,ndim,n_burnin=0,stride=1,skip_header=True,chunk_size=100000,**kwargs):
+    """
+    Summarizes a text chain file in the postproc layout in one pass, reading it in chunks.
+    Extra keyword arguments are passed to StreamStats. Returns the StreamStats object.
+    """
+    try:
+        from .postproc import iter_sample_rows
+    except ImportError:
+        from postproc import iter_sample_rows
+    stats = StreamStats(ndim,**kwargs)
+    for rows in iter_sample_rows(samples_file_name,n_burnin,stride,skip_header=skip_header,chunk_size=chunk_size):
+        stats.update_rows(rows)
+    return stats
@@ -35,6 +35,11 @@
 #include "stdio.h"
 #define NPY_NO_DEPRECATED_API NPY_1_7_API_VERSION
 #include <numpy/arrayobject.h>
+#if PY_MAJOR_VERSION >= 3
+#define PyString_Check PyUnicode_Check
+#define PyInt_Check    PyLong_Check
+#define PyInt_AsLong   PyLong_AsLong
+#endif
 %}
 
 /**********************************************************************/
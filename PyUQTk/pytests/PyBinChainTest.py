@@ -0,0 +1,107 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../inference/')
+
+import os
+import struct
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import postproc
+except ImportError:
+    print("PyUQTk inference.postproc module not found")
+
+'''
+This file tests the memory-mapped reader of binary chains (read_bin_chain and
+extract_all_bin_vars) on a small chain written record by record in the layout of
+MCMC::writeChainBin (int step, chain_dim doubles, double alfa, double post, packed),
+against the same chain in the text layout of MCMC::writeChainTxt
+'''
+
+def write_bin_chain(fname,chain,cdim):
+    # same sequence of fwrite calls as MCMC::writeChainBin
+    with open(fname,'wb') as f:
+        for row in chain:
+            f.write(struct.pack('=i',int(row[0])))
+            f.write(struct.pack('=%dd'%cdim,*row[1:cdim+1]))
+            f.write(struct.pack('=d',row[cdim+1]))
+            f.write(struct.pack('=d',row[cdim+2]))
+
+tmpdir = tempfile.mkdtemp()
+cdim   = 3
+nrec   = 501
+rs     = np.random.RandomState(9)
+chain  = np.zeros((nrec,cdim+3))
+chain[:,0]      = np.arange(1,nrec+1)
+chain[:,1:-2]   = rs.randn(nrec,cdim)
+chain[:,-2]     = rs.rand(nrec)
+chain[:,-1]     = -rs.rand(nrec)*10.0
+chain[-1,0]     = 0
+chain[-1,-2]    = -1.0   # MAP record, as appended by MCMC::appendMAP
+
+bname = os.path.join(tmpdir,'chain.bin')
+write_bin_chain(bname,chain,cdim)
+assert os.path.getsize(bname) == nrec*(4+8*(cdim+2))
+assert postproc.mcmc_bin_dtype(cdim).itemsize == 4+8*(cdim+2)
+
+# selections of records and columns
+for nburn, stride, usecols in [(0,1,None),(50,1,None),(7,4,None),(0,3,[0,2]),(100,5,[cdim+1,cdim+2,1])]:
+    ref = chain[nburn+stride-1::stride]
+    if usecols is not None:
+        ref = ref[:,usecols]
+    data = postproc.read_bin_chain(bname,cdim,nburn,stride,usecols)
+    assert data.shape == ref.shape and np.array_equal(data,ref)
+
+# same samples as the text chain reader, with the MAP record removed
+tname = os.path.join(tmpdir,'chain.dat')
+np.savetxt(tname,chain,header=' '.join(['step']+['x%d'%i for i in range(cdim)]+['alfa','post']),comments='')
+sb, vb = postproc.extract_all_bin_vars(bname,cdim,20,0,stride=2)
+st, vt = postproc.extract_all_vars(tname,20,0,stride=2)
+assert np.array_equal(sb,chain[21:-1:2]) and np.array_equal(sb,np.array(st))
+assert vb == ['aa','ab','ac']
+
+# empty selection, empty file and a file that does not match the chain dimension
+assert postproc.read_bin_chain(bname,cdim,nrec).shape == (0,cdim+3)
+ename = os.path.join(tmpdir,'empty.bin')
+open(ename,'wb').close()
+assert postproc.read_bin_chain(ename,cdim).shape == (0,cdim+3)
+for args in [(ename,cdim,0,0),(bname,cdim+1,0,0)]:
+    try:
+        postproc.extract_all_bin_vars(*args)
+        assert False
+    except SystemExit:
+        pass
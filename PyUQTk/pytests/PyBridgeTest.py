@@ -0,0 +1,98 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../inference/')
+
+from multiprocessing.pool import ThreadPool
+
+try:
+    import numpy as np
+    from scipy.stats import multivariate_normal
+    from scipy.special import logsumexp
+except ImportError:
+    print("Need numpy and scipy to test PyUQTk")
+
+try:
+    import evidence_solvers as es
+except ImportError:
+    print("PyUQTk inference.evidence_solvers module not found")
+
+'''
+This file tests the bridge sampling evidence estimator on a 2D posterior that
+is a two-component Gaussian mixture scaled by exp(lnz), so the exact ln-evidence
+is lnz, and the Gaussian proposal only approximates the posterior
+'''
+
+lnz  = 3.0
+wts  = np.array([0.6,0.4])
+mus  = [np.array([0.0,0.0]),np.array([1.5,0.5])]
+covs = [np.eye(2),0.5*np.eye(2)]
+
+def likTpr(x,lpinfo):
+    x  = np.atleast_2d(x)
+    lc = np.array([np.log(w)+multivariate_normal.logpdf(x,m,c) for w,m,c in zip(wts,mus,covs)]).reshape(2,-1)
+    ll = logsumexp(lc,axis=0)+lpinfo['lnz']
+    if x.shape[0] == 1:
+        return ll[0], 0.0
+    return ll, np.zeros(x.shape[0])
+
+np.random.seed(17)
+nspl = 20000
+comp = np.random.rand(nspl) < wts[1]
+spls = np.where(comp[:,None],
+                np.random.multivariate_normal(mus[1],covs[1],nspl),
+                np.random.multivariate_normal(mus[0],covs[0],nspl))
+lpinfo = {'lnz':lnz}
+ll, lp = likTpr(spls,lpinfo)
+
+np.random.seed(1)
+est, se = es.BridgeSampling_PosteriorSamples(spls,ll,lp,likTpr,lpinfo)
+print(est,se,lnz)
+assert abs(est-lnz) < max(4.0*se,0.01)
+assert 0.0 < se < 0.05
+
+# same proposals evaluated as a vectorized batch, or one at a time over a pool
+np.random.seed(1)
+est2, se2 = es.BridgeSampling_PosteriorSamples(spls,ll,lp,likTpr,lpinfo,vectorized=True)
+pool = ThreadPool(2)
+np.random.seed(1)
+est3, se3 = es.BridgeSampling_PosteriorSamples(spls,ll,lp,likTpr,lpinfo,pool=pool,nchunks=4)
+pool.close()
+assert np.isclose(est2,est) and np.isclose(est3,est) and np.isclose(se2,se)
+
+# 1D samples, and more proposal samples than posterior samples in the bridge
+np.random.seed(2)
+x1  = 2.0+0.5*np.random.randn(4000)
+ll1 = -0.5*((x1-2.0)/0.5)**2
+lik1 = lambda x,info: (-0.5*((x[0]-2.0)/0.5)**2, 0.0)
+est, se = es.BridgeSampling_PosteriorSamples(x1,ll1,np.zeros(4000),lik1,None,n_proposal=6000)
+print(est,se,np.log(np.sqrt(2.0*np.pi)*0.5))
+assert abs(est-np.log(np.sqrt(2.0*np.pi)*0.5)) < max(4.0*se,0.01)
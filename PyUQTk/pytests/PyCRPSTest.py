@@ -0,0 +1,97 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../utils/')
+
+import os
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import crps
+except ImportError:
+    print("PyUQTk utils.crps module not found")
+
+'''
+This file tests the CRPS and energy scores: the sorted CRPS against the mean
+absolute differences of the members, the energy score against the CRPS for a
+single output, with and without a large offset, and the chunked scoring of
+.npy files
+'''
+
+def crpsRef(s1,s2):
+    # E|X-Y| - E|X-X'|/2 - E|Y-Y'|/2 for each row
+    d12 = np.mean(np.abs(s1[:,:,np.newaxis]-s2[:,np.newaxis,:]),axis=(1,2))
+    d11 = np.mean(np.abs(s1[:,:,np.newaxis]-s1[:,np.newaxis,:]),axis=(1,2))
+    d22 = np.mean(np.abs(s2[:,:,np.newaxis]-s2[:,np.newaxis,:]),axis=(1,2))
+    return d12-0.5*d11-0.5*d22
+
+np.random.seed(2024)
+
+nrows = 25
+s1 = np.random.randn(nrows,40)
+s2 = 0.5+1.5*np.random.randn(nrows,60)
+s2[:,:10] = np.round(s2[:,:10])  # ties
+
+assert np.allclose(crps.CRPSrows(s1,s2),crpsRef(s1,s2))
+assert np.allclose(crps.CRPS(s1,s2),np.mean(crpsRef(s1,s2)))
+assert np.allclose(crps.CRPS(s1,s2,nchunk=7),crps.CRPS(s1,s2))
+
+# single observation per realization
+obs = np.random.randn(nrows)
+assert np.allclose(crps.CRPS(s1,obs),np.mean(crpsRef(s1,obs[:,np.newaxis])))
+assert np.allclose(crps.energyScore(s1,obs),crps.CRPS(s1,obs))
+
+# the energy score of a single output is the CRPS, even far from the origin
+for offset in [0.0,1.e7,1.e8,1.e10]:
+    cr = crps.CRPS(s1+offset,s2+offset)
+    es = crps.energyScore(s1+offset,s2+offset)
+    print('Offset %e, CRPS %e, energy score %e'%(offset,cr,es))
+    assert np.abs(es-cr) < 1.e-8*cr
+
+# multivariate members, against the direct pairwise distances
+m1 = 1.e6+np.random.randn(6,30,3)
+m2 = 1.e6+np.random.randn(6,20,3)
+def meanDist(x,y):
+    return np.mean(np.sqrt(np.sum((x[:,:,np.newaxis,:]-y[:,np.newaxis,:,:])**2,axis=3)),axis=(1,2))
+esRef = meanDist(m1,m2)-0.5*meanDist(m1,m1)-0.5*meanDist(m2,m2)
+assert np.allclose(crps.energyScoreRows(m1,m2),esRef,rtol=1e-10)
+
+# memory-mapped .npy files, scored a few rows at a time
+tmpdir = tempfile.mkdtemp()
+np.save(os.path.join(tmpdir,'m1.npy'),m1)
+np.save(os.path.join(tmpdir,'m2.npy'),m2)
+assert np.allclose(crps.energyScore(os.path.join(tmpdir,'m1.npy'),os.path.join(tmpdir,'m2.npy'),nchunk=4),
+                   np.mean(esRef),rtol=1e-10)
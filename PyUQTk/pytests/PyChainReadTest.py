@@ -0,0 +1,104 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../inference/')
+
+import os
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import postproc
+except ImportError:
+    print("PyUQTk inference.postproc module not found")
+
+'''
+This file tests the chunked reader of text chain files (read_sample_rows and
+iter_sample_rows) and the binary .npy cache (chain_to_npy) against np.loadtxt,
+for several burn-in, stride and column selections
+'''
+
+tmpdir = tempfile.mkdtemp()
+fname  = os.path.join(tmpdir,'chain.dat')
+nrows, ncols = 1003, 5
+chain = np.random.RandomState(4).randn(nrows,ncols)
+chain[:,0] = np.arange(nrows)
+np.savetxt(fname,chain,header=' '.join('c%d'%i for i in range(ncols)),comments='')
+
+full = np.loadtxt(fname,skiprows=1)
+assert np.allclose(full,chain)
+
+for nburn, stride, usecols in [(0,1,None),(100,1,None),(10,7,None),(3,2,[1,3]),(500,10,[4]),(0,3,[0,2,4])]:
+    ref = full[nburn+stride-1::stride]
+    if usecols is not None:
+        ref = ref[:,usecols]
+    for chunk_size in [1,8,100000]:
+        # chunked text reader
+        data = postproc.read_sample_rows(fname,nburn,stride,usecols,chunk_size=chunk_size)
+        assert data.shape == ref.shape and np.array_equal(data,ref)
+        blocks = list(postproc.iter_sample_rows(fname,nburn,stride,usecols,chunk_size=chunk_size))
+        assert all(b.shape[0] <= chunk_size for b in blocks)
+        assert np.array_equal(np.vstack(blocks),ref)
+    # npy cache
+    data = postproc.read_sample_rows(fname,nburn,stride,usecols,cache=True)
+    assert np.array_equal(data,ref)
+    # same selection as the line-by-line reader
+    if usecols is None:
+        with open(fname) as f:
+            f.readline()
+            assert np.array_equal(np.array(postproc.read_remaining_lines(f,nburn,stride)),ref)
+
+# the cache is written once, next to the chain file, and reused
+cache_name = fname+'.hdr.npy'
+assert os.path.exists(cache_name)
+mm = postproc.chain_to_npy(fname,chunk_size=10)
+assert isinstance(mm,np.memmap) and np.array_equal(mm,full)
+mtime = os.path.getmtime(cache_name)
+postproc.chain_to_npy(fname)
+assert os.path.getmtime(cache_name) == mtime
+
+# a newer chain file rebuilds the cache
+chain2 = chain[:50]+1.0
+np.savetxt(fname,chain2,header=' '.join('c%d'%i for i in range(ncols)),comments='')
+os.utime(fname,(mtime+10,mtime+10))
+assert np.allclose(postproc.read_sample_rows(fname,0,cache=True),chain2)
+
+# file without a header, and a burn-in beyond the end of the chain
+fname2 = os.path.join(tmpdir,'chain_nohdr.dat')
+np.savetxt(fname2,chain)
+assert np.array_equal(postproc.read_sample_rows(fname2,0,skip_header=False),full)
+assert np.array_equal(postproc.read_sample_rows(fname2,0,skip_header=False,cache=True),full)
+assert os.path.exists(fname2+'.npy')
+assert postproc.read_sample_rows(fname2,2000,usecols=[1,2],skip_header=False).shape == (0,2)
@@ -0,0 +1,104 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../inference/')
+
+from multiprocessing.pool import ThreadPool
+
+try:
+    import numpy as np
+    import scipy.stats
+    import scipy.linalg
+except ImportError:
+    print("Need numpy and scipy to test PyUQTk")
+
+try:
+    import bayes_evid as be
+except ImportError:
+    print("PyUQTk inference.bayes_evid module not found")
+
+'''
+This file tests the Chib-Jeliazkov evidence estimator against the previous loop
+implementation, with the same random draws, and against the known evidence of
+a scaled 3D Gaussian density; the batched evaluation of the denominator draws
+(vectorized, or over a pool) must give the same result
+'''
+
+def chib_loop(spls_star,spls,llp_star,llp,likTpr,lpinfo,prop_cov,coveps,gamma):
+    # reference: the loop implementation this estimator used to have
+    cdim   = spls_star.shape[0]
+    npSpls = spls.shape[0]
+    sigcv   = 2.4*gamma/np.sqrt(cdim)
+    covPeps = sigcv**2*(prop_cov + coveps * np.identity(cdim))
+    Rchol   = scipy.linalg.cholesky(covPeps)
+    num = 0.0
+    for i in range(npSpls):
+        alpha = np.exp(llp_star-llp[i]) if llp_star-llp[i] < 0.0 else 1.0
+        num = num+scipy.stats.multivariate_normal.pdf(spls[i], mean=spls_star, cov=covPeps)*alpha
+    den = 0.0
+    for i in range(npSpls):
+        u = spls_star + np.dot(np.random.randn(1,cdim),Rchol)[0]
+        p2Lik,p2Pri = likTpr(u,lpinfo)
+        den = den + (np.exp(p2Lik+p2Pri-llp_star) if p2Lik+p2Pri-llp_star < 0.0 else 1.0)
+    return llp_star-np.log(num)+np.log(den)
+
+def lxp_vec(x,info):
+    # vectorized version of bayes_evid.log_lxp
+    lpdf = scipy.stats.multivariate_normal.logpdf(x,mean=info['mu'],cov=info['cov'])
+    return lpdf+0.5*np.log(2*np.pi*np.linalg.det(info['cov'])), np.zeros(x.shape[0])
+
+dims = 3
+mu   = np.array([1.1*i  for i in range(dims)])
+cov  = np.diag([1.1**i for i in range(dims)])
+cov[0,1] = cov[1,0] = 0.3
+lpinfo = {'mu':mu,'cov':cov}
+# exp(log_lxp) is the Gaussian density scaled by sqrt(2*pi*det(cov))
+truth = 0.5*np.log(2.0*np.pi*np.linalg.det(cov))
+
+np.random.seed(5)
+nspl = 4000
+spls = np.random.multivariate_normal(mu,cov,nspl)
+llp  = np.array([sum(be.log_lxp(spl,lpinfo)) for spl in spls])
+llp_star = sum(be.log_lxp(mu,lpinfo))
+args = (mu,spls,llp_star,llp,be.log_lxp,lpinfo,cov,1.e-12,0.8)
+
+np.random.seed(1); ref  = chib_loop(*args)
+np.random.seed(1); vec  = be.bayesevid_ChibJeliazkov(*args)
+np.random.seed(1); vecb = be.bayesevid_ChibJeliazkov(*(args[:4]+(lxp_vec,)+args[5:]),vectorized=True)
+pool = ThreadPool(2)
+np.random.seed(1); vecp = be.bayesevid_ChibJeliazkov(*args,pool=pool,nchunks=3)
+pool.close()
+print(ref,vec,vecb,vecp,truth)
+
+assert np.isclose(vec,ref,rtol=0.0,atol=1.e-10)
+assert np.isclose(vecb,ref,rtol=0.0,atol=1.e-10)
+assert np.isclose(vecp,ref,rtol=0.0,atol=1.e-10)
+assert abs(vec-truth) < 0.05
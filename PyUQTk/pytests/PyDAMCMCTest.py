@@ -0,0 +1,76 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../inference/')
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import mcmc
+except ImportError:
+    print("PyUQTk inference.mcmc module not found")
+
+'''
+This file tests the surrogate-accelerated delayed acceptance sampler on a correlated
+Gaussian, with a biased surrogate that is refitted from the full-model evaluations
+'''
+
+cov  = np.array([[1.0,0.8],[0.8,1.0]])
+icov = np.linalg.inv(cov)
+
+def logpost(x,info):
+    return [-0.5*np.dot(x,np.dot(icov,x)), 0.0]
+
+def surpost(x,info):
+    # shifted and scaled version of the true log-posterior
+    return [-0.65*np.dot(x-0.2,np.dot(icov,x-0.2)), 0.0]
+
+def refit(xs,lls,info):
+    # quadratic least-squares surrogate
+    A = np.column_stack([np.ones(xs.shape[0]),xs,xs**2,xs[:,0]*xs[:,1]])
+    c = np.linalg.lstsq(A,lls,rcond=None)[0]
+    return lambda x,info: [np.dot(c,np.hstack(([1.0],x,x**2,x[0]*x[1]))), 0.0]
+
+opts = {'nsteps':20000,'nburn':2000,'nadapt':100,'inicov':0.1*np.identity(2),'coveps':1.e-10,
+        'burnsc':5,'spllo':-20*np.ones(2),'splhi':20*np.ones(2),'rnseed':2024}
+
+for o in [{},{'refit':refit,'nrefit':200}]:
+    opts.update(o)
+    res = mcmc.damcmc(opts,np.zeros(2),logpost,None,surpost)
+    spls = res['chain'][opts['nburn']:]
+    print('Mean',np.mean(spls,axis=0),'Covariance',np.cov(spls.T).flatten())
+    print('Full model evaluations:',res['nfull'],'out of',opts['nsteps'],'steps')
+    assert np.all(np.abs(np.mean(spls,axis=0)) < 0.15)
+    assert np.all(np.abs(np.cov(spls.T)-cov) < 0.15)
+    assert res['nfull'] < opts['nsteps']/2
@@ -0,0 +1,101 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../pce/')
+sys.path.append('../')
+sys.path.append('../PyPCE/')
+
+try:
+    import _pce as uqtkpce
+except:
+    print('PyUQTk pce module not found')
+
+try:
+    import pce_tools
+except ImportError:
+    print("PyUQTk pce_tools module not found")
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+'''
+This file tests the derivative-based sensitivity measures of PC expansions: the
+analytical measures against the Monte Carlo estimates from PCSet::dPhi and against
+finite differences, and the Poincare bounds against the total Sobol' indices
+'''
+
+np.random.seed(2024)
+
+nord = 3
+ndim = 3
+eps  = 1.e-5
+for pc_type in ['LU','HG']:
+    print('PC type',pc_type)
+    poly = uqtkpce.PCSet("NISPnoq", nord, ndim, pc_type, 0.0, 1.0)
+    npce = poly.GetNumberPCTerms()
+    coef = np.random.randn(npce)/np.arange(1,npce+1)
+
+    # analytical measures and Monte Carlo estimates with the dPhi gradients
+    dgsm, totbound = pce_tools.UQTkDGSM(poly, coef)
+    dgsm_mc, totbound_mc = pce_tools.UQTkDGSM(poly, coef, n_samples=200000, n_batch=30000)
+    print('DGSM, analytical :',dgsm)
+    print('DGSM, Monte Carlo:',dgsm_mc)
+    assert np.allclose(dgsm_mc,dgsm,rtol=0.05)
+    assert np.allclose(totbound_mc,totbound,rtol=0.05)
+
+    # central finite differences of the PCE on germ samples
+    if pc_type == 'LU':
+        germ = 2.0*np.random.random_sample((50000,ndim))-1.0
+    else:
+        germ = np.random.randn(50000,ndim)
+    dgsm_fd = np.zeros(ndim)
+    for idim in range(ndim):
+        dx = np.zeros(ndim)
+        dx[idim] = eps
+        grad = (pce_tools.UQTkEvaluatePCE(poly,coef,germ+dx)-pce_tools.UQTkEvaluatePCE(poly,coef,germ-dx))/(2.0*eps)
+        dgsm_fd[idim] = np.mean(grad**2)
+    print('DGSM, finite diff:',dgsm_fd)
+    assert np.allclose(dgsm_fd,dgsm,rtol=0.1)
+
+    # the Poincare inequality bounds the total Sobol' indices
+    mainsens, totsens, jointsens = pce_tools.UQTkGSA(poly, coef)
+    print('Upper bounds:',totbound,'\nTotal sens. :',totsens)
+    assert np.all(totbound >= totsens-1.e-12)
+
+# the bound is attained by a linear function of a Gaussian germ
+poly = uqtkpce.PCSet("NISPnoq", 1, ndim, 'HG', 0.0, 1.0)
+coef = np.array([1.0,2.0,-1.0,0.5])
+dgsm, totbound = pce_tools.UQTkDGSM(poly, coef)
+mainsens, totsens, jointsens = pce_tools.UQTkGSA(poly, coef)
+assert np.allclose(dgsm,coef[1:]**2)
+assert np.allclose(totbound,totsens)
@@ -0,0 +1,71 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../inference/')
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import diagnostics
+except ImportError:
+    print("PyUQTk inference.diagnostics module not found")
+
+'''
+This file tests the convergence diagnostics on AR(1) chains, whose effective sample size is
+known analytically, and on chains that have not mixed
+'''
+
+np.random.seed(2024)
+nchains = 4
+nsteps  = 4000
+phi     = np.array([0.0,0.5,0.9])
+
+eps = np.random.randn(nchains,nsteps,phi.shape[0])
+x   = np.zeros_like(eps)
+x[:,0] = eps[:,0]/np.sqrt(1.0-phi**2)
+for i in range(1,nsteps):
+    x[:,i] = phi*x[:,i-1]+eps[:,i]
+
+diag  = diagnostics.convergence_diagnostics(x)
+exact = nchains*nsteps*(1.0-phi)/(1.0+phi)
+diagnostics.print_diagnostics(diag)
+print('Exact ESS:',exact)
+assert np.all(diag['rhat'] < 1.01)
+assert np.all(np.abs(diag['ess_bulk']/exact-1.0) < 0.2)
+assert np.all(np.abs(diag['ess_mean']/exact-1.0) < 0.2)
+assert np.all(diag['ess_tail'] < nchains*nsteps)
+
+# shift one chain: Rhat should flag the lack of convergence
+x[0] += 2.0
+assert np.all(diagnostics.rhat(x) > 1.05)
@@ -0,0 +1,101 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../utils/')
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import correlations
+except ImportError:
+    print("PyUQTk utils.correlations module not found")
+
+'''
+This file tests the distance correlation: the sorted (fast) and blocked methods
+against the definition with full, double-centered distance matrices, on samples
+with and without ties
+'''
+
+def distcorrRef(spl):
+    nvars = spl.shape[1]
+    dcent = []
+    for i in range(nvars):
+        a = np.abs(spl[:,i,np.newaxis]-spl[np.newaxis,:,i])
+        dcent.append(a-np.mean(a,axis=0)-np.mean(a,axis=1)[:,np.newaxis]+np.mean(a))
+    dCor = np.zeros((nvars,nvars))
+    for i in range(1,nvars):
+        for j in range(i):
+            dCov2 = np.mean(dcent[i]*dcent[j])
+            dVar2 = np.sqrt(np.mean(dcent[i]**2)*np.mean(dcent[j]**2))
+            dCor[i,j] = np.sqrt(max(dCov2,0.0)/dVar2)
+    return dCor
+
+np.random.seed(2024)
+
+nspl = 300
+x = np.random.randn(nspl)
+spl = np.column_stack((x,                                # continuous
+                       x**2+0.1*np.random.randn(nspl),    # nonlinear dependence
+                       np.random.randn(nspl),             # independent
+                       np.round(2.0*x),                   # many ties
+                       np.random.randint(0,3,nspl),       # ties, independent
+                       np.ones(nspl)+np.arange(nspl)%2))  # two values only
+
+# row sums of the distance matrices, with ties
+for i in range(spl.shape[1]):
+    rsRef = np.sum(np.abs(spl[:,i,np.newaxis]-spl[np.newaxis,:,i]),axis=1)
+    assert np.allclose(correlations._distrowsums(spl[:,i]),rsRef)
+
+dRef = distcorrRef(spl)
+print('Reference distance correlations:\n',dRef)
+for method, kwargs in [('fast',{}),('fast',{'nthreads':3}),
+                       ('blocked',{}),('blocked',{'block':7}),('blocked',{'block':16,'nthreads':3}),
+                       ('auto',{})]:
+    dCor = correlations.distcorr(spl,method=method,**kwargs)
+    assert np.allclose(dCor,dRef,rtol=1e-8,atol=1e-10), (method,kwargs)
+
+# a large offset and an odd sample size
+spl = spl[:nspl-1]+1.e4
+assert np.allclose(correlations.distcorr(spl,method='fast'),distcorrRef(spl),rtol=1e-8,atol=1e-10)
+
+# sample sizes around powers of two, for the bitwise dominance counts
+for n in [2,3,4,5,31,32,33]:
+    spl = np.column_stack((np.random.randint(0,4,n),np.random.randn(n)))
+    assert np.allclose(correlations.distcorr(spl,method='fast'),distcorrRef(spl),rtol=1e-8,atol=1e-10)
+
+try:
+    correlations.distcorr(spl,method='unknown')
+    raise AssertionError('unknown method not detected')
+except ValueError as e:
+    print(e)
@@ -0,0 +1,81 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../inference/')
+
+import io
+import contextlib
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import mcmc
+except ImportError:
+    print("PyUQTk inference.mcmc module not found")
+
+'''
+This file tests the affine-invariant ensemble sampler on a 2D Gaussian whose
+log-posterior is NaN in part of the domain, and the checks on the initial walkers
+'''
+
+sig = np.array([1.0,0.3])
+
+def logpost(x,info):
+    x  = np.atleast_2d(x)
+    ll = -0.5*np.sum((x/sig)**2,axis=1)
+    # undefined far in the tail; such proposals must be rejected
+    ll[x[:,0] > 6.0] = np.nan
+    return ll, np.zeros(x.shape[0])
+
+nwalk  = 20
+cini   = 0.1*np.random.RandomState(7).randn(nwalk,2)
+opts   = {'nsteps':3000,'rnseed':2024,'spllo':np.array([-10.0,-10.0]),'splhi':np.array([10.0,10.0])}
+res    = mcmc.ensemble(opts,cini,logpost,None)
+spls   = res['chain'][500*nwalk:]
+print('mean',np.mean(spls,axis=0),'std',np.std(spls,axis=0),'acceptance',res['accr'])
+assert np.all(np.isfinite(res['minfo'][:,1]))
+assert np.all(np.abs(np.mean(spls,axis=0)) < 0.2*sig)
+assert np.all(np.abs(np.std(spls,axis=0)/sig-1.0) < 0.15)
+assert 0.2 < res['accr'] < 0.9
+
+# initial walkers outside the bounds or with a zero posterior are rejected up front
+for bad in [np.array([11.0,0.0]),np.array([7.0,0.0])]:
+    cbad = cini.copy()
+    cbad[3] = bad
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        res = mcmc.ensemble(opts,cbad,logpost,None)
+    print(out.getvalue())
+    assert res == {}
+    assert 'ERROR' in out.getvalue() and '[3]' in out.getvalue()
@@ -0,0 +1,104 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../inference/')
+
+try:
+    import numpy as np
+    from scipy.stats import multivariate_normal
+except ImportError:
+    print("Need numpy and scipy to test PyUQTk")
+
+try:
+    import evidence_solvers as es
+except ImportError:
+    print("PyUQTk inference.evidence_solvers module not found")
+
+'''
+This file tests the log-sum-exp evidence estimators and their bootstrap errors
+on a conjugate Gaussian model, y_i ~ N(theta,s^2) with theta ~ N(m0,t0^2), whose
+evidence is the multivariate normal density N(y; m0, s^2 I + t0^2 1 1^T)
+'''
+
+np.random.seed(11)
+nobs, s, m0, t0 = 20, 1.0, 0.0, 2.0
+y = 0.7+s*np.random.randn(nobs)
+
+logev_exact = multivariate_normal.logpdf(y,m0*np.ones(nobs),s**2*np.eye(nobs)+t0**2*np.ones((nobs,nobs)))
+
+# posterior of theta
+pvar  = 1.0/(1.0/t0**2+nobs/s**2)
+pmean = pvar*(m0/t0**2+np.sum(y)/s**2)
+
+def loglik(th):
+    th = np.atleast_1d(th)
+    return -0.5*np.sum((y[None,:]-th[:,None])**2,axis=1)/s**2-0.5*nobs*np.log(2.0*np.pi*s**2)
+
+def logprior(th):
+    return -0.5*((np.atleast_1d(th)-m0)/t0)**2-0.5*np.log(2.0*np.pi*t0**2)
+
+# LogMeanExp agrees with the direct formula, and does not overflow
+v = np.random.randn(50)
+assert np.isclose(es.LogMeanExp(v),np.log(np.mean(np.exp(v))))
+assert np.isclose(es.LogMeanExp(v+1000.0),np.log(np.mean(np.exp(v)))+1000.0)
+assert np.isclose(es.LogMeanExp(v-1000.0),np.log(np.mean(np.exp(v)))-1000.0)
+
+# bootstrap error: close to the spread of repeated estimates, independent of the chunking
+n = 2000
+reps = [es.LogMeanExp(loglik(m0+t0*np.random.randn(n))) for i in range(200)]
+ln_lik = loglik(m0+t0*np.random.randn(n))
+est, se = es.LikelihoodMC_PriorSamples(ln_lik,nboot=400)
+print('prior MC:',est,se,np.std(reps),logev_exact)
+assert est == es.LikelihoodMC_PriorSamples(ln_lik)
+assert 0.5*np.std(reps) < se < 2.0*np.std(reps)
+np.random.seed(3); se1 = es.LogMeanExp(ln_lik,nboot=100,nchunk=7)[1]
+np.random.seed(3); se2 = es.LogMeanExp(ln_lik,nboot=100,nchunk=100)[1]
+assert np.isclose(se1,se2)
+
+# prior Monte Carlo
+ln_lik = loglik(m0+t0*np.random.randn(200000))
+est, se = es.LikelihoodMC_PriorSamples(ln_lik,nboot=50)
+print('prior MC:',est,se,logev_exact)
+assert abs(est-logev_exact) < max(4.0*se,0.02)
+
+# importance sampling with the Gaussian fit of posterior samples
+post = pmean+np.sqrt(pvar)*np.random.randn(5000,1)
+isp, islnpdf = es.ImportanceLikelihoodMC_PosteriorSamples(post,20000,None,None,None,1)
+est, se = es.ImportanceLikelihoodMC_PosteriorSamples(None,None,logprior(isp[:,0]),loglik(isp[:,0]),islnpdf,2,nboot=50)
+print('importance:',est,se,logev_exact)
+assert abs(est-logev_exact) < max(4.0*se,0.01)
+
+# harmonic mean: biased, but returns the same estimate with and without bootstrap
+ln_lik = loglik(post[:,0])
+est, se = es.Harmonic_PosteriorSamples(ln_lik,nboot=50)
+print('harmonic:',est,se,logev_exact)
+assert est == es.Harmonic_PosteriorSamples(ln_lik) and se > 0.0
+assert abs(est-logev_exact) < 2.0
@@ -0,0 +1,115 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../utils/')
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import func as uqtkfunc
+except ImportError:
+    print("PyUQTk utils.func module not found")
+
+'''
+This file tests the vectorized benchmark functions: gradients against central
+finite differences, evaluation for a batch of parameter sets against one set at
+a time, PC expansions against numpy polynomials, and the benchmark registry
+with exact integrals and main sensitivities
+'''
+
+def fdGrad(f,x,eps=1.e-6):
+    g = np.zeros(x.shape)
+    for idim in range(x.shape[1]):
+        dx = np.zeros(x.shape[1])
+        dx[idim] = eps
+        g[:,idim] = (f(x+dx)-f(x-dx))/(2.0*eps)
+    return g
+
+np.random.seed(2024)
+
+# gradients of all registry functions against finite differences
+for name in sorted(uqtkfunc.benchmarks.keys()):
+    bench = uqtkfunc.get_benchmark(name,dim=4 if uqtkfunc.benchmarks[name][1] is None else None)
+    dom = bench['domain']
+    # stay away from the edges of the domain
+    x = dom[:,0]+(0.05+0.9*np.random.random_sample((50,bench['dim'])))*(dom[:,1]-dom[:,0])
+    y = bench['f'](x)
+    g = bench['grad'](x)
+    assert y.shape == (50,) and g.shape == (50,bench['dim'])
+    gfd = fdGrad(bench['f'],x)
+    print('%-12s max. gradient error %e'%(name,np.max(np.abs(g-gfd))))
+    assert np.allclose(g,gfd,rtol=1.e-5,atol=1.e-5*np.max(np.abs(gfd)))
+
+# a batch of parameter sets gives the outputs of each set in turn
+x = 2.0*np.random.random_sample((40,3))-1.0
+for model in ['genz_osc','genz_exp','genz_cont','genz_gaus','genz_cpeak','genz_ppeak','ishigami','sobol']:
+    if model == 'ishigami':
+        pset = np.array([[7.0,0.1],[5.0,0.2],[1.0,0.0]])
+    elif model == 'sobol':
+        pset = np.array([[0.0,1.0,4.5],[1.0,2.0,3.0],[9.0,0.5,0.0]])
+    else:
+        pset = np.column_stack((np.random.random_sample(3),0.5+np.random.random_sample((3,3))))
+    yb = uqtkfunc.func(x,model,pset)
+    gb = uqtkfunc.func_grad(x,model,pset)
+    assert yb.shape == (40,3) and gb.shape == (40,3,3)
+    for iset in range(3):
+        assert np.allclose(yb[:,iset],uqtkfunc.func(x,model,pset[iset]))
+        assert np.allclose(gb[:,iset],uqtkfunc.func_grad(x,model,pset[iset]))
+
+# PC expansions, for one and several coefficient sets
+mindex = uqtkfunc._mindex_TO(2,3)
+pccf   = np.random.randn(2,mindex.shape[0])
+for pctype, polyval in [('LU',np.polynomial.legendre.legval),('HG',np.polynomial.hermite_e.hermeval)]:
+    yref = np.zeros((x.shape[0],2))
+    for iset in range(2):
+        for k in range(mindex.shape[0]):
+            yref[:,iset] += pccf[iset,k]*polyval(x[:,0],np.eye(4)[mindex[k,0]])*polyval(x[:,1],np.eye(4)[mindex[k,1]])
+    assert np.allclose(uqtkfunc.func(x[:,:2],'PCmi',(mindex,pccf,pctype)),yref)
+    assert np.allclose(uqtkfunc.func(x[:,:2],'PCmi',(mindex,pccf[1],pctype)),yref[:,1])
+    g = uqtkfunc.func_grad(x[:,:2],'PCmi',(mindex,pccf[0],pctype))
+    assert np.allclose(g,fdGrad(lambda z: uqtkfunc.func(z,'PCmi',(mindex,pccf[0],pctype)),x[:,:2]),rtol=1.e-5,atol=1.e-6)
+
+# registry with parameters given as lists, exact integrals and main sensitivities
+for name in ['genz_osc','genz_exp','genz_gaus','genz_ppeak']:
+    bench = uqtkfunc.get_benchmark(name,dim=3,func_params=[0.3,1.0,2.0,0.5])
+    xs = 2.0*np.random.random_sample((200000,3))-1.0
+    print('%-12s integral %e, Monte Carlo %e'%(name,bench['integ'],np.mean(bench['f'](xs))))
+    assert np.abs(np.mean(bench['f'](xs))-bench['integ']) < 0.01*np.abs(bench['integ'])
+bench = uqtkfunc.get_benchmark('ishigami',func_params=[7.0,0.1])
+assert bench['dim'] == 3 and np.allclose(bench['domain'],[[-np.pi,np.pi]]*3)
+assert np.allclose(bench['mainsens'],[0.3139,0.4424,0.0],atol=1e-4)
+bench = uqtkfunc.get_benchmark('sobol',dim=4,func_params=[0,1,4.5,9])
+assert np.allclose(bench['mainsens'],uqtkfunc.get_benchmark('sobol',dim=4)['mainsens'])
+bench = uqtkfunc.get_benchmark('poly_exsens',dim=3)
+assert np.allclose(bench['mainsens'],0.2/(1.2**3-1.0))
@@ -0,0 +1,125 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../inference/')
+
+import os
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import memo
+    import mcmc
+except ImportError:
+    print("PyUQTk inference.memo or inference.mcmc module not found")
+
+'''
+This file tests the memoizing log-posterior wrapper: the in-memory LRU cache,
+the batch lookups, the persistent on-disk store across sessions, and the
+memoized gradient used with hmc
+'''
+
+nevals = [0]
+
+def likTpr(x,lpinfo):
+    nevals[0] += np.atleast_2d(x).shape[0]
+    x = np.atleast_2d(x)
+    ll = -0.5*np.sum((x-lpinfo['mu'])**2,axis=1)
+    lp = np.zeros(x.shape[0])
+    if x.shape[0] == 1:
+        return ll[0], lp[0]
+    return ll, lp
+
+def gradTpr(x,lpinfo):
+    nevals[0] += 1
+    return -(x-lpinfo['mu'])
+
+lpinfo = {'mu':np.array([1.0,-1.0])}
+x1, x2, x3, x4 = [np.array([float(i),0.5]) for i in range(4)]
+
+# LRU cache: the least recently used state is evicted
+lpost = memo.MemoLogPost(likTpr,maxsize=3)
+for x in [x1,x2,x3,x1,x4]:
+    lpost(x,lpinfo)
+st = lpost.stats()
+assert nevals[0] == 4 and st['hits'] == 1 and st['misses'] == 4 and st['size'] == 3
+assert lpost.key(x2) not in lpost.cache       # evicted by x4
+assert lpost.key(x1) in lpost.cache           # kept, as it was used again
+ll, lp = lpost(x4+1.e-15,lpinfo)              # equal to x4 to ndigits digits
+assert nevals[0] == 4 and ll == likTpr(x4,lpinfo)[0]
+nevals[0] = 0
+
+# batch lookups: only new states are evaluated, duplicates once
+lpost = memo.MemoLogPost(likTpr,vectorized=True)
+lpost(x1,lpinfo)
+spls = np.array([x1,x2,x2,x3])
+ll, lp = lpost(spls,lpinfo)
+assert nevals[0] == 3
+assert np.allclose(ll,likTpr(spls,lpinfo)[0]) and np.all(lp == 0.0)
+nevals[0] = 0
+
+# on-disk store: results are reused by a new wrapper, without calling likTpr
+store = os.path.join(tempfile.mkdtemp(),'logpost.db')
+lpost = memo.MemoLogPost(likTpr,store=store)
+vals  = [lpost(x,lpinfo) for x in [x1,x2,x3]]
+lpost.close()
+assert nevals[0] == 3
+lpost = memo.MemoLogPost(likTpr,store=store)
+assert [lpost(x,lpinfo) for x in [x1,x2,x3]] == vals
+st = lpost.stats()
+assert nevals[0] == 3 and st['diskhits'] == 3 and st['misses'] == 0
+lpost.clear()
+lpost(x1,lpinfo)
+assert nevals[0] == 4
+lpost.close()
+nevals[0] = 0
+
+# gradient pass-through for hmc
+lpost = memo.MemoLogPost(likTpr,gradTpr=gradTpr)
+U, grad_U = lpost.potential(lpinfo)
+assert np.isclose(U(x3),0.5*np.sum((x3-lpinfo['mu'])**2))
+assert np.allclose(grad_U(x3),x3-lpinfo['mu'])
+assert np.allclose(grad_U(x3),x3-lpinfo['mu']) and nevals[0] == 2
+try:
+    memo.MemoLogPost(likTpr).potential(lpinfo)[1](x1)
+    assert False
+except ValueError:
+    pass
+
+opts = {'method':'nuts','nsteps':1000,'nburn':300,'rnseed':7}
+sol  = mcmc.hmc(opts,np.zeros(2),U,grad_U)
+print(sol['chain'][300:].mean(axis=0), lpost.stats())
+assert np.allclose(sol['chain'][300:].mean(axis=0),lpinfo['mu'],atol=0.25)
+assert lpost.stats()['misses'] > 0
@@ -0,0 +1,83 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../inference/')
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import mcmc
+except ImportError:
+    print("PyUQTk inference.mcmc module not found")
+
+'''
+This file tests the HMC and NUTS samplers, with dual averaging step size and
+diagonal/dense mass matrix adaptation, on a correlated 2D Gaussian target
+'''
+
+mu  = np.array([1.0,-2.0])
+cov = np.array([[4.0,1.2],[1.2,0.5]])
+prec = np.linalg.inv(cov)
+
+def U(q):
+    return 0.5*np.dot(q-mu,np.dot(prec,q-mu))
+
+def grad_U(q):
+    return np.dot(prec,q-mu)
+
+nburn  = 1000
+nsteps = 4000
+# short static trajectories, away from the half period of the whitened target where
+# fixed-length HMC would only flip the sign of the state
+for method,metric in [('nuts','diag'),('nuts','dense'),('hmc','diag')]:
+    opts = {'method':method,'metric':metric,'nsteps':nsteps,'nburn':nburn,'nT':3,'rnseed':2024}
+    res  = mcmc.hmc(opts,np.zeros(2),U,grad_U)
+    spls = res['chain'][nburn:]
+    print(method,metric,': mean',np.mean(spls,axis=0),'var',np.var(spls,axis=0),
+          'dt',res['dt'],'acceptance',res['accr'])
+    assert np.all(np.abs(np.mean(spls,axis=0)-mu) < 0.25*np.sqrt(np.diag(cov)))
+    assert np.all(np.abs(np.var(spls,axis=0)/np.diag(cov)-1.0) < 0.25)
+    # the averaged step size is on the conservative side of the adaptation target
+    assert res['accr'] > (0.7 if method == 'nuts' else 0.55)
+    assert res['ndiv'] == 0
+    # the adapted metric tracks the target covariance, so the step size is O(1)
+    assert 0.2 < res['dt'] < 2.0
+    if metric == 'dense':
+        assert np.all(np.abs(res['minv']-cov) < 0.3*np.sqrt(np.outer(np.diag(cov),np.diag(cov))))
+    else:
+        assert np.all(np.abs(res['minv']/np.diag(cov)-1.0) < 0.3)
+
+# a single leapfrog step per transition is still a valid sampler
+res = mcmc.hmc({'method':'hmc','nsteps':200,'nburn':100,'nT':0,'dt':0.1},np.zeros(2),U,grad_U)
+assert np.all(res['trace'][1:,5] == 1)
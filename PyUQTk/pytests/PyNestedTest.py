@@ -0,0 +1,68 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../inference/')
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import nested
+except ImportError:
+    print("PyUQTk inference.nested module not found")
+
+'''
+This file tests the nested sampling evidence for a Gaussian likelihood with a uniform
+prior on [-5,5]^3, for which the evidence is known analytically
+'''
+
+ndim = 3
+sig  = 0.5
+
+def loglik(x,info):
+    x = np.atleast_2d(x)
+    return -0.5*np.sum(x**2,axis=1)/sig**2, np.zeros(x.shape[0])
+
+def ptform(u):
+    return -5.0+10.0*u
+
+truth = ndim*np.log(0.1)+0.5*ndim*np.log(2*np.pi*sig**2)
+
+for sampler in ['slice','ellipsoid']:
+    opts = {'ndim':ndim,'nlive':400,'nbatch':20,'sampler':sampler,'vectorized':True,'rnseed':2024}
+    res  = nested.nested(opts,loglik,None,ptform)
+    print(sampler,': log-evidence',res['logz'],'+/-',res['logzerr'],'exact',truth)
+    print('Posterior std. dev.',np.std(res['chain'],axis=0))
+    assert abs(res['logz']-truth) < 4*res['logzerr']
+    assert np.all(np.abs(np.std(res['chain'],axis=0)-sig) < 0.1)
+    assert abs(np.sum(res['weights'])-1.0) < 1.e-12
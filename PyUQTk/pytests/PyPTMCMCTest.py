@@ -0,0 +1,76 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../inference/')
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import mcmc
+except ImportError:
+    print("PyUQTk inference.mcmc module not found")
+
+'''
+This file tests the parallel tempering sampler, with worker processes and serially,
+on a bimodal 1D target whose well-separated modes a single Metropolis chain does not
+cross: the beta=1 chain needs the swaps to visit both modes
+'''
+
+def logpost(x,info):
+    ll = np.logaddexp(-0.5*((x[0]+4.0)/0.5)**2,-0.5*((x[0]-4.0)/0.5)**2)
+    return ll, 0.0
+
+if __name__ == '__main__':
+    for nprocs in [2,0]:
+        opts = {'nsteps':6000,'nburn':2000,'nadapt':100,'inicov':np.array([[0.25]]),
+                'coveps':1.e-10,'burnsc':5,'spllo':np.array([-10.0]),'splhi':np.array([10.0]),
+                'ntemps':5,'tmax':50.0,'nprocs':nprocs,'rnseed':2024}
+        res  = mcmc.ptmcmc(opts,np.array([-4.0]),logpost,None)
+        spls = res['chain'][opts['nburn']:,0]
+        fpos = np.mean(spls > 0.0)
+        print('nprocs',nprocs,': betas',res['betas'],'swap rates',res['swapr'],
+              'fraction in the positive mode',fpos)
+        # both modes visited, with about equal weights
+        assert 0.3 < fpos < 0.7
+        assert abs(np.std(spls)-np.sqrt(16.25)) < 0.5
+        # swaps are accepted between all neighbors, with rates equalized by the adaptation
+        assert np.all(res['swapr'] > 0.1)
+        assert np.max(res['swapr'])-np.min(res['swapr']) < 0.3
+        # the acceptance rate of the beta=1 chain counts the Metropolis decisions at beta=1,
+        # not the states brought in by swaps: it matches the mean acceptance probability
+        assert abs(res['accr']-np.mean(res['minfo'][1:,0])) < 0.03
+        # the ladder stays monotone, with fixed coldest and hottest temperatures
+        assert res['betas'][0] == 1.0
+        assert np.all(np.diff(res['betas']) < 0.0)
+        assert abs(1.0/res['betas'][-1]-opts['tmax']) < 1.e-8*opts['tmax']
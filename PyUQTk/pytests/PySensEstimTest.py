@@ -0,0 +1,116 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../sens/')
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import gsalib
+except ImportError:
+    print("PyUQTk sens.gsalib module not found")
+
+from gsafunc import func2, ndim, abr, Simath, Sijmath, SiTmath
+
+'''
+This file tests the vectorized Sobol estimators: the default estimators against the
+original per-sample loops, and the Saltelli (2010) and Jansen variants against the
+analytic indices of a polynomial with pairwise interactions
+'''
+
+def loopSi(ymod,ndim):
+    nspl   = ymod.shape[0]//(ndim+2)
+    yMat1  = ymod[:nspl]
+    yMat2  = ymod[nspl*(ndim+1):]
+    mean12 = np.mean(yMat1*yMat2)
+    vv1    = np.var(yMat1,ddof=1)
+    sobolSi = np.zeros(ndim)
+    for idim in range(1,ndim+1):
+        vari = np.sum(yMat1*ymod[idim*nspl:(idim+1)*nspl])
+        sobolSi[idim-1] = (vari/(nspl-1.0)-mean12)/vv1
+    return sobolSi
+
+def loopSiT(ymod,ndim):
+    nspl  = ymod.shape[0]//(ndim+2)
+    yMat1 = ymod[:nspl]
+    vv1   = np.var(yMat1,ddof=1)
+    Ey    = np.average(yMat1)
+    sobolSiT = np.zeros(ndim)
+    for idim in range(1,ndim+1):
+        ssqrs = 0.0
+        for i in range(nspl):
+            ssqrs = ssqrs+yMat1[i]*ymod[idim*nspl+i]
+        sobolSiT[idim-1] = 1-(ssqrs/(nspl-1.0)-Ey**2)/vv1
+    return sobolSiT
+
+nspl = 50000
+
+np.random.seed(2024)
+mat1 = abr[:,0]+np.random.random_sample((nspl,ndim))*(abr[:,1]-abr[:,0])
+mat2 = abr[:,0]+np.random.random_sample((nspl,ndim))*(abr[:,1]-abr[:,0])
+ySi  = func2(np.concatenate(list(gsalib.genBlocks(mat1,mat2,'Si'))))
+ySiT = func2(np.concatenate(list(gsalib.genBlocks(mat1,mat2,'SiT'))))
+ySij = func2(np.concatenate(list(gsalib.genBlocks(mat1,mat2,'Sij'))))
+
+# the default estimators reproduce the per-sample loops
+assert np.allclose(gsalib.genSens_Si(ySi,ndim),loopSi(ySi,ndim),rtol=1e-10,atol=1e-12)
+assert np.allclose(gsalib.genSens_SiT(ySiT,ndim),loopSiT(ySiT,ndim),rtol=1e-10,atol=1e-12)
+
+# 'type2' is an alias of 'jansen'
+assert np.allclose(gsalib.genSens_SiT(ySiT,ndim,type='type2'),gsalib.genSens_SiT(ySiT,ndim,type='jansen'))
+
+# all variants are consistent with the analytic indices
+for stype in ['saltelli2010','jansen']:
+    Si  = gsalib.genSens_Si(ySi,ndim,type=stype)
+    SiT = gsalib.genSens_SiT(ySiT,ndim,type=stype)
+    Sij = gsalib.genSens_Sij(Si,ySij,type=stype)
+    print(stype,'Si ',Si,'\n'+stype,'SiT',SiT)
+    assert np.all(np.abs(Si-Simath) < 0.03)
+    assert np.all(np.abs(SiT-SiTmath) < 0.03)
+    assert np.all(np.abs(Sij[[0,1,2],[1,2,3]]-Sijmath) < 0.03)
+
+# the custom design gives the total indices of the selected inputs
+ycust = func2(np.concatenate(list(gsalib.genBlocks(mat1,mat2,'SiTcust',collst=[1,3]))))
+assert np.allclose(gsalib.genSens_SiTcust(ycust,ndim,[1,3],type='jansen'),
+                   gsalib.genSens_SiT(ySiT,ndim,type='jansen')[[1,3]])
+
+# the centered Saltelli (2010) estimator is not affected by a large output mean
+Si = gsalib.genSens_Si(ySi,ndim,type='saltelli2010')
+assert np.allclose(gsalib.genSens_Si(ySi+1.e6,ndim,type='saltelli2010'),Si,atol=1e-6)
+
+try:
+    gsalib.genSens_Si(ySi,ndim,type='unknown')
+    raise AssertionError('unknown estimator not detected')
+except ValueError as e:
+    print(e)
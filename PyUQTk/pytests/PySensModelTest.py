@@ -0,0 +1,119 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../sens/')
+
+from multiprocessing.pool import ThreadPool
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import gsalib
+except ImportError:
+    print("PyUQTk sens.gsalib module not found")
+
+from gsafunc import func2, ndim, abr, Simath, Sijmath, SiTmath
+
+'''
+This file tests the in-memory Sobol pipeline genSens_model on a polynomial with
+pairwise interactions, whose indices are known analytically: the indices, the
+number of model runs and the batch and parallel evaluation of the design blocks
+'''
+
+class RecordingPool(object):
+    # thread pool that records the no. of chunks passed to each map call
+    def __init__(self,nproc):
+        self.pool    = ThreadPool(nproc)
+        self.nchunks = []
+    def map(self,func,args):
+        args = list(args)
+        self.nchunks.append(len(args))
+        return self.pool.map(func,args)
+
+class CountedModel(object):
+    def __init__(self):
+        self.nruns = 0
+    def __call__(self,x):
+        self.nruns = self.nruns+x.shape[0]
+        return func2(x)
+
+nspl = 2**14
+
+np.random.seed(2024)
+
+# first-order and total indices both come from a single (ndim+2)*nspl run design
+model = CountedModel()
+sens  = gsalib.genSens_model(model,nspl,ndim,abr,sampling='sobol',typeSi='saltelli2010',type='jansen',
+                             nbatch=3000)
+print('Si ',sens['Si'],'\nSiT',sens['SiT'])
+assert model.nruns == (ndim+2)*nspl
+assert np.all(np.abs(sens['Si']-Simath) < 0.03)
+assert np.all(np.abs(sens['SiT']-SiTmath) < 0.03)
+assert np.allclose(sens['SiAg'],sens['Si']) and np.allclose(sens['SiTAg'],sens['SiT'])
+
+# pairwise indices add ndim blocks, and no further runs for Si and SiT
+model = CountedModel()
+sens  = gsalib.genSens_model(model,nspl,ndim,abr,design=['Si','SiT','Sij'],sampling='sobol',
+                             typeSi='saltelli2010',type='jansen')
+print('Sij',sens['Sij'][[0,1,2],[1,2,3]])
+assert model.nruns == (2*ndim+2)*nspl
+assert np.all(np.abs(sens['Si']-Simath) < 0.03)
+assert np.all(np.abs(sens['SiT']-SiTmath) < 0.03)
+assert np.all(np.abs(sens['Sij'][[0,1,2],[1,2,3]]-Sijmath) < 0.03)
+assert np.all(np.abs(sens['Sij'][[0,0,1],[2,3,3]]) < 0.03)
+
+# batched evaluation does not change the outputs
+blocks = list(gsalib.genBlocks(np.random.random_sample((100,ndim)),np.random.random_sample((100,ndim)),'SiT'))
+assert len(blocks) == gsalib.nBlocks('SiT',ndim)
+assert np.allclose(gsalib.evalBlocks(func2,blocks,nbatch=7),func2(np.concatenate(blocks)))
+
+# with a pool, the chunks of all blocks are evaluated with a single map call
+pool = RecordingPool(4)
+assert np.allclose(gsalib.evalBlocks(func2,blocks,pool=pool,nbatch=30),func2(np.concatenate(blocks)))
+assert pool.nchunks == [4*len(blocks)]
+np.random.seed(7)
+sens = gsalib.genSens_model(func2,1000,ndim,abr,design=['Sij'],pool=pool)
+np.random.seed(7)
+sensRef = gsalib.genSens_model(func2,1000,ndim,abr,design=['Sij'])
+# by default, each block is split in eight chunks
+assert pool.nchunks[1:] == [8*gsalib.nBlocks('SiTij',ndim)]
+for key in ['Si','SiT','Sij']:
+    assert np.allclose(sens[key],sensRef[key])
+
+# outputs that do not fill all design blocks are rejected
+try:
+    gsalib.genSens_Si(func2(np.concatenate(blocks))[:-1],ndim)
+    raise AssertionError('truncated outputs not detected')
+except ValueError as e:
+    print(e)
@@ -0,0 +1,116 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../sens/')
+
+import os
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import gsalib
+except ImportError:
+    print("PyUQTk sens.gsalib module not found")
+
+'''
+This file tests the Sobol estimators on a model with a time series of outputs:
+indices per output against the scalar estimators applied to each output, column
+chunking, outputs given as arrays, .npy and text files, and the variance-weighted
+aggregate indices
+'''
+
+tgrid = np.linspace(0.0,1.0,11)
+
+def funcT(x):
+    # inputs matter more or less depending on time
+    x = np.atleast_2d(x)
+    return (x[:,0:1]*np.cos(np.pi*tgrid)+x[:,1:2]**2*tgrid
+            +x[:,2:3]*x[:,3:4]*(1.0+tgrid**2)+x[:,3:4])
+
+ndim = 4
+nspl = 2000
+nout = tgrid.shape[0]
+abr  = np.zeros((ndim,2))
+abr[:,1] = 1.0
+
+np.random.seed(2024)
+mat1 = abr[:,0]+np.random.random_sample((nspl,ndim))*(abr[:,1]-abr[:,0])
+mat2 = abr[:,0]+np.random.random_sample((nspl,ndim))*(abr[:,1]-abr[:,0])
+ySi  = funcT(np.concatenate(list(gsalib.genBlocks(mat1,mat2,'Si'))))
+ySiT = funcT(np.concatenate(list(gsalib.genBlocks(mat1,mat2,'SiT'))))
+ySij = funcT(np.concatenate(list(gsalib.genBlocks(mat1,mat2,'Sij'))))
+ycus = funcT(np.concatenate(list(gsalib.genBlocks(mat1,mat2,'SiTcust',collst=[0,2]))))
+
+for stype in ['type1','saltelli2010','jansen']:
+    Si  = gsalib.genSens_Si(ySi,ndim,type=stype)
+    SiT = gsalib.genSens_SiT(ySiT,ndim,type=stype)
+    Sij = gsalib.genSens_Sij(Si,ySij,type=stype)
+    Sic = gsalib.genSens_SiTcust(ycus,ndim,[0,2],type=stype)
+    assert Si.shape == (ndim,nout) and SiT.shape == (ndim,nout)
+    assert Sij.shape == (ndim,ndim,nout) and Sic.shape == (2,nout)
+    # same as the scalar estimators applied to each output
+    for iout in range(nout):
+        Sis = gsalib.genSens_Si(ySi[:,iout],ndim,type=stype)
+        assert np.allclose(Si[:,iout],Sis)
+        assert np.allclose(SiT[:,iout],gsalib.genSens_SiT(ySiT[:,iout],ndim,type=stype))
+        assert np.allclose(Sij[:,:,iout],gsalib.genSens_Sij(Sis,ySij[:,iout],type=stype))
+        assert np.allclose(Sic[:,iout],gsalib.genSens_SiTcust(ycus[:,iout],ndim,[0,2],type=stype))
+    # processing a few columns at a time does not change the indices
+    assert np.allclose(gsalib.genSens_Si(ySi,ndim,type=stype,ncol=3),Si)
+    assert np.allclose(gsalib.genSens_SiT(ySiT,ndim,type=stype,ncol=4),SiT)
+
+# the first input drops out at t=0.5, the second one at t=0
+Si = gsalib.genSens_Si(ySi,ndim,type='saltelli2010')
+assert np.abs(Si[0,5]) < 0.02 and np.abs(Si[1,0]) < 0.02
+assert Si[0,0] > 0.1 and Si[1,-1] > 0.1
+
+# variance-weighted aggregates
+SiT, SiTAg = gsalib.genSens_SiT(ySiT,ndim,type='jansen',aggregate=True)
+vv = np.var(ySiT[:nspl],axis=0,ddof=1)
+assert np.allclose(SiTAg,np.dot(SiT,vv)/np.sum(vv))
+
+# outputs read from .npy (memory mapped) and text files
+tmpdir = tempfile.mkdtemp()
+np.save(os.path.join(tmpdir,'ySiT.npy'),ySiT)
+np.savetxt(os.path.join(tmpdir,'ySiT.txt'),ySiT,fmt='%.18e')
+assert np.allclose(gsalib.genSens_SiT(os.path.join(tmpdir,'ySiT.npy'),ndim,type='jansen',ncol=5),SiT)
+assert np.allclose(gsalib.genSens_SiT(os.path.join(tmpdir,'ySiT.txt'),ndim,type='jansen'),SiT)
+
+# the in-memory pipeline returns indices per output and their aggregates
+sens = gsalib.genSens_model(funcT,nspl,ndim,abr,design=['Si','SiT','Sij'],typeSi='saltelli2010',type='jansen')
+print('SiTAg',sens['SiTAg'])
+assert sens['Si'].shape == (ndim,nout) and sens['SiT'].shape == (ndim,nout)
+assert sens['Sij'].shape == (ndim,ndim,nout)
+assert sens['SiAg'].shape == (ndim,) and sens['SiTAg'].shape == (ndim,)
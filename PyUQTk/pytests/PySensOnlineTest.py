@@ -0,0 +1,114 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../sens/')
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import gsalib
+except ImportError:
+    print("PyUQTk sens.gsalib module not found")
+
+from gsafunc import func2, ndim, abr, Simath, Sijmath, SiTmath
+
+'''
+This file tests the streaming Sobol accumulator: chunked updates against a single
+update on all outputs, the estimates against the batch estimators, the coverage of
+the confidence intervals and the stopping rule of genSens_online
+'''
+
+np.random.seed(2024)
+
+def sampleBlocks(nspl):
+    mat1 = abr[:,0]+np.random.random_sample((nspl,ndim))*(abr[:,1]-abr[:,0])
+    mat2 = abr[:,0]+np.random.random_sample((nspl,ndim))*(abr[:,1]-abr[:,0])
+    return func2(np.concatenate(list(gsalib.genBlocks(mat1,mat2,'SiTij')))).reshape(2*ndim+2,nspl)
+
+# chunked updates give the same estimates and intervals as a single update
+nspl = 6000
+yblk = sampleBlocks(nspl)
+acc1 = gsalib.SobolAccumulator(ndim,pairs=True)
+acc1.update(yblk)
+acc2 = gsalib.SobolAccumulator(ndim,pairs=True)
+# the outputs are centered with the mean of the first chunk, use the same shift
+acc2.shift = acc1.shift
+for i0, i1 in [(0,1000),(1000,1001),(1001,3500),(3500,nspl)]:
+    acc2.update(yblk[:,i0:i1])
+assert acc2.n == nspl
+for key in ['Si','SiT','Sij']:
+    assert np.allclose(acc1.indices()[key],acc2.indices()[key],rtol=1e-10,atol=1e-12)
+    assert np.allclose(acc1.intervals()[key][0],acc2.intervals()[key][0],rtol=1e-8,atol=1e-10)
+    assert np.allclose(acc1.intervals()[key][1],acc2.intervals()[key][1],rtol=1e-8,atol=1e-10)
+
+# outputs concatenated block by block are accepted as well
+acc3 = gsalib.SobolAccumulator(ndim,pairs=True)
+acc3.update(yblk.ravel())
+assert np.allclose(acc1.indices()['Si'],acc3.indices()['Si'])
+
+# same estimators as the batch Jansen total effects
+yA, yX, yB = yblk[0]-acc1.shift, yblk[1:ndim+1]-acc1.shift, yblk[ndim+1]-acc1.shift
+var = np.mean(0.5*(yA**2+yB**2))-np.mean(0.5*(yA+yB))**2
+assert np.allclose(acc1.indices()['SiT'],np.mean(0.5*(yA-yX)**2,axis=1)/var)
+assert np.allclose(acc1.indices()['Si'],np.mean(yB*(yX-yA),axis=1)/var)
+
+# the intervals cover the analytic indices in about 95% of the replicates
+nrep  = 40
+cover = {'clt':0, 'bootstrap':0}
+for irep in range(nrep):
+    yblk = sampleBlocks(2000)
+    for ci in cover:
+        acc = gsalib.SobolAccumulator(ndim,ci=ci,nboot=200,rnseed=irep)
+        acc.update(yblk[:ndim+2])
+        lo, hi = acc.intervals()['SiT']
+        cover[ci] = cover[ci]+np.sum((lo <= SiTmath) & (SiTmath <= hi))
+for ci in cover:
+    frac = cover[ci]/float(nrep*ndim)
+    print('Coverage of the',ci,'intervals:',frac)
+    assert frac > 0.85
+
+# the online driver stops once the intervals are narrow enough, or at the sample budget
+acc = gsalib.genSens_online(func2,ndim,abr,tol=0.05,nchunk=500)
+print('Online SiT',acc.indices()['SiT'],'after',acc.n,'samples')
+assert acc.converged(0.05) and acc.width() <= 0.05
+assert acc.n % 500 == 0
+assert np.all(np.abs(acc.indices()['SiT']-SiTmath) < 0.05)
+acc = gsalib.genSens_online(func2,ndim,abr,tol=1e-6,nchunk=300,nmax=1000,sampling='halton',seed=3)
+assert acc.n == 1000 and not acc.converged(1e-6)
+
+try:
+    gsalib.SobolAccumulator(ndim,ci='unknown')
+    raise AssertionError('unknown interval type not detected')
+except ValueError as e:
+    print(e)
@@ -0,0 +1,113 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../sens/')
+
+import os
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import gsalib
+except ImportError:
+    print("PyUQTk sens.gsalib module not found")
+
+from gsafunc import func2, ndim, abr, Simath, Sijmath, SiTmath
+
+'''
+This file tests the quasi-Monte Carlo and Latin hypercube designs for the Sobol
+sensitivity samples: bounds, stratification, reproducibility with a seed, the
+design files and the accuracy of the indices on a polynomial with pairwise
+interactions
+'''
+
+nspl = 1024
+
+np.random.seed(2024)
+
+if not gsalib.have_qmc:
+    print('scipy.stats.qmc not available, skipping the quasi-random designs')
+    sys.exit(0)
+
+for sampling in ['sobol','halton','lhs']:
+    mat1, mat2 = gsalib._genMat12(nspl,ndim,abr,sampling,seed=11)
+    assert mat1.shape == (nspl,ndim) and mat2.shape == (nspl,ndim)
+    assert np.all(mat1 >= abr[:,0]) and np.all(mat1 <= abr[:,1])
+    assert np.all(mat2 >= abr[:,0]) and np.all(mat2 <= abr[:,1])
+    # the same seed gives the same design
+    mat1b, mat2b = gsalib._genMat12(nspl,ndim,abr,sampling,seed=11)
+    assert np.array_equal(mat1,mat1b) and np.array_equal(mat2,mat2b)
+    # the two matrices are not copies of each other
+    assert not np.allclose(mat1,mat2)
+    if sampling in ['sobol','lhs']:
+        # one point per equiprobable bin in each input
+        for mat in [mat1,mat2]:
+            u    = (mat-abr[:,0])/(abr[:,1]-abr[:,0])
+            bins = np.floor(u*nspl).astype(int)
+            for idim in range(ndim):
+                assert np.array_equal(np.sort(bins[:,idim]),np.arange(nspl))
+
+# design files, in text and binary format
+tmpdir = tempfile.mkdtemp()
+splout = os.path.join(tmpdir,'gsaSplSi.dat')
+matfile = os.path.join(tmpdir,'mat12.npz')
+gsalib.genSpl_Si(nspl,ndim,abr,splout=splout,matfile=matfile,sampling='sobol',seed=5)
+xtxt = np.loadtxt(splout)
+m12  = np.load(matfile)
+assert xtxt.shape == ((ndim+2)*nspl,ndim)
+assert np.allclose(xtxt[:nspl],m12['mat1']) and np.allclose(xtxt[-nspl:],m12['mat2'])
+splout = os.path.join(tmpdir,'gsaSplSiT.npy')
+gsalib.genSpl_SiT(nspl,ndim,abr,splout=splout,matfile=matfile,sampling='sobol',seed=5,fmt='npy')
+xnpy = np.load(splout)
+assert np.array_equal(xnpy,np.concatenate(list(gsalib.genBlocks(m12['mat1'],m12['mat2'],'SiT'))))
+
+# a scrambled Sobol design is accurate with few samples, and more so than random sampling
+errs = {}
+for sampling in ['mc','sobol']:
+    errs[sampling] = 0.0
+    for irep in range(8):
+        sens = gsalib.genSens_model(func2,nspl,ndim,abr,sampling=sampling,typeSi='saltelli2010',type='jansen')
+        errs[sampling] = errs[sampling]+np.sum((sens['Si']-Simath)**2+(sens['SiT']-SiTmath)**2)
+print('Squared errors, random and Sobol designs:',errs['mc'],errs['sobol'])
+assert errs['sobol'] < errs['mc']
+sens = gsalib.genSens_model(func2,nspl,ndim,abr,sampling='sobol',typeSi='saltelli2010',type='jansen')
+assert np.all(np.abs(sens['Si']-Simath) < 0.03)
+assert np.all(np.abs(sens['SiT']-SiTmath) < 0.03)
+
+try:
+    gsalib._genMat12(nspl,ndim,abr,'unknown')
+    raise AssertionError('unknown sampling not detected')
+except ValueError as e:
+    print(e)
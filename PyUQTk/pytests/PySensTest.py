@@ -0,0 +1,87 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../sens/')
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import gsalib
+except ImportError:
+    print("PyUQTk sens.gsalib module not found")
+
+from gsafunc import func2, ndim, abr, Simath, Sijmath, SiTmath
+
+'''
+This file tests the given-data Sobol index estimators on unstructured samples of a
+polynomial with pairwise interactions, whose indices are known analytically
+'''
+
+np.random.seed(2024)
+
+# given-data estimates from unstructured samples
+xspl = abr[:,0]+np.random.random_sample((20000,ndim))*(abr[:,1]-abr[:,0])
+ymod = func2(xspl)
+Si   = gsalib.genSens_SiGiven(xspl,ymod)
+SiT  = gsalib.genSens_SiTGiven(xspl,ymod)
+print('Given-data Si ',Si,'\nGiven-data SiT',SiT)
+assert np.all(np.abs(Si-Simath) < 0.03)
+assert np.all(np.abs(SiT-SiTmath) < 0.03)
+
+# equiprobable bins
+Sib  = gsalib.genSens_SiGiven(xspl,ymod,method='bin')
+print('Binned Si',Sib)
+assert np.all(np.abs(Sib-Simath) < 0.03)
+
+# repeated samples, as in a chain with rejected steps, are dropped
+irep = np.sort(np.random.randint(0,xspl.shape[0],40000))
+assert np.allclose(gsalib.genSens_SiGiven(xspl[irep],ymod[irep]),
+                   gsalib.genSens_SiGiven(xspl[np.unique(irep)],ymod[np.unique(irep)]))
+
+# several outputs at once
+ymult = np.stack((ymod,2.0*ymod+1.0,xspl[:,2]),axis=1)
+Sim   = gsalib.genSens_SiGiven(xspl,ymult)
+SiTm  = gsalib.genSens_SiTGiven(xspl,ymult)
+assert Sim.shape == (ndim,3) and SiTm.shape == (ndim,3)
+assert np.allclose(Sim[:,0],Si) and np.allclose(SiTm[:,0],SiT)
+# affine transforms of the output leave the indices unchanged, up to end effects of
+# the consecutive-sample products
+assert np.allclose(Sim[:,1],Si,atol=1e-4) and np.allclose(SiTm[:,1],SiT)
+assert np.abs(Sim[2,2]-1.0) < 0.01 and np.all(np.abs(Sim[[0,1,3],2]) < 0.03)
+
+try:
+    gsalib.genSens_SiGiven(xspl,ymod,method='unknown')
+    raise AssertionError('unknown method not detected')
+except ValueError as e:
+    print(e)
@@ -0,0 +1,122 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../inference/')
+
+import os
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import streamstats
+    import mcmc
+except ImportError:
+    print("PyUQTk inference.streamstats or inference.mcmc module not found")
+
+'''
+This file tests the one-pass chain statistics: the statistics of chunks merged by
+StreamStats must equal the batch np.mean/np.var/np.cov of all samples, for chunks
+passed directly, read from a chain file (chain_file_stats), or passed by dram
+through its 'accum' option
+'''
+
+rs = np.random.RandomState(21)
+n, ndim = 10007, 3
+L = np.array([[1.0,0.0,0.0],[0.8,0.5,0.0],[-0.3,0.2,2.0]])
+spls = 5.0+np.dot(rs.randn(n,ndim),L.T)
+post = rs.randn(n)
+acc  = rs.rand(n)
+
+def check(st,x,p,a):
+    # merged statistics against the batch ones
+    res = st.summary()
+    assert res['n'] == x.shape[0]
+    assert np.allclose(res['mean'],np.mean(x,axis=0),rtol=1.e-12,atol=1.e-12)
+    assert np.allclose(res['cov'],np.cov(x,rowvar=False),rtol=1.e-10,atol=1.e-12)
+    assert np.allclose(res['std']**2,np.var(x,axis=0,ddof=1),rtol=1.e-10)
+    assert res['pmap'] == np.max(p) and np.array_equal(res['map'],x[np.argmax(p)])
+    assert np.isclose(res['accr'],np.mean(a))
+    # the no. of batch means stays bounded
+    assert len(st.bmeans) < 2*st.nbatch
+    return res
+
+# uneven chunks, including empty and single-sample ones
+st = streamstats.StreamStats(ndim,rnseed=1)
+bounds = np.concatenate([[0,0,1,2,3,100],np.sort(rs.randint(100,n,40)),[n]])
+for i0,i1 in zip(bounds[:-1],bounds[1:]):
+    st.update(spls[i0:i1],post=post[i0:i1],acc=acc[i0:i1])
+res = check(st,spls,post,acc)
+
+# the reservoir holds all samples while it is not full, and a subset afterwards
+st2 = streamstats.StreamStats(ndim,nreserve=20000)
+st2.update(spls[:5000]); st2.update(spls[5000:])
+assert np.allclose(st2.quantiles([0.1,0.5,0.9]),np.quantile(spls,[0.1,0.5,0.9],axis=0))
+assert np.all(np.abs(res['quantiles'][1]-np.median(spls,axis=0)) < 0.1)
+
+# batch-means effective sample size: about n for independent samples, and about
+# n(1-phi)/(1+phi) for an AR(1) chain
+assert np.all(res['ess'] > 0.4*n) and np.all(res['ess'] <= n)
+phi = 0.9
+ar = np.zeros((100000,1))
+e  = rs.randn(100000)
+for i in range(1,100000):
+    ar[i] = phi*ar[i-1]+e[i]
+st3 = streamstats.StreamStats(1)
+for i in range(0,100000,7777):
+    st3.update(ar[i:i+7777])
+ess_ar = st3.ess()[0]
+print(res['ess'],ess_ar,100000*(1-phi)/(1+phi))
+assert 0.5 < ess_ar/(100000*(1-phi)/(1+phi)) < 2.0
+
+# chain file in the postproc layout, with a trailing MAP line
+fname = os.path.join(tempfile.mkdtemp(),'chain.dat')
+rows = np.hstack([np.arange(n).reshape(-1,1),spls,acc.reshape(-1,1),post.reshape(-1,1)])
+rows = np.vstack([rows,np.hstack([[0],spls[0],[-1.0],[10.0]])])
+np.savetxt(fname,rows,header='step a b c alfa post',comments='')
+stf = streamstats.chain_file_stats(fname,ndim,n_burnin=100,stride=3,chunk_size=512)
+sel = slice(100+3-1,n,3)
+check(stf,spls[sel],post[sel],acc[sel])
+
+# dram with the 'accum' option; ofreq does not divide nsteps
+def likTpr(x,lpinfo):
+    return [-0.5*np.sum((x-lpinfo['mu'])**2/lpinfo['s2']),0.0]
+lpinfo = {'mu':np.array([1.0,-2.0]),'s2':np.array([1.0,0.25])}
+acc_dram = streamstats.StreamStats(2)
+opts = {'method':'am','nsteps':3000,'nburn':500,'nadapt':100,'nfinal':100000,
+        'inicov':0.1*np.eye(2),'coveps':1.e-8,'burnsc':5,'gamma':1.0,
+        'spllo':-10*np.ones(2),'splhi':10*np.ones(2),'ofreq':333,'accum':acc_dram}
+np.random.seed(5)
+sol = mcmc.dram(opts,np.zeros(2),likTpr,lpinfo)
+check(acc_dram,sol['chain'],sol['minfo'][:,1]+sol['minfo'][:,2],sol['minfo'][:,0])
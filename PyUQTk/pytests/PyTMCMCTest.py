@@ -0,0 +1,104 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+from __future__ import print_function # To make print() in Python 2 behave like in Python 3
+
+# include path to include PyUQTk
+import sys
+sys.path.append('../tmcmc/')
+
+import os
+import tempfile
+from multiprocessing.pool import ThreadPool
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+try:
+    import tmcmc
+except ImportError:
+    print("PyUQTk tmcmc module not found")
+
+'''
+This file runs TMCMC with the log-likelihood and log-prior evaluated in Python
+through tmcmcPyLogPost, for a 2D Gaussian likelihood under a uniform prior on
+[-5,5]^2, and checks the evidence and the posterior moments, with and without
+a pool to spread the batches
+'''
+
+ndim = 2
+nspl = 2000
+mu   = np.array([1.0,-0.5])
+sig  = np.array([0.5,0.3])
+
+ncalls = [0]
+
+def loglik(x):
+    ncalls[0] += 1
+    return -0.5*np.sum(((x-mu)/sig)**2,axis=1)-np.sum(np.log(np.sqrt(2.0*np.pi)*sig))
+
+def logprior(x):
+    return np.where(np.all(np.abs(x)<=5.0,axis=1),-ndim*np.log(10.0),-np.inf)
+
+# the normalized likelihood lies well inside the prior box
+logev_exact = -ndim*np.log(10.0)
+
+# TMCMC reads the prior samples and writes its output in the working directory
+os.chdir(tempfile.mkdtemp())
+np.savetxt('tmcmc_prior_samples.dat',np.random.RandomState(3).uniform(-5.0,5.0,(nspl,ndim)))
+
+logevs = []
+for pool in [None, ThreadPool(2)]:
+    ncalls[0] = 0
+    t = tmcmc.TMCMC()
+    t.setChainDim(ndim)
+    t.setSeed(11)
+    t.setWriteFlag(1)
+    t.initTMCMCNprocs(2)
+
+    lpost = tmcmc.tmcmcPyLogPost(loglik,logprior,pool=pool,nchunks=3)
+    t.initTMCMCLogPost(lpost)
+    t.runChain(nspl)
+
+    logev = np.loadtxt('Evidence.dat')
+    spls  = np.loadtxt('chain.dat')[:,1:ndim+1]
+    print(ncalls[0], logev, logev_exact, spls.mean(axis=0), spls.std(axis=0))
+
+    # the likelihoods were computed in Python, once per TMCMC stage (or chunk)
+    assert ncalls[0] > 1 and (pool is None or ncalls[0] % 3 == 0)
+    assert abs(logev-logev_exact) < 0.25
+    assert np.allclose(spls.mean(axis=0),mu,atol=0.05)
+    assert np.allclose(spls.std(axis=0),sig,rtol=0.15)
+
+    logevs.append(logev)
+    if pool is not None:
+        pool.close()
+
+# splitting the batches over the pool does not change the results
+assert logevs[0] == logevs[1]
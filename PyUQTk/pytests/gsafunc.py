@@ -0,0 +1,54 @@
+#=====================================================================================
+#
+#                      The UQ Toolkit (UQTk) version 3.1.5
+#                          Copyright (2024) NTESS
+#                        https://www.sandia.gov/UQToolkit/
+#                        https://github.com/sandialabs/UQTk
+#
+#     Copyright 2024 National Technology & Engineering Solutions of Sandia, LLC (NTESS).
+#     Under the terms of Contract DE-NA0003525 with NTESS, the U.S. Government
+#     retains certain rights in this software.
+#
+#     This file is part of The UQ Toolkit (UQTk)
+#
+#     UQTk is open source software: you can redistribute it and/or modify
+#     it under the terms of BSD 3-Clause License
+#
+#     UQTk is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     BSD 3 Clause License for more details.
+#
+#     You should have received a copy of the BSD 3 Clause License
+#     along with UQTk. If not, see https://choosealicense.com/licenses/bsd-3-clause/.
+#
+#     Questions? Contact the UQTk Developers at https://github.com/sandialabs/UQTk/discussions
+#     Sandia National Laboratories, Livermore, CA, USA
+#=====================================================================================
+'''
+Polynomial with pairwise interactions and its analytical Sobol indices, shared by the
+sensitivity analysis tests (see also sens/gsatest.py)
+'''
+
+try:
+    import numpy as np
+except ImportError:
+    print("Need numpy to test PyUQTk")
+
+def func2(x):
+    x = np.atleast_2d(x)
+    f = np.sum(x,axis=1)
+    for i in range(x.shape[1]-1):
+        f = f+(i+1)*(i+1)*x[:,i]*x[:,i+1]
+    return f
+
+ndim = 4
+abr  = np.zeros((ndim,2))
+abr[:,1] = 1.0; abr[0,1] = 3.0
+
+Simath  = np.array([0.14908, 0.14908, 0.41411, 0.222699])
+Sijmath = np.array([0.00552147, 0.00981595, 0.04969339])
+SiTmath = Simath.copy()
+for i in range(ndim-1):
+    SiTmath[i]   = SiTmath[i]  +Sijmath[i]
+    SiTmath[i+1] = SiTmath[i+1]+Sijmath[i]
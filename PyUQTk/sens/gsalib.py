@@ -33,12 +33,299 @@ except ImportError:
 
 import os.path
 
+try:
+    from scipy.stats import qmc
+    have_qmc = True
+except ImportError:
+    have_qmc = False
+
+def _unitSampler(ndim,sampling,seed):
+    """
+    Returns a function drawing the next n samples in [0,1]^ndim:
+      'mc'     : pseudo-random
+      'sobol'  : scrambled Sobol sequence (n should be a power of 2)
+      'halton' : scrambled Halton sequence
+      'lhs'    : Latin hypercube (each call gives an independent hypercube)
+    Without scipy, 'lhs' falls back on the UQTk C++ sampler
+    """
+    if sampling == 'mc':
+        return lambda n: npy.random.random_sample((n,ndim))
+    if seed is None:
+        # draw the seed from numpy's global generator so npy.random.seed() still
+        # makes the designs reproducible
+        seed = npy.random.randint(2**31-1)
+    if have_qmc:
+        if sampling == 'sobol':
+            return qmc.Sobol(d=ndim,scramble=True,seed=seed).random
+        elif sampling == 'halton':
+            return qmc.Halton(d=ndim,scramble=True,seed=seed).random
+        elif sampling == 'lhs':
+            return qmc.LatinHypercube(d=ndim,seed=seed).random
+    elif sampling == 'lhs':
+        import _tools as uqtktools
+        rng = npy.random.RandomState(seed)
+        return lambda n: npy.array(uqtktools.unif_lhs(n,ndim,rng.randint(2**31-1))).reshape(ndim,n).T
+    elif sampling in ['sobol','halton']:
+        raise ImportError('Scrambled Sobol and Halton sequences require scipy.stats.qmc')
+    raise ValueError('Unknown sampling method %s'%(sampling))
+
+def _unitSamples(nspl,ndim,sampling,seed):
+    """
+    nspl samples in [0,1]^ndim (see _unitSampler). Without scipy, 'halton' falls back
+    on the (unscrambled) UQTk C++ Halton sequence
+    """
+    if sampling == 'halton' and not have_qmc:
+        import _tools as uqtktools
+        # skip the first point of the sequence, at the origin
+        seq = npy.array(uqtktools.halton_seq(nspl+1,ndim)).reshape(nspl+1,ndim)
+        return seq[1:]
+    return _unitSampler(ndim,sampling,seed)(nspl)
+
+def _genMat12(nspl,ndim,abrng,sampling='mc',seed=None):
+    """
+    Two independent sets of nspl uniform samples in [a_i,b_i], i=1,ndim. For
+    quasi-random designs, both sets come from a single 2*ndim dimensional sequence.
+    """
+    abrng = npy.asarray(abrng)
+    if sampling == 'mc':
+        mat1 = npy.random.random_sample((nspl,ndim))
+        mat2 = npy.random.random_sample((nspl,ndim))
+    else:
+        mat12 = _unitSamples(nspl,2*ndim,sampling,seed)
+        mat1, mat2 = mat12[:,:ndim], mat12[:,ndim:]
+    mat1 = abrng[:,0]+mat1*(abrng[:,1]-abrng[:,0])
+    mat2 = abrng[:,0]+mat2*(abrng[:,1]-abrng[:,0])
+    return mat1, mat2
+
+def nBlocks(design,ndim,collst=None):
+    """
+    Number of [nspl,ndim] sample blocks in a design ('Si', 'SiT', 'SiTcust', 'Sij' or 'SiTij')
+    """
+    if design in ['Si','SiT']:
+        return ndim+2
+    elif design == 'SiTij':
+        return 2*ndim+2
+    elif design == 'SiTcust':
+        return 1+len(collst)
+    elif design == 'Sij':
+        return ndim*(ndim-1)//2+2
+    raise ValueError('Unknown design %s'%(design))
+
+def genBlocks(mat1,mat2,design,collst=None,verb=0):
+    """
+    Generates the sample blocks of a design one at a time, so the full design
+    (ndim+2 times larger than mat1) never needs to be held in memory:
+      'Si'      : mat1, mat2 with column i from mat1 (i=1..ndim), mat2
+      'SiT'     : mat1, mat1 with column i from mat2 (i=1..ndim), mat2
+      'SiTcust' : mat1, mat1 with column j from mat2 (j in collst)
+      'Sij'     : mat1, mat2 with columns i,j from mat1 (i<j), mat2
+      'SiTij'   : the 'SiT' blocks followed by mat2 with column i from mat1 (i=1..ndim);
+                  gives first-order, total and pairwise indices (Saltelli, 2002)
+    """
+    ndim = mat1.shape[1]
+    yield mat1
+    if design == 'Si':
+        for idim in range(ndim):
+            if verb>0:
+                print(' - working on parameter %d'%(idim))
+            matj=mat2.copy();
+            matj[:,idim]=mat1[:,idim]
+            yield matj
+    elif design in ['SiT','SiTcust','SiTij']:
+        cols = collst if design == 'SiTcust' else range(ndim)
+        for idim in cols:
+            if verb>0:
+                print(' - working on parameter %d'%(idim))
+            matj=mat1.copy();
+            matj[:,idim]=mat2[:,idim]
+            yield matj
+    elif design == 'Sij':
+        for idim in range(ndim-1):
+            for jdim in range(idim+1,ndim):
+                if verb>1:
+                    print(' - working on pair %d,%d'%(idim,jdim))
+                matj=mat2.copy();
+                matj[:,idim]=mat1[:,idim]
+                matj[:,jdim]=mat1[:,jdim]
+                yield matj
+    else:
+        raise ValueError('Unknown design %s'%(design))
+    if design != 'SiTcust':
+        yield mat2
+    if design == 'SiTij':
+        for idim in range(ndim):
+            matj=mat2.copy();
+            matj[:,idim]=mat1[:,idim]
+            yield matj
+
+def _writeBlocks(splout,blocks,nrows,ndim,nd,fmt):
+    """
+    Writes design blocks to splout, either as text with nd significant digits or,
+    for fmt='npy', in binary to a .npy file filled block by block
+    """
+    if os.path.isfile(splout):
+        os.remove(splout)
+    if fmt == 'npy':
+        spls = npy.lib.format.open_memmap(splout, mode='w+', dtype=npy.float64, shape=(nrows,ndim))
+        i0 = 0
+        for blk in blocks:
+            spls[i0:i0+blk.shape[0]] = blk
+            i0 = i0+blk.shape[0]
+        spls.flush()
+        del spls
+    elif fmt == 'txt':
+        f_handle = open(splout, 'ab')
+        for blk in blocks:
+            npy.savetxt(f_handle, blk, fmt="%."+str(nd)+"e", delimiter='  ', newline='\n')
+        f_handle.close()
+    else:
+        raise ValueError('Unknown sample file format %s'%(fmt))
+
+def _loadModEval(modeval):
+    """
+    Model evaluations given as an array, a .npy file (memory mapped) or a text file
+    """
+    if isinstance(modeval, str):
+        if modeval.endswith('.npy'):
+            return npy.load(modeval, mmap_mode='r')
+        return npy.genfromtxt(modeval)
+    return npy.asarray(modeval)
+
+def _evalChunk(args):
+    model, x = args
+    return npy.atleast_1d(npy.asarray(model(x), dtype=float))
+
+def evalBlocks(model,blocks,**kwargs):
+    """
+    Evaluates a Python model on design blocks and returns the outputs of all blocks,
+    concatenated in the order expected by the genSens_* functions.
+      model  : callable taking an array of samples [n,ndim] and returning n outputs
+      blocks : iterable of sample blocks, e.g. from genBlocks
+      pool   : optional process pool (any object with a map method); the chunks of all
+               blocks are then evaluated in parallel with a single map call, and 'model'
+               must be picklable
+      nbatch : max. no. of samples per model call (defaults to the whole block, or to an
+               eighth of it with a pool)
+    """
+    pool   = kwargs.get('pool', None)
+    nbatch = kwargs.get('nbatch', None)
+    def _chunks(blk):
+        nb = nbatch
+        if nb is None:
+            nb = blk.shape[0] if pool is None else max(1,int(npy.ceil(blk.shape[0]/8.0)))
+        return [(model, blk[i:i+nb]) for i in range(0, blk.shape[0], nb)]
+    if pool is None:
+        # blocks are generated and evaluated one at a time
+        ymod = [_evalChunk(chunk) for blk in blocks for chunk in _chunks(blk)]
+    else:
+        ymod = pool.map(_evalChunk, [chunk for blk in blocks for chunk in _chunks(blk)])
+    return npy.concatenate(list(ymod))
+
+def _blockIndices(modeval,nblk,estim,ncol):
+    """
+    Applies an estimator to the model outputs reshaped into [nblk,nspl,nc] design blocks,
+    nc output columns at a time to bound the memory used. estim returns the indices
+    [k,nc] and the output variances [nc] used to normalize them. Returns the indices,
+    the variances, the no. of samples and whether the outputs were scalar
+    """
+    ymod = _loadModEval(modeval)
+    scalar = (ymod.ndim == 1)
+    if scalar:
+        ymod = ymod[:,npy.newaxis]
+    if ymod.shape[0] % nblk != 0:
+        raise ValueError('No. of model outputs %d is not a multiple of the no. of design blocks %d'
+                         %(ymod.shape[0],nblk))
+    nspl = ymod.shape[0]//nblk
+    sens, var = [], []
+    for c0 in range(0,ymod.shape[1],ncol):
+        yblk = npy.asarray(ymod[:nblk*nspl,c0:c0+ncol],dtype=float).reshape(nblk,nspl,-1)
+        sc, vc = estim(yblk)
+        sens.append(sc)
+        var.append(vc)
+    return npy.concatenate(sens,axis=-1), npy.concatenate(var), nspl, scalar
+
+def _aggregate(sens,var):
+    """
+    Variance-weighted aggregate of indices [...,nout] over all outputs
+    """
+    return npy.dot(sens,var)/npy.sum(var)
+
+def _firstOrder(yA,yX,yB,stype):
+    """
+    First-order (or closed) indices for all blocks yX [k,nspl,nout] at once, where yX[k]
+    shares only the k-th input (group) with yA and all others with yB:
+      'type1'        : (yA.yX/(n-1)-mean(yA*yB))/var(yA)
+      'saltelli2010' : mean(yA*(yX-yB))/V
+      'jansen'       : 1-mean((yA-yX)^2)/(2V)
+    with V the variance of yA and yB pooled together. Returns the indices [k,nout] and
+    the normalizing variances [nout]
+    """
+    nspl = yA.shape[0]
+    if stype == 'type1':
+        vv = npy.var(yA,axis=0,ddof=1)
+        return (npy.einsum('kno,no->ko',yX,yA)/(nspl-1.0)-npy.mean(yA*yB,axis=0))/vv, vv
+    vv = npy.var(npy.concatenate((yA,yB)),axis=0,ddof=1)
+    if stype == 'saltelli2010':
+        # centered outputs: same expectation, much lower variance for outputs with a large mean
+        return npy.einsum('kno,no->ko',yX-yB,yA-npy.mean(yA,axis=0))/nspl/vv, vv
+    elif stype == 'jansen':
+        return 1.0-npy.mean((yX-yA)**2,axis=1)/(2.0*vv), vv
+    raise ValueError('Unknown first-order estimator %s'%(stype))
+
+def _totalOrder(yA,yX,yB,stype):
+    """
+    Total-effect indices for all blocks yX [k,nspl,nout] at once, where yX[k] differs from
+    yA only in the k-th input (yB is optional):
+      'type1'            : 1-(yA.yX/(n-1)-mean(yA)^2)/var(yA)
+      'type2', 'jansen'  : mean((yA-yX)^2)/(2var(yA))
+      'saltelli2010'     : mean(yA*(yA-yX))/V
+    with V the variance of yA and yB pooled together, if yB is given. Returns the indices
+    [k,nout] and the normalizing variances [nout]
+    """
+    nspl = yA.shape[0]
+    vv1  = npy.var(yA,axis=0,ddof=1)
+    if stype == 'type1':
+        return 1.0-(npy.einsum('kno,no->ko',yX,yA)/(nspl-1.0)-npy.average(yA,axis=0)**2)/vv1, vv1
+    elif stype in ['type2','jansen']:
+        return npy.sum((yA-yX)**2,axis=1)/nspl/(2.0*vv1), vv1
+    elif stype == 'saltelli2010':
+        vv = vv1 if yB is None else npy.var(npy.concatenate((yA,yB)),axis=0,ddof=1)
+        return npy.einsum('kno,no->ko',yA-yX,yA)/nspl/vv, vv
+    raise ValueError('Unknown total-effect estimator %s'%(stype))
+
+def _closedPairs(yA,yX,yB,yBA,sobolSi,stype):
+    """
+    Closed indices of all input pairs i<j from the 'SiTij' blocks, where yX[i] is yA with
+    input i from yB and yBA[j] is yB with input j from yA, so that yX[i] and yBA[j] share
+    exactly inputs i and j:
+      'type1'        : (yX[i].yBA[j]/(n-1)-mean(yA*yB))/var(yA)
+      'saltelli2010' : mean((yX[i]-yA)*(yBA[j]-yB))/V+Si+Sj
+      'jansen'       : 1-mean((yX[i]-yBA[j])^2)/(2V)
+    with V the variance of yA and yB pooled together. Returns the indices [npair,nout] and
+    the normalizing variances [nout]
+    """
+    nspl = yA.shape[0]
+    idim, jdim = npy.triu_indices(yX.shape[0],1)
+    if stype == 'type1':
+        vv = npy.var(yA,axis=0,ddof=1)
+        return (npy.einsum('kno,kno->ko',yX[idim],yBA[jdim])/(nspl-1.0)-npy.mean(yA*yB,axis=0))/vv, vv
+    vv = npy.var(npy.concatenate((yA,yB)),axis=0,ddof=1)
+    if stype == 'saltelli2010':
+        # the product of the two differences estimates the interaction term directly
+        return npy.einsum('kno,kno->ko',yX[idim]-yA,yBA[jdim]-yB)/nspl/vv+sobolSi[idim]+sobolSi[jdim], vv
+    elif stype == 'jansen':
+        return 1.0-npy.mean((yX[idim]-yBA[jdim])**2,axis=1)/(2.0*vv), vv
+    raise ValueError('Unknown first-order estimator %s'%(stype))
+
 def genSpl_Si(nspl,ndim,abrng,**kwargs):
     # get default values for optional arguments
     splout  = kwargs.get('splout', "gsaSplSi.dat") # samples file
     matfile = kwargs.get('matfile',"mat12.npz")    # intermediary matrices
     verb    = kwargs.get('verb', 0)                # verbosity
     nd      = kwargs.get('nd',  18)                # no. of significant digits in samples output
+    fmt     = kwargs.get('fmt', 'txt')             # samples file format, 'txt' or binary 'npy'
+    sampling= kwargs.get('sampling', 'mc')         # 'mc', 'sobol', 'halton' or 'lhs'
+    seed    = kwargs.get('seed', None)             # seed for quasi-random sequences
     # Test nd values
     if (nd<6) or (nd>18):
         raise ValueError("Number of digits should be between 6 and 18")
@@ -47,49 +334,36 @@ def genSpl_Si(nspl,ndim,abrng,**kwargs):
     #------------------------------------------------------------------------------------
     if verb>0:
         print('Create ensemble of input parameters')
-    mat1=npy.random.random_sample((nspl,ndim))
-    mat2=npy.random.random_sample((nspl,ndim))
-    for i in range(ndim):
-        mat1[:,i] = mat1[:,i]*(abrng[i,1]-abrng[i,0])+abrng[i,0]
-        mat2[:,i] = mat2[:,i]*(abrng[i,1]-abrng[i,0])+abrng[i,0]
+    mat1, mat2 = _genMat12(nspl,ndim,abrng,sampling,seed)
     # save temporary matrices
     npy.savez(matfile, mat1=mat1, mat2=mat2)
     # assemble the big matrix for main sensitivities directly to a file
-    if os.path.isfile(splout):
-        os.remove(splout)
-    f_handle = file(splout, 'a')
-    npy.savetxt(f_handle, mat1, fmt="%."+str(nd)+"e", delimiter='  ', newline='\n')
-    for idim in range(ndim):
-        if verb>0:
-            print(' - working on parameter %d'%(idim))
-        matj=mat2.copy();
-        matj[:,idim]=mat1[:,idim]
-        npy.savetxt(f_handle, matj, fmt="%."+str(nd)+"e", delimiter='  ', newline='\n')
-    npy.savetxt(f_handle, mat2, fmt="%."+str(nd)+"e", delimiter='  ', newline='\n')
-    f_handle.close()
+    _writeBlocks(splout,genBlocks(mat1,mat2,'Si',verb=verb),nspl*nBlocks('Si',ndim),ndim,nd,fmt)
 
 def genSens_Si(modeval,ndim,**kwargs):
     # get optional arguments
-    verb    = kwargs.get('verb', 0)  # verbosity
+    verb    = kwargs.get('verb', 0)        # verbosity
+    sitype  = kwargs.get('type', 'type1')  # estimator: 'type1', 'saltelli2010' or 'jansen'
+    ncol    = kwargs.get('ncol', 256)      # no. of output columns processed at once
+    aggr    = kwargs.get('aggregate', False) # also return variance-weighted aggregate indices
     #------------------------------------------------------------------------------------
-    # load model evaluations and compute main sensitivities
+    # load model evaluations and compute main sensitivities; for outputs [nrows,nout]
+    # the indices are [ndim,nout]
     #------------------------------------------------------------------------------------
-    ymod = npy.genfromtxt(modeval)
-    nspl = ymod.shape[0]/(ndim+2)
+    sobolSi, var, nspl, scalar = _blockIndices(modeval,ndim+2,
+        lambda y: _firstOrder(y[0],y[1:ndim+1],y[ndim+1],sitype),ncol)
+    sobolAg = _aggregate(sobolSi,var)
+    if scalar:
+        sobolSi = sobolSi[:,0]
     if verb > 0:
         print('Compute sensitivities, no. of samples: %d'%(nspl))
-    sobolSi = npy.zeros(ndim)
-    yMat1   = ymod[:nspl]
-    yMat2   = ymod[nspl*(ndim+1):]
-    mean12  = npy.mean(yMat1*yMat2)
-    vv1     = npy.var(yMat1,ddof=1)
-    for idim in range(1,ndim+1):
-        vari = npy.sum(yMat1*ymod[idim*nspl:(idim+1)*nspl])
-        sobolSi[idim-1] = (vari/(nspl-1.0)-mean12)/vv1
-        if verb > 1:
-            print(' - parameter %d: %e'%(idim,sobolSi[idim-1]))
+    if verb > 1:
+        for idim in range(ndim):
+            print(' - parameter %d: %e'%(idim+1,sobolAg[idim]))
     if verb > 0:
-        print(' - total first order sensitivity: %e'%(npy.sum(sobolSi)))
+        print(' - total first order sensitivity: %e'%(npy.sum(sobolAg)))
+    if aggr:
+        return sobolSi, sobolAg
     return sobolSi
 
 def genSpl_SiT(nspl,ndim,abrng,**kwargs):
@@ -98,6 +372,9 @@ def genSpl_SiT(nspl,ndim,abrng,**kwargs):
     matfile = kwargs.get('matfile', "mat12.npz")    # intermediary matrices
     verb    = kwargs.get('verb', 0)                 # verbosity
     nd      = kwargs.get('nd', 18)                  # no. of significant digits in samples output
+    fmt     = kwargs.get('fmt', 'txt')              # samples file format, 'txt' or binary 'npy'
+    sampling= kwargs.get('sampling', 'mc')          # 'mc', 'sobol', 'halton' or 'lhs'
+    seed    = kwargs.get('seed', None)              # seed for quasi-random sequences
     # Test nd values
     if (nd<6) or (nd>18):
         raise ValueError("Number of digits should be between 6 and 18")
@@ -106,57 +383,37 @@ def genSpl_SiT(nspl,ndim,abrng,**kwargs):
     #------------------------------------------------------------------------------------
     if verb>0:
         print('Create ensemble of input parameters')
-    mat1=npy.random.random_sample((nspl,ndim))
-    mat2=npy.random.random_sample((nspl,ndim))
-    for i in range(ndim):
-        mat1[:,i] = mat1[:,i]*(abrng[i,1]-abrng[i,0])+abrng[i,0]
-        mat2[:,i] = mat2[:,i]*(abrng[i,1]-abrng[i,0])+abrng[i,0]
+    mat1, mat2 = _genMat12(nspl,ndim,abrng,sampling,seed)
     # save temporary matrices
     npy.savez(matfile, mat1=mat1, mat2=mat2)
     # assemble the big matrix for main sensitivities
-    if os.path.isfile(splout):
-        os.remove(splout)
-    f_handle = file(splout, 'a')
-    npy.savetxt(f_handle, mat1, fmt="%."+str(nd)+"e", delimiter='  ', newline='\n')
-    for idim in range(ndim):
-        if verb>0:
-            print(' - working on parameter %d'%(idim))
-        matj=mat1.copy();
-        matj[:,idim]=mat2[:,idim]
-        npy.savetxt(f_handle, matj, fmt="%."+str(nd)+"e", delimiter='  ', newline='\n')
-    npy.savetxt(f_handle, mat2, fmt="%."+str(nd)+"e", delimiter='  ', newline='\n')
-    f_handle.close()
+    _writeBlocks(splout,genBlocks(mat1,mat2,'SiT',verb=verb),nspl*nBlocks('SiT',ndim),ndim,nd,fmt)
     return
 
 def genSens_SiT(modeval,ndim,**kwargs):
     # get optional arguments
     verb      = kwargs.get('verb', 0)       # verbosity
-    siTmethod = kwargs.get('type', 'type1') # sampling method
+    siTmethod = kwargs.get('type', 'type1') # estimator: 'type1', 'type2'/'jansen' or 'saltelli2010'
+    ncol      = kwargs.get('ncol', 256)     # no. of output columns processed at once
+    aggr      = kwargs.get('aggregate', False) # also return variance-weighted aggregate indices
     #------------------------------------------------------------------------------------
-    # load model evaluations and compute main sensitivities
+    # load model evaluations and compute main sensitivities; for outputs [nrows,nout]
+    # the indices are [ndim,nout]
     #------------------------------------------------------------------------------------
-    ymod = npy.genfromtxt(modeval)
-    nspl = ymod.shape[0]/(ndim+2)
+    sobolSiT, var, nspl, scalar = _blockIndices(modeval,ndim+2,
+        lambda y: _totalOrder(y[0],y[1:ndim+1],y[ndim+1],siTmethod),ncol)
+    sobolAg = _aggregate(sobolSiT,var)
+    if scalar:
+        sobolSiT = sobolSiT[:,0]
     if verb > 0:
         print('Compute sensitivities, no. of samples: %d'%(nspl))
-    sobolSiT = npy.zeros(ndim)
-    yMat1  = ymod[:nspl]
-    vv1    = npy.var(yMat1,ddof=1)
-    Ey     = npy.average(yMat1)
-    for idim in range(1,ndim+1):
-        if (siTmethod == "type1"):
-            ssqrs=0.0
-            for i in range(nspl):
-                ssqrs = ssqrs+yMat1[i]*ymod[idim*nspl+i]
-            vari = ssqrs/(nspl-1.0)
-            sobolSiT[idim-1] = 1-(vari-Ey**2)/(vv1);
-        else:
-            vari      = npy.sum(npy.power(yMat1-ymod[idim*nspl:(idim+1)*nspl],2))/nspl
-            sobolSiT[idim-1] = vari/(2.0*vv1);
-        if verb > 1:
-            print(' - parameter %d: %e'%(idim,sobolSiT[idim-1]))
+    if verb > 1:
+        for idim in range(ndim):
+            print(' - parameter %d: %e'%(idim+1,sobolAg[idim]))
     if verb > 0:
-        print(' - total main sensitivity: %e'%(npy.sum(sobolSiT)))
+        print(' - total main sensitivity: %e'%(npy.sum(sobolAg)))
+    if aggr:
+        return sobolSiT, sobolAg
     return sobolSiT
 
 def genSpl_SiTcust(nspl,ndim,abrng,collst,**kwargs):
@@ -164,6 +421,9 @@ def genSpl_SiTcust(nspl,ndim,abrng,collst,**kwargs):
     splout  = kwargs.get('splout', "gsaSplSiT.dat") # samples file
     verb    = kwargs.get('verb', 0)                 # verbosity
     nd      = kwargs.get('nd', 18)                  # no. of significant digits in samples output
+    fmt     = kwargs.get('fmt', 'txt')              # samples file format, 'txt' or binary 'npy'
+    sampling= kwargs.get('sampling', 'mc')          # 'mc', 'sobol', 'halton' or 'lhs'
+    seed    = kwargs.get('seed', None)              # seed for quasi-random sequences
     if (nd<6) or (nd>18):
         raise ValueError('Number of digits should be between 6 and 18')
     #------------------------------------------------------------------------------------
@@ -171,55 +431,35 @@ def genSpl_SiTcust(nspl,ndim,abrng,collst,**kwargs):
     #------------------------------------------------------------------------------------
     if verb>0:
         print('Create ensemble of input parameters')
-    mat1=npy.random.random_sample((nspl,ndim))
-    mat2=npy.random.random_sample((nspl,ndim))
-    for i in range(ndim):
-        mat1[:,i] = mat1[:,i]*(abrng[i,1]-abrng[i,0])+abrng[i,0]
-        mat2[:,i] = mat2[:,i]*(abrng[i,1]-abrng[i,0])+abrng[i,0]
+    mat1, mat2 = _genMat12(nspl,ndim,abrng,sampling,seed)
     # assemble the big matrix for main sensitivities
-    if os.path.isfile(splout):
-        os.remove(splout)
-    f_handle = file(splout, 'a')
-    npy.savetxt(f_handle, mat1, fmt="%."+str(nd)+"e", delimiter='  ', newline='\n')
-    for j in collst:
-        print(j)
-        matj = mat1.copy()
-        matj[:,j] = mat2[:,j].copy()
-        npy.savetxt(f_handle, matj, fmt="%."+str(nd)+"e", delimiter='  ', newline='\n')
-    f_handle.close()
+    _writeBlocks(splout,genBlocks(mat1,mat2,'SiTcust',collst=collst,verb=verb),
+                 nspl*nBlocks('SiTcust',ndim,collst),ndim,nd,fmt)
     return
 
 def genSens_SiTcust(modeval,ndim,collst,**kwargs):
     # get optional arguments
     verb      = kwargs.get('verb', 0)       # verbosity
-    siTmethod = kwargs.get('type', 'type1') # sampling method
+    siTmethod = kwargs.get('type', 'type1') # estimator: 'type1', 'type2'/'jansen' or 'saltelli2010'
+    ncol      = kwargs.get('ncol', 256)     # no. of output columns processed at once
+    aggr      = kwargs.get('aggregate', False) # also return variance-weighted aggregate indices
     #------------------------------------------------------------------------------------
     # load model evaluations and compute main sensitivities
     #------------------------------------------------------------------------------------
-    ymod = npy.genfromtxt(modeval)
-    nspl = ymod.shape[0]/(1+len(collst))
+    sobolSiT, var, nspl, scalar = _blockIndices(modeval,1+len(collst),
+        lambda y: _totalOrder(y[0],y[1:],None,siTmethod),ncol)
+    sobolAg = _aggregate(sobolSiT,var)
+    if scalar:
+        sobolSiT = sobolSiT[:,0]
     print('No. of samples %d'%(nspl))
     if verb > 0:
         print('Compute sensitivities, no. of samples: %d'%(nspl))
-    sobolSiT = npy.zeros(len(collst))
-    yMat1  = ymod[:nspl]
-    Ey     = npy.average(yMat1)
-    vv1    = npy.var(yMat1,ddof=1)
-    for j in range(len(collst)):
-        print(j,collst[j])
-        if (siTmethod == "type1"):
-            ssqrs=0.0
-            for i in range(nspl):
-                ssqrs = ssqrs+yMat1[i]*ymod[(j+1)*nspl+i]
-            vari = ssqrs/(nspl-1.0)
-            sobolSiT[j] = 1.0-(vari-Ey**2)/(vv1);
-        else:
-            vari = npy.sum(npy.power(yMat1-ymod[(j+1)*nspl:(j+2)*nspl],2))/nspl
-            sobolSiT[j] = vari/(2.0*vv1);
     if verb > 0:
         npy.set_printoptions(precision=4)
         print(' - total sensitivities: ')
-        print(sobolSiT)
+        print(sobolAg)
+    if aggr:
+        return sobolSiT, sobolAg
     return sobolSiT
 
 def genSpl_Sij(ndim,**kwargs):
@@ -228,6 +468,7 @@ def genSpl_Sij(ndim,**kwargs):
     matfile = kwargs.get('matfile', "mat12.npz")    # intermediary matrices
     verb    = kwargs.get('verb', 0)                 # verbosity
     nd      = kwargs.get('nd', 18)                  # no. of significant digits in samples output
+    fmt     = kwargs.get('fmt', 'txt')              # samples file format, 'txt' or binary 'npy'
     if verb > 0:
         print('Load intermediary matrices of input parameters')
     if os.path.isfile(matfile):
@@ -238,46 +479,355 @@ def genSpl_Sij(ndim,**kwargs):
     mat1=m12["mat1"]
     mat2=m12["mat2"]
     # assemble the big matrix for main sensitivities
-    if os.path.isfile(splout):
-        os.remove(splout)
-    f_handle = file(splout, 'a')
-    npy.savetxt(f_handle, mat1, fmt="%."+str(nd)+"e", delimiter='  ', newline='\n')
-    for idim in range(ndim-1):
-        for jdim in range(idim+1,ndim):
-            if verb>1:
-                print(' - working on pair %d,%d'%(idim,jdim))
-            matj=mat2.copy();
-            matj[:,idim]=mat1[:,idim]
-            matj[:,jdim]=mat1[:,jdim]
-            npy.savetxt(f_handle, matj, fmt="%."+str(nd)+"e", delimiter='  ', newline='\n')
-    npy.savetxt(f_handle, mat2, fmt="%."+str(nd)+"e", delimiter='  ', newline='\n')
-    f_handle.close()
+    _writeBlocks(splout,genBlocks(mat1,mat2,'Sij',verb=verb),mat1.shape[0]*nBlocks('Sij',ndim),ndim,nd,fmt)
     return
 
 def genSens_Sij(sobolSi,modeval,**kwargs):
     # get optional arguments
-    verb    = kwargs.get('verb', 0)     # verbosity
+    verb    = kwargs.get('verb', 0)        # verbosity
+    sitype  = kwargs.get('type', 'type1')  # estimator: 'type1', 'saltelli2010' or 'jansen'
+    ncol    = kwargs.get('ncol', 256)      # no. of output columns processed at once
     #------------------------------------------------------------------------------------
-    # joint sensitivities
+    # joint sensitivities; for outputs [nrows,nout], sobolSi is [ndim,nout] and the
+    # joint indices are [ndim,ndim,nout]
     #------------------------------------------------------------------------------------
-    ndim = len(sobolSi)
-    ymod = npy.genfromtxt(modeval)
-    nspl = ymod.shape[0]/(ndim*(ndim-1)/2+2)
+    sobolSi = npy.asarray(sobolSi)
+    ndim = sobolSi.shape[0]
+    npair = ndim*(ndim-1)//2
+    sobolSc, var, nspl, scalar = _blockIndices(modeval,npair+2,
+        lambda y: _firstOrder(y[0],y[1:npair+1],y[npair+1],sitype),ncol)
     if verb > 0:
         print('No. of samples, no. of dimensions: %d,%d'%(nspl,ndim))
-    sobolSij = npy.array(npy.zeros((ndim,ndim)))
-    yMat1    = ymod[:nspl]
-    yMat2    = ymod[nspl*(ndim*(ndim-1)/2+1):]
-    mean12   = npy.mean(yMat1*yMat2)
-    vv1      = npy.var(yMat1,ddof=1)
-    ijd = 0
-    for idim in range(1,ndim):
-        for jdim in range(idim+1,ndim+1):
-            ijd += 1;
-            vari = npy.sum(yMat1*ymod[ijd*nspl:(ijd+1)*nspl])
-            sobolSij[idim-1,jdim-1] = (vari/(nspl-1.0)-mean12)/vv1-sobolSi[idim-1]-sobolSi[jdim-1]
-            if verb > 1:
-                print(' - pair %d,%d: %e'%(idim,jdim,sobolSij[idim-1,jdim-1]))
+    if scalar:
+        sobolSc = sobolSc[:,0]
+    # closed indices of all pairs, minus the first-order indices
+    sobolSij = npy.zeros((ndim,ndim)+sobolSc.shape[1:])
+    idim, jdim = npy.triu_indices(ndim,1)
+    sobolSij[idim,jdim] = sobolSc-sobolSi[idim]-sobolSi[jdim]
+    if verb > 1:
+        for i,j in zip(idim,jdim):
+            print(' - pair %d,%d: %e'%(i+1,j+1,npy.mean(sobolSij[i,j])))
     if verb > 0:
-        print(' - total Sij: %e'%(npy.sum(sobolSij[:,:])))
+        print(' - total Sij: %e'%(npy.mean(npy.sum(sobolSij,axis=(0,1)))))
     return sobolSij
+
+def genSens_model(model,nspl,ndim,abrng,**kwargs):
+    """
+    In-memory Sobol sensitivity pipeline: generates the design block by block, evaluates
+    the model on it in batches and computes the indices without writing any files.
+    The model is run once on a single design: first-order and total indices both come
+    from the (ndim+2)*nspl runs of the 'SiT' design, and pairwise indices from the
+    (2*ndim+2)*nspl runs of the 'SiTij' design (Saltelli, 2002).
+      design : list of indices, among 'Si', 'SiT', 'Sij' (defaults to ['Si','SiT']);
+               'Si' and 'SiT' are always returned, 'Sij' only if requested
+      pool, nbatch : see evalBlocks
+      sampling, seed : sampling method and seed for the sample matrices (see genSpl_Si)
+      type   : estimator for 'SiT' (see genSens_SiT)
+      typeSi : estimator for 'Si' and 'Sij' (see genSens_Si)
+      ncol   : no. of output columns processed at once, for models with several outputs
+    Returns a dictionary with the indices; for models with several outputs the indices
+    are given per output, and 'SiAg'/'SiTAg' hold the variance-weighted aggregates
+    """
+    design = kwargs.get('design', ['Si','SiT'])
+    verb   = kwargs.get('verb', 0)
+    sitype = kwargs.get('typeSi','type1')
+    ncol   = kwargs.get('ncol',256)
+    for dsgn in design:
+        if dsgn not in ['Si','SiT','Sij']:
+            raise ValueError('Unknown design %s'%(dsgn))
+    dsgn = 'SiTij' if 'Sij' in design else 'SiT'
+    mat1, mat2 = _genMat12(nspl,ndim,abrng,kwargs.get('sampling','mc'),kwargs.get('seed',None))
+    if verb>0:
+        print('Evaluate model on the %s design'%(dsgn))
+    ymod = evalBlocks(model,genBlocks(mat1,mat2,dsgn),**kwargs)
+    nblk = nBlocks(dsgn,ndim)
+    sens = {}
+    # yX[i] shares input i with mat2 and all others with mat1
+    sobolSi, var, nspl, scalar = _blockIndices(ymod,nblk,
+        lambda y: _firstOrder(y[ndim+1],y[1:ndim+1],y[0],sitype),ncol)
+    sens['SiAg'] = _aggregate(sobolSi,var)
+    sobolSiT, var, nspl, scalar = _blockIndices(ymod,nblk,
+        lambda y: _totalOrder(y[0],y[1:ndim+1],y[ndim+1],kwargs.get('type','type1')),ncol)
+    sens['SiTAg'] = _aggregate(sobolSiT,var)
+    if dsgn == 'SiTij':
+        sobolSc, var, nspl, scalar = _blockIndices(ymod,nblk,
+            lambda y: _closedPairs(y[0],y[1:ndim+1],y[ndim+1],y[ndim+2:],
+                                   _firstOrder(y[ndim+1],y[1:ndim+1],y[0],sitype)[0],sitype),ncol)
+        # closed indices of all pairs, minus the first-order indices
+        idim, jdim = npy.triu_indices(ndim,1)
+        sobolSij = npy.zeros((ndim,ndim)+sobolSc.shape[1:])
+        sobolSij[idim,jdim] = sobolSc-sobolSi[idim]-sobolSi[jdim]
+        sens['Sij'] = sobolSij[...,0] if scalar else sobolSij
+    if scalar:
+        sobolSi, sobolSiT = sobolSi[:,0], sobolSiT[:,0]
+    sens['Si'], sens['SiT'] = sobolSi, sobolSiT
+    if verb > 0:
+        print('Compute sensitivities, no. of samples: %d'%(nspl))
+        print(' - total first order sensitivity: %e'%(npy.sum(sens['SiAg'])))
+    return sens
+
+def _givenData(xspl,modeval):
+    """
+    Loads unstructured input samples [nspl,ndim] and outputs [nspl] or [nspl,nout], drops
+    repeated input rows (e.g. rejected MCMC steps) and returns the inputs mapped to their
+    ranks in (0,1), the outputs as [nspl,nout], and whether the outputs were scalar
+    """
+    xspl = npy.asarray(_loadModEval(xspl),dtype=float)
+    ymod = npy.asarray(_loadModEval(modeval),dtype=float)
+    scalar = (ymod.ndim == 1)
+    if scalar:
+        ymod = ymod[:,npy.newaxis]
+    xspl, iuniq = npy.unique(xspl,axis=0,return_index=True)
+    ymod = ymod[iuniq]
+    nspl = xspl.shape[0]
+    xrnk = npy.empty_like(xspl)
+    npy.put_along_axis(xrnk,npy.argsort(xspl,axis=0),(npy.arange(nspl)[:,npy.newaxis]+0.5)/nspl,axis=0)
+    return xrnk, ymod, scalar
+
+def genSens_SiGiven(xspl,modeval,**kwargs):
+    """
+    First-order Sobol indices from existing, unstructured samples of independent inputs
+    (no Saltelli design needed).
+      xspl    : input samples [nspl,ndim] (array, .npy or text file)
+      modeval : outputs [nspl] or [nspl,nout] (array, .npy or text file)
+      method  : 'rank' (default): correlation of outputs at consecutive samples sorted along
+                each input (Gamboa et al., 2020), or 'bin': variance of the output means
+                over 'nbin' equiprobable bins of each input
+      nbin    : no. of bins (defaults to sqrt(nspl))
+    Returns the indices [ndim] or [ndim,nout]
+    """
+    method = kwargs.get('method', 'rank')
+    verb   = kwargs.get('verb', 0)
+    xrnk, ymod, scalar = _givenData(xspl,modeval)
+    nspl, ndim = xrnk.shape
+    if verb > 0:
+        print('Compute given-data sensitivities, no. of distinct samples: %d'%(nspl))
+    ymean = npy.mean(ymod,axis=0)
+    yvar  = npy.var(ymod,axis=0)
+    if method == 'rank':
+        # outputs sorted along each input, [nspl,ndim,nout]
+        ysrt = ymod[npy.argsort(xrnk,axis=0)]
+        sobolSi = (npy.mean(ysrt[:-1]*ysrt[1:],axis=0)-ymean**2)/yvar
+    elif method == 'bin':
+        nbin = kwargs.get('nbin', int(npy.sqrt(nspl)))
+        ibin = npy.minimum((xrnk*nbin).astype(int),nbin-1)
+        sobolSi = npy.zeros((ndim,ymod.shape[1]))
+        for idim in range(ndim):
+            cnt  = npy.bincount(ibin[:,idim],minlength=nbin)[:,npy.newaxis]
+            ysum = npy.zeros((nbin,ymod.shape[1]))
+            npy.add.at(ysum,ibin[:,idim],ymod)
+            keep = cnt[:,0] > 0
+            sobolSi[idim] = npy.sum((ysum[keep]/cnt[keep]-ymean)**2*cnt[keep],axis=0)/nspl/yvar
+    else:
+        raise ValueError('Unknown given-data method %s'%(method))
+    if scalar:
+        sobolSi = sobolSi[:,0]
+    return sobolSi
+
+def genSens_SiTGiven(xspl,modeval,**kwargs):
+    """
+    Total-effect Sobol indices from existing, unstructured samples of independent inputs,
+    with the nearest-neighbour estimator mean((y-y')^2)/(2var(y)), where y' is the output
+    at the sample closest to each sample in all inputs but the i-th one (inputs are
+    compared through their ranks). Neighbours are found with a k-d tree (scipy).
+      xspl    : input samples [nspl,ndim] (array, .npy or text file)
+      modeval : outputs [nspl] or [nspl,nout] (array, .npy or text file)
+    Returns the indices [ndim] or [ndim,nout]
+    """
+    from scipy.spatial import cKDTree
+    verb = kwargs.get('verb', 0)
+    xrnk, ymod, scalar = _givenData(xspl,modeval)
+    nspl, ndim = xrnk.shape
+    if verb > 0:
+        print('Compute given-data sensitivities, no. of distinct samples: %d'%(nspl))
+    yvar = npy.var(ymod,axis=0)
+    sobolSiT = npy.zeros((ndim,ymod.shape[1]))
+    for idim in range(ndim):
+        xoth = npy.delete(xrnk,idim,axis=1)
+        # the closest point is the sample itself
+        inn = cKDTree(xoth).query(xoth,k=2)[1][:,1]
+        sobolSiT[idim] = npy.mean((ymod-ymod[inn])**2,axis=0)/(2.0*yvar)
+    if scalar:
+        sobolSiT = sobolSiT[:,0]
+    return sobolSiT
+
+class SobolAccumulator(object):
+    """
+    Online estimates of first-order, total and (optionally) pairwise Sobol indices, with
+    confidence intervals updated as chunks of model outputs arrive. Each chunk holds the
+    outputs of the 'SiT' design blocks (or 'SiTij' blocks if pairs=True) for new rows of
+    the two sample matrices, so a campaign can be stopped as soon as the intervals are
+    narrow enough. Estimators: Saltelli (2010) for first-order, Jansen for total effects,
+    and Saltelli (2002) for the pairwise (joint) indices. All indices are ratios of
+    sample means of per-sample terms to the output variance, so they are accumulated
+    through running means and co-moments (merged as in Chan et al.)
+      ndim   : no. of inputs
+      pairs  : also estimate pairwise indices Sij
+      ci     : 'clt' (delta method) or 'bootstrap' (Poisson bootstrap replicates)
+      conf   : confidence level of the intervals
+      nboot  : no. of bootstrap replicates
+      rnseed : seed for the bootstrap weights
+    """
+    def __init__(self,ndim,pairs=False,ci='clt',conf=0.95,nboot=100,rnseed=None):
+        if ci not in ['clt','bootstrap']:
+            raise ValueError('Unknown confidence interval type %s'%(ci))
+        self.ndim  = ndim
+        self.pairs = pairs
+        self.ci    = ci
+        self.conf  = conf
+        self.nboot = nboot
+        self.rng   = npy.random.RandomState(rnseed)
+        self.idim, self.jdim = npy.triu_indices(ndim,1)
+        self.nidx  = 2*ndim+(self.idim.shape[0] if pairs else 0)
+        self.nblk  = nBlocks('SiTij' if pairs else 'SiT',ndim)
+        self.n     = 0
+        self.shift = None
+        # running means of [q1,q2] and of the per-sample terms t, and their co-moments
+        self.mq    = npy.zeros(2)
+        self.mt    = npy.zeros(self.nidx)
+        self.cqq   = npy.zeros((2,2))
+        self.ctq   = npy.zeros((self.nidx,2))
+        self.ctt   = npy.zeros(self.nidx)
+        # weighted sums for the bootstrap replicates
+        self.bw    = npy.zeros(nboot)
+        self.bq    = npy.zeros((nboot,2))
+        self.bt    = npy.zeros((nboot,self.nidx))
+
+    def _terms(self,yblk):
+        d  = self.ndim
+        yA = yblk[0]-self.shift
+        yX = yblk[1:d+1]-self.shift
+        yB = yblk[d+1]-self.shift
+        q  = npy.array([0.5*(yA+yB),0.5*(yA**2+yB**2)])
+        si = yB*(yX-yA)
+        t  = [si,0.5*(yA-yX)**2]
+        if self.pairs:
+            yBA = yblk[d+2:2*d+2]-self.shift
+            t.append(yX[self.idim]*yBA[self.jdim]-yA*yB-si[self.idim]-si[self.jdim])
+        return q, npy.concatenate(t,axis=0)
+
+    def update(self,ymod):
+        """
+        Adds a chunk of model outputs, either as [nblocks,nchunk] or concatenated block
+        by block as for the genSens_* functions
+        """
+        yblk = npy.asarray(ymod,dtype=float)
+        if yblk.ndim == 1:
+            yblk = yblk.reshape(self.nblk,-1)
+        nb = yblk.shape[1]
+        if nb == 0:
+            return
+        if self.shift is None:
+            # center the outputs to limit round-off in the Saltelli estimators
+            self.shift = npy.mean(yblk[0])
+        q, t = self._terms(yblk)
+        # merge means and co-moments
+        mqb = npy.mean(q,axis=1)
+        mtb = npy.mean(t,axis=1)
+        qc  = q-mqb[:,npy.newaxis]
+        tc  = t-mtb[:,npy.newaxis]
+        dq  = mqb-self.mq
+        dt  = mtb-self.mt
+        ntot = self.n+nb
+        fac  = float(self.n)*nb/ntot
+        self.cqq = self.cqq+npy.dot(qc,qc.T)+npy.outer(dq,dq)*fac
+        self.ctq = self.ctq+npy.dot(tc,qc.T)+npy.outer(dt,dq)*fac
+        self.ctt = self.ctt+npy.sum(tc**2,axis=1)+dt**2*fac
+        self.mq  = self.mq+dq*(float(nb)/ntot)
+        self.mt  = self.mt+dt*(float(nb)/ntot)
+        self.n   = ntot
+        if self.ci == 'bootstrap':
+            w = self.rng.poisson(1.0,(self.nboot,nb)).astype(float)
+            self.bw = self.bw+npy.sum(w,axis=1)
+            self.bq = self.bq+npy.dot(w,q.T)
+            self.bt = self.bt+npy.dot(w,t.T)
+
+    def _split(self,s):
+        d = self.ndim
+        res = {'Si':s[...,:d], 'SiT':s[...,d:2*d]}
+        if self.pairs:
+            sij = npy.zeros(s.shape[:-1]+(d,d))
+            sij[...,self.idim,self.jdim] = s[...,2*d:]
+            res['Sij'] = sij
+        return res
+
+    def _estimates(self):
+        var = self.mq[1]-self.mq[0]**2
+        return self.mt/var, var
+
+    def indices(self):
+        """
+        Current estimates, as a dictionary with 'Si', 'SiT' and, if pairs=True, 'Sij'
+        """
+        return self._split(self._estimates()[0])
+
+    def _bounds(self):
+        s, var = self._estimates()
+        if self.ci == 'clt':
+            from statistics import NormalDist
+            z   = NormalDist().inv_cdf(0.5*(1.0+self.conf))
+            m1  = self.mq[0]
+            vq  = self.cqq/self.n
+            vV  = vq[1,1]+4.0*m1**2*vq[0,0]-4.0*m1*vq[0,1]
+            ctV = (self.ctq[:,1]-2.0*m1*self.ctq[:,0])/self.n
+            vpsi = (self.ctt/self.n+s**2*vV-2.0*s*ctV)/var**2
+            se  = npy.sqrt(npy.maximum(vpsi,0.0)/self.n)
+            return s-z*se, s+z*se
+        mq = self.bq/self.bw[:,npy.newaxis]
+        sb = (self.bt/self.bw[:,npy.newaxis])/(mq[:,1]-mq[:,0]**2)[:,npy.newaxis]
+        alpha = 0.5*(1.0-self.conf)
+        return npy.quantile(sb,alpha,axis=0), npy.quantile(sb,1.0-alpha,axis=0)
+
+    def intervals(self):
+        """
+        Confidence intervals, as a dictionary of (lower, upper) bounds for each index type
+        """
+        lo, hi = self._bounds()
+        lo, hi = self._split(lo), self._split(hi)
+        return dict([(key,(lo[key],hi[key])) for key in lo])
+
+    def width(self):
+        """
+        Largest confidence interval width over all indices
+        """
+        lo, hi = self._bounds()
+        return npy.max(hi-lo)
+
+    def converged(self,tol):
+        """
+        True once all confidence intervals are narrower than tol
+        """
+        return self.n > 1 and self.width() <= tol
+
+def genSens_online(model,ndim,abrng,**kwargs):
+    """
+    Sobol indices of a Python model, sampled chunk by chunk until all confidence
+    intervals are narrower than a target width (or a sample budget is exhausted).
+      tol    : target confidence interval width (defaults to 0.01)
+      nchunk : no. of rows of the sample matrices per chunk (defaults to 1024)
+      nmax   : max. no. of rows of the sample matrices (defaults to 2^20)
+      pairs, ci, conf, nboot, rnseed : see SobolAccumulator
+      sampling, seed : sampling method and seed for the sample matrices (see genSpl_Si);
+               quasi-random sequences are continued from chunk to chunk
+      pool, nbatch : see evalBlocks
+    Returns the SobolAccumulator
+    """
+    tol      = kwargs.get('tol', 0.01)
+    nchunk   = kwargs.get('nchunk', 1024)
+    nmax     = kwargs.get('nmax', 2**20)
+    pairs    = kwargs.get('pairs', False)
+    verb     = kwargs.get('verb', 0)
+    acc = SobolAccumulator(ndim,pairs=pairs,ci=kwargs.get('ci','clt'),conf=kwargs.get('conf',0.95),
+                           nboot=kwargs.get('nboot',100),rnseed=kwargs.get('rnseed',None))
+    sampler = _unitSampler(2*ndim,kwargs.get('sampling','mc'),kwargs.get('seed',None))
+    abrng = npy.asarray(abrng)
+    abrng = npy.concatenate((abrng,abrng))
+    while acc.n < nmax:
+        mat12 = abrng[:,0]+sampler(min(nchunk,nmax-acc.n))*(abrng[:,1]-abrng[:,0])
+        ymod  = evalBlocks(model,genBlocks(mat12[:,:ndim],mat12[:,ndim:],'SiTij' if pairs else 'SiT'),**kwargs)
+        acc.update(ymod)
+        if verb > 0:
+            print(' - %d samples, max. confidence interval width %e'%(acc.n,acc.width()))
+        if acc.converged(tol):
+            break
+    return acc
@@ -30,6 +30,8 @@
 %feature("autodoc", "3");
 %rename(Assign) *::operator=;
 %ignore *::operator[];
+// Declared in tmcmc.h, but not implemented
+%ignore TMCMC::initDefaults;
 
 %{
 #define SWIG_FILE_WITH_INIT
@@ -60,6 +62,7 @@
 
 // %feature("director") LikelihoodBase;
 %feature("director") base;
+%feature("director") tmcmcLogPost;
 /*************************************************************
 // Standard SWIG Templates
 *************************************************************/
@@ -106,6 +109,32 @@
 // %apply (double* INPLACE_ARRAY1, int DIM1) {(double* l, int n)}
 %apply (double* IN_ARRAY1, int DIM1) {(double* x, int n)};
 
+// Director typemaps for the log-posterior callbacks; like the typemaps
+// above, these must come before the %include of the headers below
+%typemap(directorin,numinputs=1) (double *x, int n)
+{
+    npy_intp dim = $2;
+    $input = PyArray_SimpleNewFromData(1, &dim, NPY_DOUBLE, (void *)$1);
+}
+
+// Batch log-posterior: samples as a [nspl,ndim] array, and writable views of the
+// log-likelihood and log-prior output buffers
+%typemap(directorin,numinputs=1) (double *xb, int nspl, int ndim)
+{
+    npy_intp dims[2] = {$2, $3};
+    $input = PyArray_SimpleNewFromData(2, dims, NPY_DOUBLE, (void *)$1);
+}
+%typemap(directorin,numinputs=1) (double *llik, int nll)
+{
+    npy_intp dim = $2;
+    $input = PyArray_SimpleNewFromData(1, &dim, NPY_DOUBLE, (void *)$1);
+}
+%typemap(directorin,numinputs=1) (double *lprior, int nlp)
+{
+    npy_intp dim = $2;
+    $input = PyArray_SimpleNewFromData(1, &dim, NPY_DOUBLE, (void *)$1);
+}
+
 /*************************************************************
 // Include header files
 *************************************************************/
@@ -127,6 +156,7 @@
 // %include "../../cpp/lib/kle/kle.h"
 // %include "../../cpp/lib/pce/PCBasis.h"
 // %include "../../cpp/lib/pce/PCSet.h"
+%include "../../cpp/lib/mcmc/mcmc.h"
 %include "../../cpp/lib/tmcmc/tmcmc.h"
 
 // // Typemaps for standard vector
@@ -139,10 +169,49 @@
 
 // }
 
-%typemap(directorin,numinputs=1) (double *x, int n)
-{
-    npy_intp dim = $2;
-    $input = PyArray_SimpleNewFromData(1, &dim, NPY_DOUBLE, (void *)$1);
-}
+%pythoncode %{
+import numpy as _npy
+
+def _tmcmc_eval_chunk(args):
+    # evaluate one chunk of samples in a pool worker
+    f, x = args
+    return _npy.asarray(f(x), dtype=float).reshape(x.shape[0])
+
+class tmcmcPyLogPost(tmcmcLogPost):
+    """
+    In-process batch log-posterior for TMCMC built from Python callables.
+
+    loglik   - function taking a [nspl,ndim] array of samples and returning the
+               nspl log-likelihood values
+    logprior - same for the log-prior (None for a flat prior)
+    pool     - optional pool with a map method (e.g. multiprocessing.Pool); the
+               batch is split into nchunks pieces evaluated by pool.map, so the
+               functions need to be picklable
+    nchunks  - no. of pieces per batch (Defaults to the number of cpus)
+
+    Usage: t = TMCMC(); lpost = tmcmcPyLogPost(f, g, pool); t.initTMCMCLogPost(lpost)
+    """
+    def __init__(self, loglik, logprior=None, pool=None, nchunks=None):
+        tmcmcLogPost.__init__(self)
+        import os
+        self.loglik   = loglik
+        self.logprior = logprior
+        self.pool     = pool
+        self.nchunks  = nchunks if nchunks is not None else (os.cpu_count() or 1)
+
+    def _eval(self, f, xb):
+        if self.pool is None:
+            return _npy.asarray(f(xb), dtype=float).reshape(xb.shape[0])
+        chunks = _npy.array_split(xb, min(self.nchunks, xb.shape[0]))
+        return _npy.concatenate(self.pool.map(_tmcmc_eval_chunk, [(f, c) for c in chunks]))
+
+    def evalBatch(self, xb, llik, lprior):
+        xb = _npy.array(xb)
+        llik[:] = self._eval(self.loglik, xb)
+        if self.logprior is None:
+            lprior[:] = 0.0
+        else:
+            lprior[:] = self._eval(self.logprior, xb)
+%}
 
 // %include "swigi/arrayext.i"
@@ -47,6 +47,7 @@
 #include "gq.h"
 #include "rosenblatt.h"
 #include "func.h"
+#include "sampling.hpp"
 
 namespace py=pybind11;
 
@@ -123,7 +124,23 @@ PYBIND11_MODULE(_tools, m) {
   m.def("ihsU",static_cast<void (*)(Array2D<double> &, int, dsfmt_t *)>(&ihsU));
   m.def("ihsU",static_cast<void (*)(int, int, double *, int, dsfmt_t *)>(&ihsU));
   m.def("ihsP",&ihsP);
-  m.def("distCorr",&distCorr);
+  m.def("distCorr",&distCorr,py::arg("spl"),py::arg("dCor"),py::arg("nthreads")=1);
+
+  //sampling.hpp
+  // Halton sequence, nelem x ndim, row-major
+  m.def("halton_seq",[](int nelem, int ndim){
+    Sampling spl("qmc",ndim);
+    std::vector<double> seq(nelem*ndim,0.0);
+    spl.getHaltonSeq(nelem,ndim,seq);
+    return seq;
+  });
+  // Uniform Latin hypercube samples on [0,1]^ndim, stored dimension by dimension
+  m.def("unif_lhs",[](int nsample, int ndim, int zSeed){
+    Sampling spl("lhs",ndim);
+    std::vector<double> rvar(nsample*ndim,0.0);
+    spl.unifLHS(nsample,ndim,zSeed,rvar.data());
+    return rvar;
+  });
 
   //pcmaps.h
   m.def("PCtoPC",static_cast<double (*)(double, const std::string, double, double, const std::string, double, double)>(&PCtoPC));
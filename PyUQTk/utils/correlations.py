@@ -62,13 +62,87 @@ def pcorr(spl):
             corrcoef[i,j] = rxy
     return corrcoef
 ################################################################################
-def distcorr(spl):
+def _distrowsums(x):
+    """
+    Row sums a_i = sum_j |x_i-x_j| of the distance matrix of univariate samples
+    x, computed in O(n log n) from sorted prefix sums
+    """
+    n    = x.shape[0]
+    isrt = np.argsort(x)
+    xs   = x[isrt]
+    cs   = np.cumsum(xs)-xs
+    pos  = np.arange(n)
+    rs   = np.empty(n)
+    rs[isrt] = xs*pos-cs+(cs[-1]+xs[-1]-cs-xs)-xs*(n-1-pos)
+    return rs
+################################################################################
+def _dominancesums(ry, w):
+    """
+    For points given in increasing order of their first coordinate and with ranks
+    ry of their second coordinate, returns d_i = sum_{j<i, ry_j<ry_i} w_j. The
+    contributions are collected bit by bit of the ranks: at level l, j counts for i
+    if the ranks agree above bit l and bit l is 0 for j and 1 for i, which gives
+    O(n log^2 n) work in vectorized passes
+    """
+    n = ry.shape[0]
+    d = np.zeros(w.shape)
+    for l in range(max(1,int(n-1).bit_length())):
+        key = ry >> (l+1)
+        isrt = np.argsort(key,kind='stable')
+        bit  = ((ry[isrt] >> l) & 1).astype(bool)
+        ws   = np.where(bit[:,np.newaxis],0.0,w[isrt])
+        cs   = np.cumsum(ws,axis=0)-ws
+        ks   = key[isrt]
+        # subtract partial sums accumulated before the start of each group
+        start = np.r_[True,ks[1:]!=ks[:-1]]
+        cs -= cs[np.maximum.accumulate(np.where(start,np.arange(n),0))]
+        d[isrt[bit]] += cs[bit]
+    return d
+################################################################################
+def _distcovsum(x, y):
+    """
+    Sum over all pairs i,j of |x_i-x_j||y_i-y_j| for univariate samples x and y,
+    in O(n log^2 n) time and O(n) memory
+    """
+    n    = x.shape[0]
+    isrt = np.argsort(x)
+    x    = x[isrt]-np.mean(x)
+    y    = y[isrt]-np.mean(y)
+    ry   = np.empty(n,dtype=np.int64)
+    ry[np.argsort(y)] = np.arange(n)
+    # for j<i, |y_i-y_j| = s_ij (y_i-y_j) with s_ij=+1 if ry_j<ry_i, -1 otherwise
+    w  = np.column_stack((np.ones(n),y,x,x*y))
+    tw = np.cumsum(w,axis=0)-w
+    sw = 2.0*_dominancesums(ry,w)-tw
+    return 2.0*np.sum(x*y*sw[:,0]-x*sw[:,1]-y*sw[:,2]+sw[:,3])
+################################################################################
+def _distcovblocked(spl, block, pool):
+    """
+    Sums over all pairs i,j of |x_i-x_j||y_i-y_j| for all pairs of columns of spl,
+    accumulated over blocks of rows of the distance matrices
+    """
+    nspl = spl.shape[0]
+    def _block(i0):
+        dist = np.abs(spl[i0:i0+block,np.newaxis,:]-spl[np.newaxis,:,:]).reshape(-1,spl.shape[1])
+        return np.dot(dist.T,dist)
+    blocks = range(0,nspl,block)
+    parts  = pool.map(_block,blocks) if pool is not None else map(_block,blocks)
+    return sum(parts)
+################################################################################
+def distcorr(spl, method='auto', block=None, nthreads=1):
     """
     Compute distance correlation between random vectors
 
     Args:
-       spl - 2D array of samples, first dimensions is the number of samples,
-             second dimension is the number of random vectors
+       spl      - 2D array of samples, first dimensions is the number of samples,
+                  second dimension is the number of random vectors
+       method   - 'fast' sorts the samples and computes each pair in O(nspl log^2 nspl)
+                  time, 'blocked' accumulates the distance matrices over blocks of
+                  rows with O(block*nspl) memory, 'auto' picks 'blocked' for
+                  nspl<=1000 and 'fast' otherwise
+       block    - number of rows per block for the 'blocked' method (defaults to
+                  a block size with about 4M entries)
+       nthreads - number of threads over variable pairs ('fast') or row blocks ('blocked')
 
     Output:
        Returns a 2D array of distance correlations between pairs of random vectors;
@@ -76,34 +150,48 @@ def distcorr(spl):
 
     References:
        http://en.wikipedia.org/wiki/Distance_correlation
+       X. Huo and G.J. Szekely, Fast computing for distance covariance,
+       Technometrics 58(4), 2016
 
     Author:
        Cosmin Safta <csafta@sandia.gov>
     """
+    spl   = np.asarray(spl,dtype=float)
+    spl   = spl-np.mean(spl,axis=0)
     nspl  = spl.shape[0]
     nvars = spl.shape[1]
-    if (nspl>5000):
-        print('Warning ! This might be a lengthy calculation: nspl='+nspl)
-    As=[]
-    for i in range(nvars):
-        Amat = np.matrix(np.zeros((nspl,nspl)))
-        for i1 in range(nspl):
-            for j1 in range(nspl):
-                Amat[i1,j1] = abs(spl[i1,i]-spl[j1,i])
-        # compute means
-        Alin = np.array([np.mean(Amat[i1,:]) for i1 in range(nspl)])
-        Acol = np.array([np.mean(Amat[:,j1]) for j1 in range(nspl)])
-        Amn = np.mean(Amat)
-        # subtract/add means (linewise, columnwise, overall)
-        Amat = Amat - Alin.reshape(nspl,1)
-        Amat = (Amat.T - Acol.reshape(nspl,1)).T
-        Amat = Amat+Amn
-        As.append(Amat.copy())
-    dCor = np.zeros((nvars,nvars))
-    dVarX = [np.sqrt(np.sum(np.multiply(As[i],As[i]))/(nspl*nspl)) for i in range(nvars)]
+    if method == 'auto':
+        method = 'blocked' if nspl <= 1000 else 'fast'
+    pool = None
+    if nthreads > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        pool = ThreadPoolExecutor(nthreads)
+
+    # sum_ij a_ij b_ij for all pairs of variables
+    if method == 'fast':
+        pairs = [(i,j) for i in range(1,nvars) for j in range(i)]
+        func  = lambda ij: _distcovsum(spl[:,ij[0]],spl[:,ij[1]])
+        sums  = list(pool.map(func,pairs) if pool is not None else map(func,pairs))
+        abSum = np.zeros((nvars,nvars))
+        for (i,j),sij in zip(pairs,sums):
+            abSum[i,j] = sij
+        abSum[np.diag_indices(nvars)] = 2.0*nspl*np.sum(spl**2,axis=0)
+    elif method == 'blocked':
+        if block is None:
+            block = max(1,4194304//(nspl*nvars))
+        abSum = _distcovblocked(spl,block,pool)
+    else:
+        raise ValueError('distcorr: unknown method %s'%(method))
+    if pool is not None:
+        pool.shutdown()
+
+    # double centering through the row sums of the distance matrices
+    rs    = np.column_stack([_distrowsums(spl[:,i]) for i in range(nvars)])
+    rsTot = np.sum(rs,axis=0)
+    dCov2 = abSum/nspl**2-2.0*np.dot(rs.T,rs)/nspl**3+np.outer(rsTot,rsTot)/nspl**4
+    dVarX = np.sqrt(np.diag(dCov2))
+    dCor  = np.zeros((nvars,nvars))
     for i in range(1,nvars):
         for j in range(i):
-            dCov   = np.sqrt(np.sum(np.multiply(As[i],As[j]))/(nspl*nspl))
-            dCor[i,j] = dCov/np.sqrt(dVarX[i]*dVarX[j])
-    As=[]
+            dCor[i,j] = np.sqrt(max(dCov2[i,j],0.0))/np.sqrt(dVarX[i]*dVarX[j])
     return dCor
@@ -32,42 +32,106 @@ try:
 except ImportError:
     print('Numpy was not found.')
 
+def _rows(s, ndim):
+    """ Returns s as an array with ndim dimensions, memory-mapping .npy files """
+    if isinstance(s, str):
+        s = npy.load(s, mmap_mode='r')
+    elif not isinstance(s, npy.ndarray):
+        s = npy.asarray(s)
+    while s.ndim < ndim:
+        s = s[..., npy.newaxis]
+    return s
+
+def CRPSrows(s1,s2):
+    """ Computes integral of squared difference between the CDFs of each row of s1 and s2
+
+    The merged samples of each row are sorted once; the difference of the empirical
+    CDFs between consecutive merged samples is the cumulative sum of +1/Ns1 and -1/Ns2
+    steps, so all rows are scored at once in O(N log N).
+    """
+    s1 = npy.atleast_2d(npy.asarray(s1,dtype=float))
+    s2 = npy.atleast_2d(npy.asarray(s2,dtype=float))
+    Ns1 = s1.shape[1];
+    Ns2 = s2.shape[1];
+    s12 = npy.concatenate((s1,s2),axis=1)
+    isrt = npy.argsort(s12,axis=1)
+    s12  = npy.take_along_axis(s12,isrt,axis=1)
+    dF   = npy.where(isrt < Ns1, 1.0/Ns1, -1.0/Ns2)
+    dF   = npy.cumsum(dF[:,:-1],axis=1)
+    return npy.sum(npy.diff(s12,axis=1)*dF**2,axis=1)
+
 def CRPSinteg(s1,s2):
     """ Computes integral of squared difference between two CDFs """
-    Ns1 = s1.shape[0];
-    Ns2 = s2.shape[0];
-    ds1 = 1.0/Ns1;
-    ds2 = 1.0/Ns2;
-    # Combine samples and sort
-    s12=npy.sort(npy.concatenate((s1,s2)));
-    CRPS = 0.0;
-    j1 = 0;
-    j2 = 0;
-    for i in range(Ns1+Ns2-1):
-        if s12[i+1] <= s1[0]:
-            fs1 = 0.0;
-        elif s12[i] >= s1[Ns1-1]:
-            fs1 = 1.0;
-        else:
-            j1 = j1+npy.argmax(s1[j1:]>s12[i])-1
-            fs1 = (j1+1)*ds1;
-        if s12[i+1] <= s2[0]:
-            fs2 = 0.0;
-        elif s12[i] >= s2[Ns2-1]:
-            fs2 = 1.0;
-        else:
-            j2 = j2+npy.argmax(s2[j2:]>s12[i])-1
-            fs2 = (j2+1)*ds2;
-        CRPS = CRPS + (s12[i+1]-s12[i])*(fs1-fs2)**2;
-    return CRPS
+    return CRPSrows(s1,s2)[0]
+
+def CRPS(s1,s2,nchunk=None):
+    """ Computes CRPS score
 
-def CRPS(s1,s2):
-    """ Computes CRPS score """
+    s1 and s2 hold realizations (rows, e.g. locations) x members; s2 may also hold a
+    single observation per realization. Either can be a .npy file name, which is
+    memory-mapped; with nchunk set, rows are read and scored nchunk at a time.
+    """
+    s1 = _rows(s1,2)
+    s2 = _rows(s2,2)
     nsamples = s1.shape[0]
     if nsamples != s2.shape[0]:
         print('The number of realizations in s1 and s2 is not the same: %d vs %d'%(nsamples,s2.shape[0]))
         return (-1.0);
+    if nchunk is None:
+        nchunk = nsamples
     crps = npy.zeros(nsamples)
-    for i in range(nsamples):
-        crps[i] =  CRPSinteg(s1[i],s2[i])
+    for i in range(0,nsamples,nchunk):
+        crps[i:i+nchunk] = CRPSrows(s1[i:i+nchunk],s2[i:i+nchunk])
     return crps.mean()
+
+def _meanDist(x,y):
+    """ Mean Euclidean distance between the members of x and y for each row
+
+    x and y should be centered on a common reference for each row: the expansion
+    |x|^2+|y|^2-2x.y loses the digits of the distances to a large common offset.
+    """
+    d2 = npy.sum(x**2,axis=2)[:,:,npy.newaxis]+npy.sum(y**2,axis=2)[:,npy.newaxis,:] \
+         - 2.0*npy.einsum('ikl,ijl->ikj',x,y)
+    return npy.mean(npy.sqrt(npy.maximum(d2,0.0)),axis=(1,2))
+
+def energyScoreRows(s1,s2):
+    """ Computes the energy score between the multivariate ensembles of each row of s1 and s2
+
+    s1 and s2 are realizations x members x outputs arrays; the score
+    E|X-Y| - E|X-X'|/2 - E|Y-Y'|/2 reduces to CRPSrows for a single output.
+    """
+    s1 = _rows(npy.asarray(s1,dtype=float),3)
+    s2 = _rows(npy.asarray(s2,dtype=float),3)
+    # distances do not depend on a common shift of each row
+    ref = npy.mean(s1,axis=1)[:,npy.newaxis,:]
+    s1 = s1-ref
+    s2 = s2-ref
+    es = _meanDist(s1,s2)-0.5*_meanDist(s1,s1)
+    if s2.shape[1] > 1:
+        es -= 0.5*_meanDist(s2,s2)
+    return es
+
+def energyScore(s1,s2,nchunk=None):
+    """ Computes energy score
+
+    s1 and s2 hold realizations x members x outputs; s2 may also hold a single
+    observation (realizations x outputs) per realization. Either can be a .npy file
+    name, which is memory-mapped. Rows are scored nchunk at a time, by default in
+    chunks with about 4M pairwise distances.
+    """
+    s1 = _rows(s1,1)
+    s2 = _rows(s2,1)
+    if s2.ndim == s1.ndim-1:
+        s2 = s2[:,npy.newaxis]
+    s1 = _rows(s1,3)
+    s2 = _rows(s2,3)
+    nsamples = s1.shape[0]
+    if nsamples != s2.shape[0]:
+        print('The number of realizations in s1 and s2 is not the same: %d vs %d'%(nsamples,s2.shape[0]))
+        return (-1.0);
+    if nchunk is None:
+        nchunk = max(1,4194304//(s1.shape[1]*max(s1.shape[1],s2.shape[1])))
+    es = npy.zeros(nsamples)
+    for i in range(0,nsamples,nchunk):
+        es[i:i+nchunk] = energyScoreRows(s1[i:i+nchunk],s2[i:i+nchunk])
+    return es.mean()
@@ -41,8 +41,365 @@ import sys,os
 from math import *
 import itertools
 
+try:
+    from .mindex_order import getNPC
+except ImportError:
+    from mindex_order import getNPC
+
+###################################################################################################
 
-from .mindex_order import getNPC
+# Helpers for vectorized evaluation. Models taking numeric parameters accept either a
+# single parameter set or a 2D array with one parameter set per row, in which case
+# the outputs get an extra trailing batch dimension (and gradients are N x nbatch x d).
+
+def _batch(func_params):
+    """Returns parameter sets as a 2D array, and whether a batch was given."""
+    p=np.asarray(func_params,dtype=float)
+    return np.atleast_2d(p), p.ndim>1
+
+def _unbatch(ydata,gdata,batched,grad):
+    """Drops the batch dimension for a single parameter set."""
+    if not batched:
+        ydata=ydata[:,0]
+        if grad:
+            gdata=gdata[:,0,:]
+    return (ydata,gdata) if grad else ydata
+
+def _genz(xdata,model,func_params,grad=False):
+    """Genz functions, with x mapped from [-1,1] to [0,1]."""
+    dim=xdata.shape[1]
+    p,batched=_batch(func_params)
+    ww=p[:,0]
+    gcf=p[:,1:]
+    assert(gcf.shape[1]==dim)
+    xdata=0.5*(xdata+1.)
+    # Sample x batch x dim differences to the shifts, where needed
+    if model in ['genz_cont','genz_gaus','genz_ppeak']:
+        xw=xdata[:,np.newaxis,:]-ww[np.newaxis,:,np.newaxis]
+
+    gdata=None
+    if model == 'genz_osc':
+        xtmp=2.*np.pi*ww+np.dot(xdata,gcf.T)
+        ydata=np.cos(xtmp)
+        if grad:
+            gdata=-np.sin(xtmp)[:,:,np.newaxis]*gcf
+
+    elif model == 'genz_exp':
+        ydata=np.exp(np.dot(xdata,gcf.T)-np.sum(gcf,axis=1)*ww)
+        if grad:
+            gdata=ydata[:,:,np.newaxis]*gcf
+
+    elif model == 'genz_cont':
+        ydata=np.exp(-np.einsum('ijk,jk->ij',np.abs(xw),gcf))
+        if grad:
+            gdata=-ydata[:,:,np.newaxis]*gcf*np.sign(xw)
+
+    elif model == 'genz_gaus':
+        ydata=np.exp(-np.einsum('ijk,jk->ij',xw*xw,gcf*gcf))
+        if grad:
+            gdata=-2.*ydata[:,:,np.newaxis]*gcf*gcf*xw
+
+    elif model == 'genz_cpeak':
+        xtmp=1.+np.dot(xdata,gcf.T) #use abs if defined on [-1,1]
+        ydata=xtmp**(-(dim+1.))
+        if grad:
+            gdata=-(dim+1.)*(xtmp**(-(dim+2.)))[:,:,np.newaxis]*gcf
+
+    elif model == 'genz_ppeak':
+        den=1./(gcf**2.)+xw**2.
+        ydata=np.prod(1./den,axis=2)
+        if grad:
+            gdata=-2.*ydata[:,:,np.newaxis]*xw/den
+
+    # Chain rule for the map from [-1,1] to [0,1]
+    if grad:
+        gdata=0.5*gdata
+    return _unbatch(ydata,gdata,batched,grad)
+
+def _ishigami(xdata,model,func_params,grad=False):
+    assert(xdata.shape[1]==3)
+    p,batched=_batch(func_params)
+    a=p[:,0]
+    b=p[:,1]
+    s0=np.sin(xdata[:,0:1])
+    s1=np.sin(xdata[:,1:2])
+    x2=xdata[:,2:3]
+    ydata=s0+a*s1**2+b*s0*x2**4
+    gdata=None
+    if grad:
+        gdata=np.empty(ydata.shape+(3,))
+        gdata[:,:,0]=np.cos(xdata[:,0:1])*(1.+b*x2**4)
+        gdata[:,:,1]=2.*a*s1*np.cos(xdata[:,1:2])
+        gdata[:,:,2]=4.*b*s0*x2**3
+    return _unbatch(ydata,gdata,batched,grad)
+
+def _sobol(xdata,model,func_params,grad=False):
+    p,batched=_batch(func_params)
+    assert(xdata.shape[1]==p.shape[1])
+    fac=(np.abs(2*xdata)[:,np.newaxis,:]+p)/(1.+p)
+    ydata=np.prod(fac,axis=2)
+    gdata=None
+    if grad:
+        gdata=ydata[:,:,np.newaxis]*2.*np.sign(xdata)[:,np.newaxis,:]/((1.+p)*fac)
+    return _unbatch(ydata,gdata,batched,grad)
+
+def _poly_exsens(xdata,model,func_params,grad=False):
+    assert(xdata.shape[1]==func_params[0])
+    fac=( (3./4.)*(xdata+1.)**2+1. )/2.
+    ydata=np.prod(fac,axis=1)
+    if grad:
+        return ydata, ydata[:,np.newaxis]*(3./4.)*(xdata+1.)/fac
+    return ydata
+
+def _mindex_TO(dim,nord):
+    """Total-order multiindex, in the order used by the UQTk PC classes."""
+    mi=[np.zeros(dim,dtype=int)]
+    ic=np.ones(dim,dtype=int)
+    if nord > 0:
+        for idim in range(dim):
+            mi.append(np.eye(dim,dtype=int)[idim])
+    for iord in range(2,nord+1):
+        lessiord=len(mi)-1
+        for idim in range(dim):
+            ic[idim]+=np.sum(ic[idim+1:])
+        for idimm in range(dim):
+            for ii in range(lessiord-ic[idimm]+1,lessiord+1):
+                cur=mi[ii].copy()
+                cur[idimm]+=1
+                mi.append(cur)
+    return np.array(mi)
+
+def _pc_basis1d(xdata,nord,pctype,grad=False):
+    """1D basis polynomials (and derivatives) of orders 0..nord at all entries of xdata,
+    as arrays of size N x d x (nord+1). Returns None for types evaluated by pce_eval."""
+    if pctype not in ['LU','LU_N','HG','MON']:
+        return None
+    val=np.ones(xdata.shape+(nord+1,))
+    der=np.zeros(xdata.shape+(nord+1,))
+    for k in range(1,nord+1):
+        if pctype == 'MON':
+            val[...,k]=val[...,k-1]*xdata
+            der[...,k]=k*val[...,k-1]
+        elif pctype == 'HG':
+            # Probabilists' Hermite: He_k = x He_{k-1} - (k-1) He_{k-2}
+            val[...,k]=xdata*val[...,k-1]-(k-1)*(val[...,k-2] if k>1 else 0.)
+            der[...,k]=k*val[...,k-1]
+        else:
+            # Legendre: k P_k = (2k-1) x P_{k-1} - (k-1) P_{k-2}
+            val[...,k]=((2*k-1)*xdata*val[...,k-1]-(k-1)*(val[...,k-2] if k>1 else 0.))/k
+            der[...,k]=(2*k-1)*val[...,k-1]+(der[...,k-2] if k>1 else 0.)
+    if pctype == 'LU_N':
+        nrm=np.sqrt(2.*np.arange(nord+1)+1.)
+        val*=nrm
+        der*=nrm
+    return (val,der) if grad else val
+
+def _pc_eval(xdata,mindex,pccf,pctype,grad=False):
+    """Evaluates a PC expansion (and its gradient) with numpy, vectorized over samples
+    and over batches of coefficient sets (rows of a 2D pccf)."""
+    mindex=np.asarray(mindex,dtype=int).reshape(-1,xdata.shape[1])
+    p,batched=_batch(pccf)
+    assert(mindex.shape[0]==p.shape[1])
+    sam,dim=xdata.shape
+    nord=int(np.max(mindex))
+    ydata=np.empty((sam,p.shape[0]))
+    gdata=np.empty((sam,p.shape[0],dim)) if grad else None
+    # Samples are processed in chunks of about 4M entries of the N x npc x d
+    # values of the 1D polynomials entering each basis term
+    nchunk=max(1,4194304//(mindex.shape[0]*dim))
+    for i in range(0,sam,nchunk):
+        bas=_pc_basis1d(xdata[i:i+nchunk],nord,pctype,grad)
+        val=bas[0] if grad else bas
+        terms=val[:,np.arange(dim),mindex]
+        ydata[i:i+nchunk]=np.dot(np.prod(terms,axis=2),p.T)
+        if grad:
+            dterms=bas[1][:,np.arange(dim),mindex]
+            for idim in range(dim):
+                tmp=terms.copy()
+                tmp[:,:,idim]=dterms[:,:,idim]
+                gdata[i:i+nchunk,:,idim]=np.dot(np.prod(tmp,axis=2),p.T)
+    return _unbatch(ydata,gdata,batched,grad)
+
+def _pc_eval_app(xdata,pccf,pctype,mindex=None,nord=None):
+    """Evaluates a PC expansion through the pce_eval app, for PC types without a numpy implementation."""
+    np.savetxt('xdata.dat',xdata)
+    if mindex is not None:
+        np.savetxt('pccf.dat',pccf)
+        np.savetxt('mi.dat',mindex,fmt='%d')
+        cmd='pce_eval -x"PC_mi" -f"pccf.dat" -s'+pctype+' -r"mi.dat" > pceval.log'
+    else:
+        cmd='pce_eval -x"PC" -o' + str(nord) + ' -f"sppc.dat" -s'+pctype+' > pceval.log'
+    os.system(cmd)
+    return np.loadtxt('ydata.dat')
+
+def _PCmi(xdata,model,func_params,grad=False):
+    mindex=func_params[0]
+    pccf=func_params[1]
+    pctype=func_params[2]
+
+    npc=mindex.shape[0]
+    assert npc==np.asarray(pccf).shape[-1]
+
+    if pctype in ['LU','LU_N','HG','MON']:
+        return _pc_eval(xdata,mindex,pccf,pctype,grad)
+    if grad:
+        print('Gradients of PC type %s are not available. Exiting.'%(pctype))
+        sys.exit(1)
+    return _pc_eval_app(xdata,pccf,pctype,mindex=mindex)
+
+def _spp(xdata,model,func_params,grad=False):
+    ord=func_params[0]
+    sp=func_params[1]
+    pctype=func_params[2]
+
+    dim=xdata.shape[1]
+    mindex=_mindex_TO(dim,ord)
+    npc=mindex.shape[0]
+    # All coefs set to zero
+    sppc=np.zeros((npc))
+
+    # Randomly select some coefficients to be equal to 1
+    nzind=np.random.choice(npc, sp,replace=False)
+    sppc[nzind]=1.0
+    # Save the 'true' coefficients
+    np.savetxt('sppc.dat',sppc)
+
+    if pctype in ['LU','LU_N','HG','MON']:
+        return _pc_eval(xdata,mindex,sppc,pctype,grad)
+    if grad:
+        print('Gradients of PC type %s are not available. Exiting.'%(pctype))
+        sys.exit(1)
+    return _pc_eval_app(xdata,sppc,pctype,nord=ord)
+
+def _currinExp(xdata,model,func_params,grad=False):
+    # Currin, C., Mitchell, T., Morris, M., & Ylvisaker, D. (1988).
+    # A Bayesian approach to the design and analysis of computer experiments.
+    # Technical Report 6498. Oak Ridge National Laboratory.
+    # https://www.sfu.ca/~ssurjano/curretal88exp.html (March 2018)
+    xdata=0.5*(xdata+1.)
+    x0=xdata[:,0]
+    e1 = np.exp(-1/(2*xdata[:,1]))
+    f1 = 1 - e1
+    f2 = 2300*x0**3 + 1900*x0**2 + 2092*x0 + 60.0
+    f3 = 100*x0**3 + 500*x0**2 + 4*x0 + 20.0
+    ydata = f1 * f2 / f3
+    if grad:
+        gdata=np.empty(xdata.shape)
+        gdata[:,0] = f1*((6900*x0**2 + 3800*x0 + 2092)*f3 - f2*(300*x0**2 + 1000*x0 + 4))/f3**2
+        gdata[:,1] = -e1/(2*xdata[:,1]**2)*f2/f3
+        return ydata, 0.5*gdata
+    return ydata
+
+def _currinExpLF(xdata,model,func_params,grad=False):
+    # see above comment on 'currinExp', and below
+    # Xiong, S., Qian, P. Z., & Wu, C. J. (2013). Sequential design and analysis
+    # of high-accuracy and low-accuracy computer codes. Technometrics, 55(1), 37-46
+    ydata=0.
+    gdata=0.
+    for shift in [0.1,-0.1]:
+        xdataLF = xdata.copy()+shift
+        if shift < 0.:
+            xdataLF[:,1] = xdataLF[:,1]+0.2
+        for clip in [False,True]:
+            xtmp=xdataLF.copy()
+            if clip:
+                xtmp[:,1] = np.maximum(0.0,xtmp[:,1]-0.2)
+            out=_currinExp(xtmp,model,func_params,grad)
+            if grad:
+                ydata = ydata + out[0]
+                gtmp = out[1]
+                if clip:
+                    gtmp[:,1] *= (xdataLF[:,1]-0.2 > 0.0)
+                gdata = gdata + gtmp
+            else:
+                ydata = ydata + out
+    if grad:
+        return 0.25*ydata, 0.25*gdata
+    return 0.25*ydata
+
+def _park91F1(xdata,model,func_params,grad=False):
+    # Park, J.S. (1991). Tuning complex computer codes to data and optimal designs.
+    # Ph.D. Thesis, University of Illlinois, Champaign-Urbana.
+    # https://www.sfu.ca/~ssurjano/park91a.html (March 2018)
+    xdata=0.5*(xdata+1.)
+    x0,x1,x2,x3=xdata[:,0],xdata[:,1],xdata[:,2],xdata[:,3]
+    sq = np.sqrt(1.0 + (x1+x2**2)*x3/(x0**2))
+    ex = np.exp(1.0 + np.sin(x2))
+    f1 = 0.5*x0*(sq - 1.0)
+    f2 = (x0 + 3*x3) * ex
+    ydata = f1 + f2
+    if grad:
+        gdata=np.empty(xdata.shape)
+        dsq = 0.25/(x0*sq)
+        gdata[:,0] = 0.5*(sq-1.0) - 2.0*dsq*(x1+x2**2)*x3/x0 + ex
+        gdata[:,1] = dsq*x3
+        gdata[:,2] = dsq*2.0*x2*x3 + (x0 + 3*x3)*ex*np.cos(x2)
+        gdata[:,3] = dsq*(x1+x2**2) + 3.0*ex
+        return ydata, 0.5*gdata
+    return ydata
+
+def _park91F1LF(xdata,model,func_params,grad=False):
+    # see above comment on 'park91F1', and below
+    # Xiong, S., Qian, P. Z., & Wu, C. J. (2013). Sequential design and analysis
+    # of high-accuracy and low-accuracy computer codes. Technometrics, 55(1), 37-46
+    out=_park91F1(xdata,model,func_params,grad)
+    yHF=out[0] if grad else out
+    xdata=0.5*(xdata+1.)
+    f1 = (1.0+0.1*np.sin(xdata[:,0])) * yHF
+    f2 = -2*xdata[:,0] + xdata[:,1]**2 + xdata[:,2]**2
+    ydata = f1 + f2 + 0.5
+    if grad:
+        gdata = (1.0+0.1*np.sin(xdata[:,0]))[:,np.newaxis]*out[1]
+        gdata[:,0] += 0.5*(0.1*np.cos(xdata[:,0])*yHF - 2.0)
+        gdata[:,1] += xdata[:,1]
+        gdata[:,2] += xdata[:,2]
+        return ydata, gdata
+    return ydata
+
+def _park91F2(xdata,model,func_params,grad=False):
+    # Park, J.S. (1991). Tuning complex computer codes to data and optimal designs.
+    # Ph.D. Thesis, University of Illlinois, Champaign-Urbana.
+    # https://www.sfu.ca/~ssurjano/park91a.html (March 2018)
+    xdata=0.5*(xdata+1.)
+    ex = 2.0/3.0 * np.exp(xdata[:,0]+xdata[:,1])
+    ydata = ex - xdata[:,3] * np.sin(xdata[:,2]) + xdata[:,2]
+    if grad:
+        gdata=np.empty(xdata.shape)
+        gdata[:,0] = ex
+        gdata[:,1] = ex
+        gdata[:,2] = 1.0 - xdata[:,3] * np.cos(xdata[:,2])
+        gdata[:,3] = -np.sin(xdata[:,2])
+        return ydata, 0.5*gdata
+    return ydata
+
+def _park91F2LF(xdata,model,func_params,grad=False):
+    # see above comment on 'park91F2', and below
+    # Xiong, S., Qian, P. Z., & Wu, C. J. (2013). Sequential design and analysis
+    # of high-accuracy and low-accuracy computer codes. Technometrics, 55(1), 37-46
+    if grad:
+        ydata,gdata=_park91F2(xdata,model,func_params,grad)
+        return 1.2*ydata-1.0, 1.2*gdata
+    return 1.2*_park91F2(xdata,model,func_params)-1.0
+
+_models = {
+    'genz_osc'    : _genz,
+    'genz_exp'    : _genz,
+    'genz_cont'   : _genz,
+    'genz_gaus'   : _genz,
+    'genz_cpeak'  : _genz,
+    'genz_ppeak'  : _genz,
+    'ishigami'    : _ishigami,
+    'sobol'       : _sobol,
+    'poly_exsens' : _poly_exsens,
+    'PCmi'        : _PCmi,
+    'spp'         : _spp,
+    'currinExp'   : _currinExp,
+    'currinExpLF' : _currinExpLF,
+    'park91F1'    : _park91F1,
+    'park91F1LF'  : _park91F1LF,
+    'park91F2'    : _park91F2,
+    'park91F2LF'  : _park91F2LF,
+    }
 
 ###################################################################################################
 
@@ -57,242 +414,53 @@ def func(xdata,model,func_params):
                arguments in [0,1]. Need to check if that will create trouble with the other
                function types defined here. Maybe take Genz functions out and make them
                a separate functionality?
+        * All models are vectorized over the samples. Genz, 'ishigami' and 'sobol' models also
+               take a 2D array of parameter sets (one per row), and 'PCmi' a 2D array of
+               coefficient sets, and then return an N x nbatch array of outputs.
+        * 'PCmi' and 'spp' are evaluated with numpy for 'LU', 'LU_N', 'HG' and 'MON' PC types,
+               and through the pce_eval app otherwise.
     Arguments:
         * xdata       : Nxd numpy array of input, should be in [-1,1]^d
         * model       : Model name, options are 'genz_osc', 'genz_exp', 'genz_cont', 'genz_gaus',
-                        'genz_cpeak', 'genz_ppeak', 'ishigami', 'sobol', 'poly_exsens', 'PCmi', 'spp'
+                        'genz_cpeak', 'genz_ppeak', 'ishigami', 'sobol', 'poly_exsens', 'PCmi', 'spp',
+                        'currinExp', 'currinExpLF', 'park91F1', 'park91F1LF', 'park91F2', 'park91F2LF'
         * func_params : Auxiliary parameters
                       : For genz functions, an array of size d+1, the first entry being the shift,
                       : which is the same for all dimensions.
                       : and the rest of the entries are the weights.
                       : See UQTk Manual for Genz formulae.
     Returns:
-        * ydata       : An array of outputs of size N.
+        * ydata       : An array of outputs of size N (or N x nbatch).
     """
 
-    # Get the input size
-    sam=xdata.shape[0]
-    dim=xdata.shape[1]
-
-    # Check the function types and evaluate
-    if model == 'genz_osc':
-        xdata=0.5*(xdata+1.)
-        ydata=np.empty((sam,))
-        gcf=func_params[1:]
-        xtmp=np.dot(xdata,gcf)
-        for j in range(sam):
-            ydata[j]=cos(2.*pi*func_params[0]+xtmp[j])
-
-    elif model == 'genz_exp':
-        xdata=0.5*(xdata+1.)
-        ydata=np.empty((sam,))
-        ww=func_params[0]
-        gcf=func_params[1:]
-        print('The shape of ww is: ',ww.shape)
-        print('The shape of gcf is: ',gcf.shape)
-        print('The shape of x is: ',xdata.shape)
-        xtmp=np.dot(xdata-ww,gcf)
-        for j in range(sam):
-            ydata[j]=exp(xtmp[j])
-
-    elif model == 'genz_cont':
-        xdata=0.5*(xdata+1.)
-        ydata=np.empty((sam,))
-        ww=func_params[0]
-        gcf=func_params[1:]
-
-        xtmp=np.dot(abs(xdata-ww),gcf)
-        for j in range(sam):
-            ydata[j]=exp(-xtmp[j])
-
-    elif model == 'genz_gaus':
-        xdata=0.5*(xdata+1.)
-        ydata=np.empty((sam,))
-        ww=func_params[0]
-        gcf=func_params[1:]
-
-        xtmp=np.dot((xdata-ww)*(xdata-ww),gcf*gcf)
-        for j in range(sam):
-            ydata[j]=exp(-xtmp[j])
-
-    elif model == 'genz_cpeak':
-        xdata=0.5*(xdata+1.)
-        ydata=np.empty((sam,))
-        #ww=param[0]
-        gcf=func_params[1:]
-
-        xtmp=1.+(np.dot(xdata,gcf)) #use abs if defined on [-1,1]
-        for j in range(sam):
-            ydata[j]=exp(-(dim+1.)*log(xtmp[j]))
-
-    elif model == 'genz_ppeak':
-        xdata=0.5*(xdata+1.)
-        ydata=np.empty((sam,))
-        ww=func_params[0]
-        gcf=func_params[1:]
-
-        for j in range(sam):
-            prod=1.
-            for i in range(dim):
-                prod = prod / (1./(gcf[i]**2.)+(xdata[j,i]-ww)**2.)
-            ydata[j]=prod
-
-    elif model == 'ishigami':
-        assert(dim==3)
-        a=func_params[0]
-        b=func_params[1]
-        ydata=np.empty((sam,))
-
-        for j in range(sam):
-            ydata[j]=np.sin(xdata[j,0])+a*np.sin(xdata[j,1])**2+b*np.sin(xdata[j,0])*xdata[j,2]**4
-
-    elif model == 'sobol':
-        assert(dim==func_params.shape[0])
-        ydata=np.empty((sam,))
-        for j in range(sam):
-            val=1.
-            for k in range(dim):
-                val *= ( (abs(2*xdata[j,k])+func_params[k])/(1.+func_params[k]) )
-            ydata[j]=val
-
-    elif model == 'poly_exsens':
-        assert(dim==func_params[0])
-        ydata=np.empty((sam,))
-        for j in range(sam):
-            val=1.
-            for k in range(dim):
-                val *= ( (3./4.)*(xdata[j,k]+1.)**2+1. )/2.
-            ydata[j]=val
-
-    elif model == 'PCmi':
-        mindex=func_params[0]
-        pccf=func_params[1]
-        pctype=func_params[2]
-
-        npc=mindex.shape[0]
+    if model not in _models:
+        print('Function type is not recognized. Exiting.')
+        sys.exit()
 
-        #print "mindex=",mindex, pccf
+    return _models[model](np.asarray(xdata,dtype=float),model,func_params)
 
-        np.savetxt('xdata.dat',xdata)
+##################################################################################
 
-        np.savetxt('pccf.dat',pccf)
-        np.savetxt('mi.dat',mindex,fmt='%d')
-        assert npc==pccf.shape[0]
-
-
-        # Evaluate PC to get the training data
-        if pctype=='MON':
-            ydata=np.zeros((sam,))
-            for ipt in range(sam):
-                for i in range(npc):
-                    cur=pccf[i]
-                    for j in range(dim):
-                        cur*=(xdata[ipt,j]**mindex[i,j])
-                    ydata[ipt]+=cur
-        else:
-            cmd='pce_eval -x"PC_mi" -f"pccf.dat" -s'+pctype+' -r"mi.dat" > pceval.log'
-            print('Running %s'%(cmd))
-            os.system(cmd)
-            ydata=np.loadtxt('ydata.dat')
-
-    elif model == 'spp':
-
-        ord=func_params[0]
-        sp=func_params[1]
-        pctype=func_params[2]
-
-        np.savetxt('xdata.dat',xdata)
-
-        npc=getNPC(dim,ord)
-        #print "npc = ", npc
-        # All coefs set to zero
-        sppc=np.zeros((npc))
-
-        # Randomly select some coefficients to be equal to 1
-        nzind=np.random.choice(npc, sp,replace=False)
-
-        for i in nzind:
-            sppc[i]=1.0
-        # Save the 'true' coefficients
-        np.savetxt('sppc.dat',sppc)
-
-        # Evaluate PC to get the training data
-        cmd='pce_eval -x"PC" -o' + str(ord) + ' -f"sppc.dat" -s'+pctype+' > pceval.log'
-        os.system(cmd)
-        ydata=np.loadtxt('ydata.dat')
-
-    elif model == 'currinExp':
-    	# Currin, C., Mitchell, T., Morris, M., & Ylvisaker, D. (1988).
-    	# A Bayesian approach to the design and analysis of computer experiments.
-    	# Technical Report 6498. Oak Ridge National Laboratory.
-    	# https://www.sfu.ca/~ssurjano/curretal88exp.html (March 2018)
-    	xdata=0.5*(xdata+1.)
-    	f1 = 1 - np.exp(-1/(2*xdata[:,1]));
-    	f2 = 2300*xdata[:,0]**3 + 1900*xdata[:,0]**2 + 2092*xdata[:,0] + 60.0;
-    	f3 = 100*xdata[:,0]**3 + 500*xdata[:,0]**2 + 4*xdata[:,0] + 20.0;
-    	ydata = f1 * f2 / f3
-    	return(ydata)
-
-    elif model == 'currinExpLF':
-        # see above comment on 'currinExp', and below
-        # Xiong, S., Qian, P. Z., & Wu, C. J. (2013). Sequential design and analysis
-        # of high-accuracy and low-accuracy computer codes. Technometrics, 55(1), 37-46
-        xdataLF = xdata.copy()+0.1
-        y1 = func(xdataLF,'currinExp',[]);
-        for i in range(sam):
-            xdataLF[i,1] = max(0.0,xdataLF[i,1]-0.2)
-        y2 = func(xdataLF,'currinExp',[])
-        xdataLF      = xdata.copy()-0.1
-        xdataLF[:,1] = xdataLF[:,1]+0.2
-        y3 = func(xdataLF,'currinExp',[])
-        for i in range(sam):
-            xdataLF[i,1] = max(0.0,xdataLF[i,1]-0.2)
-        y4 = func(xdataLF,'currinExp',[])
-        ydata = 0.25 * (y1 + y2 + y3 + y4)
-        return ydata
-
-    elif model == 'park91F1':
-        # Park, J.S. (1991). Tuning complex computer codes to data and optimal designs.
-        # Ph.D. Thesis, University of Illlinois, Champaign-Urbana.
-        # https://www.sfu.ca/~ssurjano/park91a.html (March 2018)
-        xdata=0.5*(xdata+1.)
-        f1 = 0.5*xdata[:,0]*(np.sqrt(1.0 + (xdata[:,1]+xdata[:,2]**2)*xdata[:,3]/(xdata[:,0]**2)) - 1.0)
-        f2 = (xdata[:,0] + 3*xdata[:,3]) * np.exp(1.0 + np.sin(xdata[:,2]))
-        ydata = f1 + f2
-        return ydata
-
-    elif model == 'park91F1LF':
-        # see above comment on 'park91F1', and below
-        # Xiong, S., Qian, P. Z., & Wu, C. J. (2013). Sequential design and analysis
-        # of high-accuracy and low-accuracy computer codes. Technometrics, 55(1), 37-46
-        yHF=func(xdata,'park91F1',[])
-        xdata=0.5*(xdata+1.)
-        f1 = (1.0+0.1*np.sin(xdata[:,0])) * yHF
-        f2 = -2*xdata[:,0] + xdata[:,1]**2 + xdata[:,2]**2
-        ydata = f1 + f2 + 0.5;
-        return ydata
-
-    elif model == 'park91F2':
-        # Park, J.S. (1991). Tuning complex computer codes to data and optimal designs.
-        # Ph.D. Thesis, University of Illlinois, Champaign-Urbana.
-        # https://www.sfu.ca/~ssurjano/park91a.html (March 2018)
-        xdata=0.5*(xdata+1.)
-        ydata = 2.0/3.0 * np.exp(xdata[:,0]+xdata[:,1]) - xdata[:,3] * np.sin(xdata[:,2]) + xdata[:,2]
-        return ydata
-
-    elif model == 'park91F2LF':
-        # see above comment on 'park91F2', and below
-        # Xiong, S., Qian, P. Z., & Wu, C. J. (2013). Sequential design and analysis
-        # of high-accuracy and low-accuracy computer codes. Technometrics, 55(1), 37-46
-        ydata = 1.2*func(xdata,'park91F2',[])-1.0
-        return ydata
+def func_grad(xdata,model,func_params):
+    """Gradients of the functions evaluated by func() with respect to the inputs.
+    Note:
+        * Gradients are with respect to xdata on [-1,1]^d, i.e. they include the factor
+               of the map to [0,1] for Genz and other functions defined on [0,1].
+        * Non-smooth functions ('genz_cont', 'sobol') return a zero derivative at the kinks.
+        * 'PCmi' and 'spp' gradients are only available for 'LU', 'LU_N', 'HG' and 'MON' PC types.
+    Arguments:
+        * xdata       : Nxd numpy array of input, should be in [-1,1]^d
+        * model       : Model name, see func()
+        * func_params : Auxiliary parameters, see func()
+    Returns:
+        * gdata       : An array of gradients of size N x d (or N x nbatch x d).
+    """
 
-    else:
+    if model not in _models:
         print('Function type is not recognized. Exiting.')
         sys.exit()
 
-
-    return ydata
+    return _models[model](np.asarray(xdata,dtype=float),model,func_params,grad=True)[1]
 
 ##################################################################################
 
@@ -414,6 +582,72 @@ def mainsens_exact(model,func_params):
 ##################################################################################
 ##################################################################################
 
+# Registry of benchmark functions for surrogate and sensitivity analysis studies.
+# For each name: model name for func(), fixed dimensionality (None for any),
+# default parameters as a function of dimensionality, and input domain
+# (None for [-1,1]^d).
+benchmarks = {
+    'genz_osc'    : ('genz_osc',    None, lambda d: np.concatenate(([0.3],np.ones(d))), None),
+    'genz_exp'    : ('genz_exp',    None, lambda d: np.concatenate(([0.3],np.ones(d))), None),
+    'genz_cont'   : ('genz_cont',   None, lambda d: np.concatenate(([0.3],np.ones(d))), None),
+    'genz_gaus'   : ('genz_gaus',   None, lambda d: np.concatenate(([0.3],np.ones(d))), None),
+    'genz_cpeak'  : ('genz_cpeak',  None, lambda d: np.concatenate(([0.3],np.ones(d))), None),
+    'genz_ppeak'  : ('genz_ppeak',  None, lambda d: np.concatenate(([0.3],np.ones(d))), None),
+    'ishigami'    : ('ishigami',    3,    lambda d: np.array([7.0,0.1]), [-np.pi,np.pi]),
+    'sobol'       : ('sobol',       None, lambda d: np.array([0.,1.,4.5,9.]+[99.]*max(0,d-4))[:d], None),
+    'poly_exsens' : ('poly_exsens', None, lambda d: [d], None),
+    'currinExp'   : ('currinExp',   2,    lambda d: [], None),
+    'currinExpLF' : ('currinExpLF', 2,    lambda d: [], None),
+    'park91F1'    : ('park91F1',    4,    lambda d: [], None),
+    'park91F1LF'  : ('park91F1LF',  4,    lambda d: [], None),
+    'park91F2'    : ('park91F2',    4,    lambda d: [], None),
+    'park91F2LF'  : ('park91F2LF',  4,    lambda d: [], None),
+    }
+
+def get_benchmark(name,dim=None,func_params=None):
+    """Benchmark function from the registry, ready for surrogate and GSA studies.
+    Arguments:
+        * name        : Benchmark name, a key of the benchmarks dictionary
+        * dim         : Dimensionality, for functions defined in any dimension (defaults to 5)
+        * func_params : Auxiliary parameters, overriding the defaults of the registry
+    Returns:
+        * bench       : A dictionary with entries 'model', 'dim', 'params', 'domain' (dim x 2 array),
+                        'f' and 'grad' (functions of an Nxd array of inputs on the domain),
+                        and, where analytically available, 'integ' and 'mainsens'
+    """
+    if name not in benchmarks:
+        print('Benchmark %s is not recognized. Options are: %s'%(name,', '.join(sorted(benchmarks.keys()))))
+        sys.exit(1)
+
+    model,fixdim,params,domain=benchmarks[name]
+    if fixdim is not None:
+        assert(dim is None or dim==fixdim)
+        dim=fixdim
+    elif dim is None:
+        dim=5
+    if func_params is None:
+        func_params=params(dim)
+    # integ_exact and mainsens_exact need arrays, not lists
+    func_params=np.asarray(func_params)
+    if domain is None:
+        domain=[-1.,1.]
+
+    bench={'model'  : model,
+           'dim'    : dim,
+           'params' : func_params,
+           'domain' : np.tile(domain,(dim,1)),
+           'f'      : lambda x: func(x,model,func_params),
+           'grad'   : lambda x: func_grad(x,model,func_params)}
+    if model.startswith('genz'):
+        bench['integ']=integ_exact(model,func_params)
+    if model in ['sobol','ishigami','poly_exsens']:
+        bench['mainsens']=mainsens_exact(model,func_params)
+
+    return bench
+
+##################################################################################
+##################################################################################
+
 def main(arg):
     modelname=arg[0]
     input_file=arg[1]
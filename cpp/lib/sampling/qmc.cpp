@@ -81,7 +81,7 @@ void Sampling::getHaltonSeq ( const int nelem, const int dim, const int step,
 
   assert(nelem*dim<=seq.size());
 
-  for ( int i=0; i<nelem*dim; i++ ) seq[0]=0.0;
+  for ( int i=0; i<nelem*dim; i++ ) seq[i]=0.0;
 
   for ( int i = 0; i < dim; i++ ) {
     for ( int j = 0; j < nelem; j++ ) {
@@ -107,7 +107,7 @@ void Sampling::getHaltonSeq ( const int nelem, const int dim, const int step,
  */
 void Sampling::getHammersleySeq ( const int nelem, const int dim, double *seq ) {
 
-  for ( int i=0; i<nelem*dim; i++ ) seq[0]=0.0;
+  for ( int i=0; i<nelem*dim; i++ ) seq[i]=0.0;
 
   for ( int j = 0; j < nelem; j++ )
     seq[j*dim] = ( double ) ( j % ( nelem + 1 ) ) / ( double ) ( nelem );
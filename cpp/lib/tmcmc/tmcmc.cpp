@@ -54,6 +54,8 @@ void outProcToFile(const RealVector spls, const int ndim, const int nspl,
 void outProcToFile(const RealVector spls, const int ndim, const int nspl,
                     std::string fname);
 void shuffle_spls(RealVector &spls, RealVector &llik, RealVector &lprior);
+void evalLogPost(tmcmcLogPost *lpost, int nProcs, const RealVector &spls,
+                 int ndim, int nspl, RealVector &llik, RealVector &lprior);
 
 void readInitSamples(RealVector &spls, std::string fname);
 void parseSetup(dsfmt_t &RandomState, int nspl, int iseed);
@@ -115,7 +117,7 @@ void TMCMC::runChain(int ncalls, Array1D<double>& chstart){
   TMCMCGamma, ncalls,
   this -> getSeed(), TMCMCNprocs, this-> GetChainDim(),
   TMCMCCv, TMCMCMFactor,
-  TMCMCBasis, TMCMCCATSteps, this -> getWriteFlag());
+  TMCMCBasis, TMCMCCATSteps, this -> getWriteFlag(), TMCMCLogPost);
 
   // clean up
   std::ifstream moveFile("tmcmc_moveIntermediateFiles.sh");
@@ -207,6 +209,10 @@ void TMCMC::initTMCMCCATSteps(int tmcmc_CATSteps){
   return;
 }
 
+void TMCMC::initTMCMCLogPost(tmcmcLogPost *tmcmc_logpost){
+  TMCMCLogPost = tmcmc_logpost;
+}
+
 int TMCMC::getTMCMCNprocs(){
   return TMCMCNprocs;
 }
@@ -234,7 +240,8 @@ int TMCMC::getTMCMCCATSteps(){
 double tmcmc(RealVector &spls, RealVector &lprior, RealVector &llik,
           double gm, int nspl,
           int iseed, int nProcs, int ndim, double cv,
-          int MFactor, bool basis, int CATSteps, int write_flag) {
+          int MFactor, bool basis, int CATSteps, int write_flag,
+          tmcmcLogPost *lpost) {
   /* TMCMC Algorithm
       Input: spls - On return, contains samples according to posterior
              gm - initial gamma value
@@ -244,6 +251,8 @@ double tmcmc(RealVector &spls, RealVector &lprior, RealVector &llik,
              ndim - dimensionality
              cv - Coefficient of Variance threshold for adapting Beta
              MFactor - Multiplicative factor for chain length to encourage mixing.
+             lpost - in-process batch log-posterior; if NULL, the likelihoods and
+                     priors are computed by tmcmc_getLL.sh and tmcmc_getLP.sh
       Output: evid - asymptotically unbiased model evidence estimator
   */
 
@@ -286,41 +295,8 @@ double tmcmc(RealVector &spls, RealVector &lprior, RealVector &llik,
   }
 
 
-  /* Compute initial likelihoods using outside model*/
-  outProcToFile(spls, ndim, nspl, nProcs); // Make mcmcstates
-  std::string ll_stream="./tmcmc_getLL.sh "+std::to_string(nProcs);
-  system(ll_stream.c_str());
-  std::ifstream input_file("tmcmc_ll.dat");
-
-  llik.resize(nspl);
-  double check;
-  std::string line;
-  for (int j = 0; j < nspl; j++ ) {
-    std::getline(input_file, line);
-    check = std::atof(line.c_str());
-    if (check == 0 || check < -pow(10, 300)) {
-      llik[j] = -pow(10, 300);
-    } else {
-      llik[j] = check;
-    }
-  }
-
-
-  /* Compute initial log priors, if applicable */
-  std::string lp_stream = "./tmcmc_getLP.sh "+std::to_string(nProcs);
-  system(lp_stream.c_str());
-  std::ifstream lp_input("tmcmc_lp.dat");
-
-  lprior.resize(nspl);
-  for (int j = 0; j < nspl; j++ ) {
-    std::getline(lp_input, line);
-    check = std::atof(line.c_str());
-    if (check == 0.0 || check < -pow(10, 300)) {
-      lprior[j] = -pow(10, 300);
-    } else {
-      lprior[j] = check;
-    }
-  }
+  /* Compute initial likelihoods and log priors */
+  evalLogPost(lpost, nProcs, spls, ndim, nspl, llik, lprior);
 
 
   /* Output first set of samples to file*/
@@ -519,39 +495,8 @@ double tmcmc(RealVector &spls, RealVector &lprior, RealVector &llik,
         compCount++;
       }
 
-      outProcToFile(splsComp,ndim,compCount,nProcs);
-      std::string ll_stream="./tmcmc_getLL.sh "+ std::to_string(nProcs);
-      system(ll_stream.c_str());
-      std::ifstream input_file("tmcmc_ll.dat");
-
-      /* Collect loglikelihood for proposals as applicable */
-      RealVector llikComp(compCount);
-      for (int j = 0; j < compCount; j++ ) {
-        std::getline(input_file, line);
-        check = std::atof(line.c_str());
-        if (check == 0.0 || check < -pow(10, 300)) {
-          llikComp[j] = -pow(10, 300);
-        } else {
-          llikComp[j] = check;
-        }
-      }
-
-      std::string lp_stream = "./tmcmc_getLP.sh "+std::to_string(nProcs);
-      system(lp_stream.c_str());
-      std::ifstream lp_input("tmcmc_lp.dat");
-
-      /* Collect logprior for proposals as applicable */
-      RealVector lpriorComp(compCount);
-      for (int j = 0; j < compCount; j++ ) {
-        std::getline(lp_input, line);
-        check = std::atof(line.c_str());
-        // input_file >> check2;
-        if (check == 0.0 || check < -pow(10, 300)) {
-          lpriorComp[j] = -pow(10, 300);
-        } else {
-          lpriorComp[j] = check;
-        }
-      }
+      RealVector llikComp, lpriorComp;
+      evalLogPost(lpost, nProcs, splsComp, ndim, compCount, llikComp, lpriorComp);
 
       /* decide who jumps */
       int icomp=0;
@@ -676,6 +621,83 @@ double tmcmc(RealVector &spls, RealVector &lprior, RealVector &llik,
   return (evid);
 } /* done tmcmc */
 
+void evalLogPost(tmcmcLogPost *lpost, int nProcs, const RealVector &spls,
+                 int ndim, int nspl, RealVector &llik, RealVector &lprior) {
+  // Log-likelihoods and log-priors of nspl samples, either in-process through
+  // lpost or through the external scripts and the mcmcstates_* files
+
+  llik.resize(nspl);
+  lprior.resize(nspl);
+
+  if (lpost == NULL) {
+    outProcToFile(spls, ndim, nspl, nProcs); // Make mcmcstates
+    std::string ll_stream="./tmcmc_getLL.sh "+std::to_string(nProcs);
+    system(ll_stream.c_str());
+    std::ifstream input_file("tmcmc_ll.dat");
+
+    double check;
+    std::string line;
+    for (int j = 0; j < nspl; j++ ) {
+      std::getline(input_file, line);
+      check = std::atof(line.c_str());
+      if (check == 0 || check < -pow(10, 300)) {
+        llik[j] = -pow(10, 300);
+      } else {
+        llik[j] = check;
+      }
+    }
+
+    std::string lp_stream = "./tmcmc_getLP.sh "+std::to_string(nProcs);
+    system(lp_stream.c_str());
+    std::ifstream lp_input("tmcmc_lp.dat");
+
+    for (int j = 0; j < nspl; j++ ) {
+      std::getline(lp_input, line);
+      check = std::atof(line.c_str());
+      if (check == 0.0 || check < -pow(10, 300)) {
+        lprior[j] = -pow(10, 300);
+      } else {
+        lprior[j] = check;
+      }
+    }
+    return ;
+  }
+
+  double *xb = const_cast<double *>(spls.data());
+  int nthr = lpost->threadSafe ? std::min(std::max(nProcs,1),nspl) : 1;
+  if (nthr <= 1) {
+    lpost->evalBatch(xb, nspl, ndim, llik.data(), nspl, lprior.data(), nspl);
+  }
+  else {
+    /* contiguous blocks of samples, one per thread */
+    int nsplP = nspl/nthr;
+    int nAdd  = nspl-nsplP*nthr;
+    std::vector<std::thread> workers;
+    int isplEn = 0;
+    for (int ithr = 0; ithr < nthr; ithr++) {
+      int isplSt = isplEn;
+      int nsplT  = nsplP+((ithr < nAdd) ? 1 : 0);
+      isplEn += nsplT;
+      workers.push_back(std::thread(&tmcmcLogPost::evalBatch, lpost,
+                        xb+isplSt*ndim, nsplT, ndim, llik.data()+isplSt, nsplT,
+                        lprior.data()+isplSt, nsplT));
+    }
+    for (size_t ithr = 0; ithr < workers.size(); ithr++)
+      workers[ithr].join();
+  }
+
+  /* failed evaluations are assigned a vanishing posterior */
+  for (int j = 0; j < nspl; j++ ) {
+    if (std::isnan(llik[j]) || llik[j] < -pow(10, 300))
+      llik[j] = -pow(10, 300);
+    if (std::isnan(lprior[j]) || lprior[j] < -pow(10, 300))
+      lprior[j] = -pow(10, 300);
+  }
+
+  return ;
+
+}
+
 void outProcToFile(const RealVector spls, const int ndim,
                     const int nspl, int nprocs) {
   // Separate spls vector into nproc pieces, into mcmcstates files
@@ -52,6 +52,32 @@
 #include <numeric>
 #include <functional>
 #include <string>
+#include <thread>
+
+//*****************************************
+/// \class tmcmcLogPost
+/// \brief Base class for in-process evaluation of the log-likelihood and
+///        log-prior of a batch of TMCMC samples. Derive from it (in C++, or in
+///        Python through the SWIG director) and pass it to
+///        TMCMC::initTMCMCLogPost() to bypass the tmcmc_getLL.sh/tmcmc_getLP.sh
+///        scripts and the intermediate files
+class tmcmcLogPost{
+public:
+    tmcmcLogPost(): threadSafe(false) {};
+    virtual ~tmcmcLogPost() {};
+
+    /// \brief Evaluate the log-likelihood and log-prior of nspl samples of
+    ///        dimension ndim stored row-wise in xb, writing the results into
+    ///        llik and lprior (of size nll=nlp=nspl)
+    virtual void evalBatch(double *xb, int nspl, int ndim,
+                           double *llik, int nll, double *lprior, int nlp) = 0;
+
+    /// \brief If true, TMCMC splits each batch over nProcs threads calling
+    ///        evalBatch concurrently; otherwise evalBatch receives the whole
+    ///        batch in a single call (e.g. for Python callbacks, which can
+    ///        spread the batch over their own process pool)
+    bool threadSafe;
+};
 
 //*****************************************
 /// \class Transitional MCMC
@@ -83,6 +109,10 @@ public:
     void initTMCMCBasis(bool tmcmc_basis);
     /// \brief Initialize the CATMIPs resampling parameter for TMCMC
     void initTMCMCCATSteps(int tmcmc_CATSteps);
+    /// \brief Initialize the in-process batch log-posterior callback;
+    ///        if not set, TMCMC calls the external tmcmc_getLL.sh and
+    ///        tmcmc_getLP.sh scripts
+    void initTMCMCLogPost(tmcmcLogPost *tmcmc_logpost);
 
     // Get functions:
 
@@ -114,6 +144,7 @@ private:
     bool TMCMCBasis; // Resample according to BASIS and CATMIPs
     int TMCMCCATSteps; // CATMIPs resampling parameter
     std::vector<std::vector<double>> tmcmc_rngs; // The ranges for all samples
+    tmcmcLogPost *TMCMCLogPost = NULL; // In-process batch log-posterior
 
     // Initalization Flags
     bool tmcmcNprocsInit_ = false;
@@ -145,6 +176,7 @@ typedef std::vector<char>    CharVector;
 double tmcmc (RealVector &spls, RealVector &lprior, RealVector &llik,
            double gm, int nspl, int iseed,
            int nProcs, int ndim, double cv, int MFactor,
-           bool basis, int CATSteps, int write_flag) ;
+           bool basis, int CATSteps, int write_flag,
+           tmcmcLogPost *lpost = NULL) ;
 
 #endif
@@ -32,6 +32,10 @@
 #include <iostream>
 #include <float.h>
 #include <limits.h>
+#include <vector>
+#include <algorithm>
+#include <numeric>
+#include <thread>
 
 #include "Array1D.h"
 #include "Array2D.h"
@@ -824,49 +828,106 @@ void ihsP(const int ndim, const int ns, int *x, const int  dupl, dsfmt_t *rnstat
 
 }
 
-void distCorr(const Array2D<double> &spl, Array2D<double> &dCor) {
+// Sum over i,j of |x_i-x_j||y_i-y_j| for centered univariate samples x and y,
+// given the order of x and the ranks of y, in O(n log n) operations
+// (X. Huo and G.J. Szekely, Technometrics 58(4), 2016)
+static double distCovSum(const std::vector<double> &x, const std::vector<int> &xord,
+                         const std::vector<double> &y, const std::vector<int> &yrank) {
+
+  int n = x.size();
+  // Fenwick trees over the ranks of y for the weights 1, y, x, x*y
+  std::vector<double> fw(4*(n+1),0.0);
+  double tw[4]={0.0,0.0,0.0,0.0};
+  double acc = 0.0;
+  for (int k=0; k<n; k++ ) {
+    int i = xord[k];
+    double wi[4]={1.0,y[i],x[i],x[i]*y[i]};
+    // sums over j before i in x order with y_j < y_i
+    double dw[4]={0.0,0.0,0.0,0.0};
+    for (int r=yrank[i]; r>0; r -= (r & (-r)) )
+      for (int l=0; l<4; l++ ) dw[l] += fw[4*r+l];
+    double sw[4];
+    for (int l=0; l<4; l++ ) sw[l] = 2.0*dw[l]-tw[l];
+    acc += wi[3]*sw[0]-x[i]*sw[1]-y[i]*sw[2]+sw[3];
+    for (int r=yrank[i]+1; r<=n; r += (r & (-r)) )
+      for (int l=0; l<4; l++ ) fw[4*r+l] += wi[l];
+    for (int l=0; l<4; l++ ) tw[l] += wi[l];
+  }
+
+  return 2.0*acc;
+
+}
+
+void distCorr(const Array2D<double> &spl, Array2D<double> &dCor, int nthreads) {
 
   int nspl  = spl.XSize();
   int nvars = spl.YSize();
-	//cout<<nspl<<" "<<nvars<<endl;
-
-  if (nspl > 20000)
-    printf("Warning ! This might be a lengthy calculation: nspl=%d\n",nspl);
 
-  std::vector< Array2D<double> > As;
+  // Centered samples, sort order, ranks and distance matrix row sums
+  // for each variable; only O(nspl) memory per variable
+  std::vector< std::vector<double> > xs(nvars, std::vector<double>(nspl));
+  std::vector< std::vector<int> > xord(nvars, std::vector<int>(nspl));
+  std::vector< std::vector<int> > xrank(nvars, std::vector<int>(nspl));
+  std::vector< std::vector<double> > rs(nvars, std::vector<double>(nspl));
+  Array1D<double> rsTot(nvars,0.0), rsSq(nvars,0.0), xSq(nvars,0.0);
   for (int i=0; i<nvars; i++ ) {
-    Array2D<double> Amat(nspl,nspl,0.0);
-    for (int i1=1; i1<nspl; i1++ )
-      for (int i2=0; i2<i1; i2++ ) {
-        Amat(i1,i2) = fabs(spl(i1,i)-spl(i2,i));
-        Amat(i2,i1) = Amat(i1,i2);
-      }
-    // Compute means
-    Array1D<double> Arow, Acol;
-    getMean(Amat, Arow, "R");
-    getMean(Amat, Acol, "C");
-    double Amn = get_mean(Arow);
-
-    // subtract/add means (linewise, columnwise, overall)
-    matPvec(Amat, Arow, -1.0, "R");
-    matPvec(Amat, Acol, -1.0, "C");
-    addVal(Amat,Amn);
-    As.push_back(Amat);
+    double xmn = 0.0;
+    for (int k=0; k<nspl; k++ ) xmn += spl(k,i);
+    xmn /= nspl;
+    for (int k=0; k<nspl; k++ ) {
+      xs[i][k] = spl(k,i)-xmn;
+      xSq(i) += xs[i][k]*xs[i][k];
+    }
+    std::iota(xord[i].begin(), xord[i].end(), 0);
+    std::sort(xord[i].begin(), xord[i].end(),
+              [&](int a, int b) {return xs[i][a] < xs[i][b];});
+    double tot = 0.0;
+    for (int k=0; k<nspl; k++ ) tot += xs[i][k];
+    double cs = 0.0;
+    for (int k=0; k<nspl; k++ ) {
+      int ik = xord[i][k];
+      double v = xs[i][ik];
+      xrank[i][ik] = k;
+      rs[i][ik] = v*k-cs+(tot-cs-v)-v*(nspl-1-k);
+      cs += v;
+      rsTot(i) += rs[i][ik];
+      rsSq(i)  += rs[i][ik]*rs[i][ik];
+    }
   }
 
+  // Distance variances
+  double n2 = (double) nspl*nspl;
   Array1D<double> dVarX(nvars,0.0);
-  for (int i=0; i<nvars; i++ ) {
-    Array2D<double> Atmp = dotmult(As[i],As[i]);
-    dVarX(i) = sqrt(get_mean(Atmp));
-    //printf("%d: %e\n",i,dVarX(i));
-  }
+  for (int i=0; i<nvars; i++ )
+    dVarX(i) = sqrt(2.0*nspl*xSq(i)/n2-2.0*rsSq(i)/(n2*nspl)+rsTot(i)*rsTot(i)/(n2*n2));
 
-  dCor.Resize(nvars,nvars,0.0);
+  // Distance correlations, with variable pairs spread over threads
+  std::vector< std::pair<int,int> > pairs;
   for (int i1=0; i1<nvars; i1++ )
-    for (int i2=0; i2<i1; i2++ ) {
-      Array2D<double> Atmp = dotmult(As[i1],As[i2]);
-      dCor(i1,i2) = sqrt(get_mean(Atmp))/sqrt(dVarX(i1)*dVarX(i2));
+    for (int i2=0; i2<i1; i2++ )
+      pairs.push_back(std::make_pair(i1,i2));
+
+  dCor.Resize(nvars,nvars,0.0);
+  auto worker = [&](int ithr) {
+    for (size_t ip=ithr; ip<pairs.size(); ip+=nthreads ) {
+      int i1 = pairs[ip].first;
+      int i2 = pairs[ip].second;
+      double abSum = distCovSum(xs[i1], xord[i1], xs[i2], xrank[i2]);
+      double rsAB  = 0.0;
+      for (int k=0; k<nspl; k++ ) rsAB += rs[i1][k]*rs[i2][k];
+      double dCov2 = abSum/n2-2.0*rsAB/(n2*nspl)+rsTot(i1)*rsTot(i2)/(n2*n2);
+      dCor(i1,i2) = sqrt(std::max(dCov2,0.0))/sqrt(dVarX(i1)*dVarX(i2));
     }
+  };
+  if (nthreads < 1) nthreads = 1;
+  if (nthreads == 1)
+    worker(0);
+  else {
+    std::vector<std::thread> workers;
+    for (int ithr=0; ithr<nthreads; ithr++ )
+      workers.push_back(std::thread(worker, ithr));
+    for (auto &w: workers) w.join();
+  }
 
   return ;
 
@@ -142,8 +142,10 @@ void ihsP(int ns, int np, int *rpos, int dfac, dsfmt_t *rnstate);
 /// \brief Compute distance correlation factors given a set of samples
 /// (no. of rows in spl) from a collection of random variables (no. of
 /// columns in spl). dCor(i,j), with i>j stores the distance
-/// correlation values between random variables i and j
-void distCorr(const Array2D<double> &spl, Array2D<double> &dCor) ;
+/// correlation values between random variables i and j. Each pair is
+/// computed from sorted samples in O(nspl log nspl) operations and O(nspl)
+/// memory; the pairs are spread over nthreads threads
+void distCorr(const Array2D<double> &spl, Array2D<double> &dCor, int nthreads=1) ;
 
 //---------------------------------------------------------------------------------------
 #endif // PROBABILITY_H